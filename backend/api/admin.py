@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from . import search
 from .models import User, Warehouse, Announcement
 
 
@@ -24,6 +25,16 @@ class AnnouncementAdmin(admin.ModelAdmin):
     list_display = ('title', 'created_at', 'created_by', 'is_active')
     search_fields = ('title', 'content')
     list_filter = ('created_at', 'is_active')
+    
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search through the full-text index (see api.search) instead of a
+        LIKE '%term%' scan of every title and content.
+        """
+        terms = search.parse_query(search_term)
+        if not terms:
+            return super().get_search_results(request, queryset, search_term)
+        return search.filter_queryset(queryset, terms), False
 
 
 admin.site.register(User, CustomUserAdmin)
@@ -1,8 +1,17 @@
 
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
 
+    def ready(self):
+        from . import checks  # noqa: F401 (registers the system checks)
+        from . import signals
+        from .metrics import install_query_timer
+
+        connection_created.connect(install_query_timer, dispatch_uid="api.metrics.install_query_timer")
+        post_migrate.connect(signals.restore_search_index, sender=self, dispatch_uid="api.signals.restore_search_index")
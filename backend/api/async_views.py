@@ -0,0 +1,213 @@
+"""
+Async versions of the read endpoints, routed in front of the DRF views when
+ASYNC_READ_VIEWS is on (the default under warehouse_admin.asgi).
+
+Each view borrows everything but its I/O from the DRF view it stands in for:
+queryset, serializer, permissions, pagination and conditional GET
+validators. Only the database and cache calls are replaced with their async
+counterparts, so responses match the sync views byte for byte. Other
+methods on the same URL (writes, OPTIONS) and requests for the browsable
+API are handed to the DRF view unchanged.
+"""
+from abc import ABC, abstractmethod
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+from . import counters
+from .cache import USERS, alast_modified, aversion, aversions
+
+
+class AsyncAPIView(View, ABC):
+    """
+    Runs the GET requests of a DRF view on the event loop. as_view() takes
+    the DRF view function it stands in for (from a router or .as_view()),
+    which keeps handling every other request. Subclasses implement handle().
+    """
+    sync_view = None
+
+    @classmethod
+    def as_view(cls, sync_view, **initkwargs):
+        view = super().as_view(sync_view=sync_view, **initkwargs)
+        # View only does this itself when the class defines async method handlers
+        markcoroutinefunction(view)
+        # Look like the DRF view to metrics labels and browsable API breadcrumbs
+        view.cls = sync_view.cls
+        view.initkwargs = sync_view.initkwargs
+        view.actions = getattr(sync_view, 'actions', None)
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+        view = self.create_view(request, *args, **kwargs)
+        view.request = drf_request = view.initialize_request(request, *args, **kwargs)
+        try:
+            # The same steps as APIView.initial()
+            view.format_kwarg = view.get_format_suffix(**kwargs)
+            drf_request.accepted_renderer, drf_request.accepted_media_type = view.perform_content_negotiation(drf_request)
+            if drf_request.accepted_renderer.format != 'json':
+                return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+            drf_request.version, drf_request.versioning_scheme = view.determine_version(drf_request, *args, **kwargs)
+            await self.authenticate(drf_request)
+            view.check_permissions(drf_request)
+            view.check_throttles(drf_request)
+            response = await self.handle(view, drf_request)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(drf_request, response, *args, **kwargs)
+        return self.render(response)
+
+    def create_view(self, request, *args, **kwargs):
+        """
+        Instantiate the DRF view as its view function would.
+        """
+        view = self.sync_view.cls(**self.sync_view.initkwargs)
+        actions = getattr(self.sync_view, 'actions', None)
+        if actions is not None:
+            view.action_map = dict(actions)
+            if 'get' in actions:
+                view.action_map.setdefault('head', actions['get'])
+            for method, action in view.action_map.items():
+                setattr(view, method, getattr(view, action))
+        view.setup(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        return view
+
+    async def authenticate(self, request):
+        """
+        Authenticate like Request.user would, awaiting authenticators that
+        provide aauthenticate().
+        """
+        for authenticator in request.authenticators:
+            try:
+                if hasattr(authenticator, 'aauthenticate'):
+                    result = await authenticator.aauthenticate(request._request)
+                else:
+                    result = await sync_to_async(authenticator.authenticate)(request)
+            except APIException:
+                request.user, request.auth = AnonymousUser(), None
+                raise
+            if result is not None:
+                request._authenticator = authenticator
+                request.user, request.auth = result
+                return
+        request.user, request.auth = AnonymousUser(), None
+
+    def render(self, response):
+        """
+        Render a DRF Response into a plain HttpResponse here, on the event
+        loop; Django would otherwise move to a thread to render it.
+        """
+        if not isinstance(response, Response):
+            return response
+        content = response.rendered_content
+        rendered = HttpResponse(content, status=response.status_code)
+        for header, value in response.items():
+            rendered[header] = value
+        return rendered
+
+    @abstractmethod
+    async def handle(self, view, request):
+        """
+        Return the Response for an authenticated, permitted GET, as the DRF
+        view's handler would.
+        """
+
+    async def get_object(self, view):
+        """
+        GenericAPIView.get_object() with an async lookup.
+        """
+        queryset = view.filter_queryset(view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        try:
+            obj = await queryset.aget(**{view.lookup_field: view.kwargs[lookup_url_kwarg]})
+        except queryset.model.DoesNotExist:
+            raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+        except (TypeError, ValueError, DjangoValidationError):
+            raise Http404
+        view.check_object_permissions(view.request, obj)
+        return obj
+
+
+class ConditionalListView(AsyncAPIView):
+    """
+    ConditionalGetMixin.list() over FastListMixin.list(): validators first,
+    then the page.
+    """
+    async def handle(self, view, request):
+        queryset = view.filter_queryset(view.get_queryset())
+        stats = await queryset.order_by().aaggregate(**view.get_list_stats(request))
+        etag, modified = view.list_validators(
+            request, stats, await alast_modified(view.data_scope, USERS), await aversions(view.data_scope, USERS)
+        )
+        response = view.not_modified(request, etag, modified)
+        if response is None:
+            queryset = view.list_queryset(queryset)
+            page = await view.paginator.apaginate_queryset(queryset, request, view=view)
+            if page is not None:
+                response = view.get_paginated_response(view.list_data(page))
+            else:
+                rows = [row async for row in queryset]
+                response = Response(view.list_data(rows))
+        return view.set_validators(response, etag, modified)
+
+
+class ConditionalDetailView(AsyncAPIView):
+    """
+    ConditionalGetMixin.retrieve().
+    """
+    async def handle(self, view, request):
+        instance = await self.get_object(view)
+        etag, modified = view.detail_validators(request, instance, await aversion(USERS))
+        response = view.not_modified(request, etag, modified)
+        if response is None:
+            response = Response(view.get_serializer(instance).data)
+        return view.set_validators(response, etag, modified)
+
+
+class WarehouseCountView(AsyncAPIView):
+    """
+    WarehouseViewSet.count().
+    """
+    async def handle(self, view, request):
+        data = {'count': await counters.aget(counters.WAREHOUSES)}
+        if request.query_params.get('by') == 'owner':
+            data['by_owner'] = await counters.abreakdown(counters.WAREHOUSES, counters.OWNER_PREFIX)
+        return Response(data)
+
+
+class RecentAnnouncementsView(AsyncAPIView):
+    """
+    AnnouncementViewSet.recent().
+    """
+    async def handle(self, view, request):
+        limit = int(request.query_params.get('limit', 5))
+        announcements = [announcement async for announcement in view.get_queryset().filter(is_active=True)[:limit]]
+        return Response(view.get_serializer(announcements, many=True).data)
+
+
+class UserCountView(AsyncAPIView):
+    """
+    UserViewSet.count().
+    """
+    async def handle(self, view, request):
+        data = {'count': await counters.aget(counters.USERS)}
+        if request.query_params.get('by') == 'role':
+            data['by_role'] = await counters.abreakdown(counters.USERS, counters.ROLE_PREFIX)
+        return Response(data)
+
+
+class CurrentUserView(AsyncAPIView):
+    """
+    api.views.CurrentUserView.get().
+    """
+    async def handle(self, view, request):
+        return Response(view.get_serializer(view.get_object()).data)
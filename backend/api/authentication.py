@@ -0,0 +1,171 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework import HTTP_HEADER_ENCODING
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+# User columns kept in the cache; anything else is loaded lazily on access
+CACHED_USER_FIELDS = (
+    "id", "username", "email", "first_name", "last_name", "role",
+    "is_active", "is_staff", "is_superuser",
+)
+
+
+def _version_key(user_id):
+    return f"auth-user-version:{user_id}"
+
+
+def _entry_key(user_id, version):
+    return f"auth-user:{user_id}:{version}"
+
+
+def user_cache_key(user_id):
+    """
+    Return the key a user's identity is cached under at the user's current
+    version. Read it before loading the row: a write that lands in between
+    bumps the version, so the row set under this key is never read again.
+    """
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seeded from the clock, like api.cache versions, so a version lost to
+        # eviction never repeats
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return _entry_key(user_id, version)
+
+
+async def auser_cache_key(user_id):
+    key = _version_key(user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=None)
+        version = await cache.aget(key)
+    return _entry_key(user_id, version)
+
+
+def _bump(user_id):
+    key = _version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_cached_user(user_id):
+    """
+    Move a user to a new cache version now and again once the current
+    transaction commits, so neither a request that read the old row before
+    the write nor one that read it before the commit can have it served.
+    """
+    _bump(user_id)
+    transaction.on_commit(lambda: _bump(user_id))
+
+
+def cached_field_names():
+    # Model.from_db expects values in concrete field order
+    return [field.attname for field in User._meta.concrete_fields if field.attname in CACHED_USER_FIELDS]
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that caches the resolved user's identity (id, role,
+    is_active and profile fields) for the rest of the token's lifetime instead
+    of loading the User row on every request.
+
+    Cache hits return a User built with Model.from_db, so fields outside
+    CACHED_USER_FIELDS are deferred and fetched on first access rather than
+    silently missing. The api.signals handlers invalidate a user's entries
+    whenever the user is saved or deleted; only a cache every process shares
+    carries that to the other workers, so AUTH_USER_CACHE is off by default
+    with a per-process cache (see api.checks).
+    """
+
+    def uses_cache(self):
+        # Revocation checks need the password hash, which is never cached
+        return (
+            settings.AUTH_USER_CACHE
+            and not api_settings.CHECK_REVOKE_TOKEN
+            and api_settings.USER_ID_FIELD == "id"
+        )
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def cache_timeout(self, validated_token):
+        return max(1, int(validated_token.get("exp", time.time()) - time.time()))
+
+    def from_cache(self, values):
+        user = User.from_db(DEFAULT_DB_ALIAS, cached_field_names(), values)
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+    def get_user(self, validated_token):
+        if not self.uses_cache():
+            return super().get_user(validated_token)
+
+        key = user_cache_key(self.get_user_id(validated_token))
+        values = cache.get(key)
+        if values is None:
+            user = super().get_user(validated_token)
+            cache.set(key, [getattr(user, name) for name in cached_field_names()], self.cache_timeout(validated_token))
+            return user
+        return self.from_cache(values)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views; takes the Django HttpRequest.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        if not self.uses_cache():
+            return await sync_to_async(super().get_user)(validated_token)
+
+        key = await auser_cache_key(self.get_user_id(validated_token))
+        values = await cache.aget(key)
+        if values is not None:
+            return self.from_cache(values)
+        try:
+            user = await User.objects.aget(pk=self.get_user_id(validated_token))
+        except User.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        await cache.aset(key, [getattr(user, name) for name in cached_field_names()], self.cache_timeout(validated_token))
+        return user
+
+
+class EventStreamAuthentication(CachedJWTAuthentication):
+    """
+    CachedJWTAuthentication that also takes the access token from ?token=,
+    since EventSource cannot send an Authorization header. Tokens in URLs end
+    up in access logs, so only the event stream accepts them there.
+    """
+    query_param = "token"
+
+    def get_header(self, request):
+        header = super().get_header(request)
+        token = request.GET.get(self.query_param)
+        if header is None and token:
+            return f"{api_settings.AUTH_HEADER_TYPES[0]} {token}".encode(HTTP_HEADER_ENCODING)
+        return header
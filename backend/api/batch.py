@@ -0,0 +1,197 @@
+"""
+Batched API calls: POST /api/batch/ runs several API requests in one round
+trip, for screens that load a handful of independent endpoints at once.
+
+Each sub-request is resolved through the URLconf to the view it would reach
+on its own (the DRF view, for paths the async views stand in front of), with
+the batch's user force-authenticated: the token is decoded and the user
+looked up once per batch instead of once per call. Results come back in
+order, each with its own status, headers and data, and one failing does not
+stop the others. Sub-requests are not atomic together: each write runs in a
+transaction of its own, rolled back when it fails (an error status or an
+exception), so a failed write leaves nothing for later sub-requests to see.
+Streamed responses (exports, event streams)
+cannot be batched; views list the actions that stream in streaming_actions,
+and views that must not run inside a batch set batchable = False.
+
+With concurrent set, consecutive read-only sub-requests run on a pool of
+BATCH_WORKERS threads, while writes still run one at a time in order, so
+later sub-requests see them. Inside a transaction (ATOMIC_REQUESTS, tests,
+benchmarks) everything runs in the calling thread, the only one that sees
+its uncommitted writes. Pool threads keep their own database connections,
+closed like a request thread's once CONN_MAX_AGE has passed.
+"""
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from urllib.parse import unquote, unquote_to_bytes, urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections, connection, transaction
+from django.urls import Resolver404, resolve
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .async_views import AsyncAPIView
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE")
+READ_METHODS = ("GET", "HEAD")
+
+# Taken from the batch request: where it came from, for absolute URLs and logs
+INHERITED_META = (
+    "SCRIPT_NAME", "SERVER_NAME", "SERVER_PORT", "SERVER_PROTOCOL", "REMOTE_ADDR",
+    "HTTP_HOST", "HTTP_USER_AGENT", "HTTP_X_FORWARDED_FOR", "HTTP_X_FORWARDED_HOST", "HTTP_X_FORWARDED_PROTO",
+)
+# Sub-request headers that are ignored: the batch authenticates, bodies are JSON
+IGNORED_HEADERS = {"authorization", "cookie", "content-length", "content-type", "host"}
+
+
+class SubRequestError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+_lock = threading.Lock()
+_pool = None
+
+
+def pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(settings.BATCH_WORKERS, thread_name_prefix="batch")
+        return _pool
+
+
+def run(request, items, concurrent=False):
+    """
+    Return the result of each sub-request of the DRF request's batch, in
+    order: {"status", "headers", "body"}.
+    """
+    concurrent = concurrent and settings.BATCH_WORKERS > 1 and not connection.in_atomic_block
+    results = [None] * len(items)
+    reads = []
+
+    def run_reads():
+        if len(reads) > 1:
+            for index, result in zip(reads, pool().map(lambda index: run_in_worker(request, items[index]), reads)):
+                results[index] = result
+        elif reads:
+            results[reads[0]] = run_one(request, items[reads[0]])
+        reads.clear()
+
+    for index, item in enumerate(items):
+        if concurrent and isinstance(item, dict) and str(item.get("method", "GET")).upper() in READ_METHODS:
+            reads.append(index)
+        else:
+            run_reads()
+            results[index] = run_one(request, item)
+    run_reads()
+    return results
+
+
+def run_in_worker(request, item):
+    try:
+        return run_one(request, item)
+    finally:
+        close_old_connections()
+
+
+def run_one(request, item):
+    try:
+        method, view, match, sub_request = prepare(request, item)
+        with nullcontext() if method in READ_METHODS else transaction.atomic():
+            response = view(sub_request, *match.args, **match.kwargs)
+            if response.status_code >= 400 and method not in READ_METHODS:
+                transaction.set_rollback(True)
+    except SubRequestError as exc:
+        return result(exc.status, {}, {"detail": exc.detail})
+    except Exception:
+        logger.exception("Batched request failed: %r", item)
+        return result(500, {}, {"detail": "A server error occurred."})
+
+    if response.streaming:
+        # Never iterated, so it started nothing
+        return result(400, {}, {"detail": "Streamed responses cannot be batched: request this path on its own."})
+    if method == "HEAD":
+        body = None
+    elif isinstance(response, Response):
+        # Rendered once, with the batch
+        body = response.data
+    elif response.content and response.get("Content-Type", "").startswith("application/json"):
+        body = json.loads(response.content)
+    else:
+        body = response.content.decode(response.charset) or None
+    headers = {name: value for name, value in response.items() if name != "Content-Type"}
+    return result(response.status_code, headers, body)
+
+
+def result(status, headers, body):
+    return {"status": status, "headers": headers, "body": body}
+
+
+def prepare(request, item):
+    """
+    Return (method, view, resolver match, sub-request) for a batch item.
+    Raises SubRequestError when it cannot be run.
+    """
+    if not isinstance(item, dict):
+        raise SubRequestError(400, 'Expected an object with "method", "path" and optionally "body" and "headers".')
+    method = str(item.get("method", "GET")).upper()
+    if method not in METHODS:
+        raise SubRequestError(405, f'Method "{method}" not allowed.')
+    path = item.get("path")
+    parts = urlsplit(path) if isinstance(path, str) else None
+    if parts is None or parts.scheme or parts.netloc or not parts.path.startswith("/"):
+        raise SubRequestError(400, 'Expected a "path" starting with /.')
+    headers = item.get("headers") or {}
+    if not isinstance(headers, dict) or not all(isinstance(value, str) for value in headers.values()):
+        raise SubRequestError(400, 'Expected "headers" to map names to strings.')
+
+    try:
+        match = resolve(unquote(parts.path))
+    except Resolver404:
+        raise SubRequestError(404, "Not found.") from None
+    view = match.func
+    view_class = getattr(view, "view_class", None)
+    if view_class is not None and issubclass(view_class, AsyncAPIView):
+        view = view.view_initkwargs["sync_view"]
+    cls = getattr(view, "cls", None)
+    if cls is None or not issubclass(cls, APIView):
+        # Only API views: not the admin, metrics or the frontend
+        raise SubRequestError(404, "Not found.")
+    actions = getattr(view, "actions", None) or {}
+    action = actions.get("get" if method == "HEAD" else method.lower())
+    if not getattr(cls, "batchable", True) or action in getattr(cls, "streaming_actions", ()):
+        raise SubRequestError(400, "This path cannot be batched: request it on its own.")
+
+    body = b"" if item.get("body") is None else json.dumps(item["body"]).encode()
+    environ = {name: request.META[name] for name in INHERITED_META if name in request.META}
+    environ.update({
+        "REQUEST_METHOD": method,
+        # Decoded, as WSGI servers pass it
+        "PATH_INFO": unquote_to_bytes(parts.path).decode("iso-8859-1"),
+        "QUERY_STRING": parts.query,
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "HTTP_ACCEPT": "application/json",
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.url_scheme": request.scheme,
+    })
+    for name, value in headers.items():
+        if name.lower() not in IGNORED_HEADERS:
+            environ["HTTP_" + name.upper().replace("-", "_")] = value
+    sub_request = WSGIRequest(environ)
+    # What rest_framework.test.force_authenticate() sets: DRF's Request
+    # then authenticates with these instead of running the authenticators
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    return method, view, match, sub_request
@@ -0,0 +1,134 @@
+"""
+Shared helpers for the bench_* management commands.
+"""
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+from .models import Warehouse
+
+
+@contextmanager
+def rolled_back():
+    """
+    Run the block inside a transaction that is always rolled back, so
+    benchmark fixtures never reach the real tables.
+    """
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+
+@contextmanager
+def scratch_database():
+    """
+    Run the block against a new, migrated test database that is destroyed
+    afterwards: a file in a temporary directory under SQLite, Django's test
+    database elsewhere. For benchmarks whose requests run on other threads'
+    connections, which a rolled back transaction would not cover. Those
+    connections must be closed before the block ends.
+    """
+    settings_dict = connection.settings_dict
+    test_settings = settings_dict.get("TEST", {})
+    directory = None
+    if connection.vendor == "sqlite":
+        directory = tempfile.mkdtemp(prefix="benchmark-")
+        settings_dict["TEST"] = {**test_settings, "NAME": os.path.join(directory, "db.sqlite3")}
+    try:
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            yield
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+    finally:
+        settings_dict["TEST"] = test_settings
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+
+def summarize(samples):
+    """
+    Summarize a list of durations in seconds as milliseconds.
+    """
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 0.50) * 1000,
+        "p95_ms": percentile(ordered, 0.95) * 1000,
+        "p99_ms": percentile(ordered, 0.99) * 1000,
+    }
+
+
+def time_calls(func, args_list):
+    """
+    Call func once per argument tuple and return the latency summary.
+    """
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def time_concurrently(func, args_list, concurrency):
+    """
+    Call func once per argument tuple from concurrency threads. Returns the
+    latency samples in seconds, the results in call order and the wall time.
+    """
+    def timed(args):
+        start = time.perf_counter()
+        result = func(*args)
+        return time.perf_counter() - start, result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        outcomes = list(executor.map(timed, args_list))
+    elapsed = time.perf_counter() - start
+    return [sample for sample, _ in outcomes], [result for _, result in outcomes], elapsed
+
+
+def format_summary(label, summary):
+    return (
+        f"{label:<32} n={summary['n']:<6} mean={summary['mean_ms']:9.3f}ms "
+        f"p50={summary['p50_ms']:9.3f}ms p95={summary['p95_ms']:9.3f}ms p99={summary['p99_ms']:9.3f}ms"
+    )
+
+
+def create_warehouses(count, seed=0, batch_size=5000, owner=None, stdout=None):
+    """
+    Bulk insert count warehouses with uniformly random coordinates.
+    """
+    rng = random.Random(seed)
+    created = 0
+    while created < count:
+        batch = []
+        for _ in range(min(batch_size, count - created)):
+            warehouse = Warehouse(
+                city=f"City {rng.randrange(10000)}",
+                latitude=rng.uniform(-85, 85),
+                longitude=rng.uniform(-180, 180),
+                created_by=owner,
+            )
+            warehouse.set_geohash()
+            batch.append(warehouse)
+        Warehouse.objects.bulk_create(batch)
+        created += len(batch)
+        if stdout is not None:
+            stdout.write(f"  inserted {created}/{count} warehouses")
+    return created
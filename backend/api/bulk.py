@@ -0,0 +1,118 @@
+"""
+Helpers for the bulk endpoints: reading rows from JSON or CSV uploads,
+batching writes and collecting per-row error reports.
+"""
+import codecs
+import csv
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser
+
+# Ids the id columns can hold (signed 64-bit); larger ints overflow the
+# database driver instead of matching nothing
+ID_RANGE = range(-2 ** 63, 2 ** 63)
+# An id in a CSV cell, which is always text
+CSV_ID = re.compile(r'-?[0-9]+')
+
+
+class CSVParser(BaseParser):
+    """
+    Parses a text/csv request body into a list of dicts keyed by the header row.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return read_csv(stream)
+
+
+def read_csv(stream):
+    try:
+        return list(csv.DictReader(codecs.iterdecode(stream, 'utf-8-sig')))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ParseError(f'CSV parse error - {exc}')
+
+
+def request_rows(request, file_field='file'):
+    """
+    Return the rows of a bulk request: a JSON array, a text/csv body,
+    or a CSV file uploaded as multipart form data.
+    """
+    upload = request.FILES.get(file_field)
+    if upload is not None:
+        rows = read_csv(upload)
+    else:
+        rows = request.data
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise ValidationError({'non_field_errors': ['Expected a list of objects or a CSV upload.']})
+    max_rows = settings.BULK_MAX_ROWS
+    if len(rows) > max_rows:
+        raise ValidationError({'non_field_errors': [f'At most {max_rows} rows are accepted per request.']})
+    return rows
+
+
+def batch_size(request):
+    """
+    Batch size from the ?batch_size= query parameter, bounded by the settings.
+    """
+    try:
+        size = int(request.query_params.get('batch_size', settings.BULK_BATCH_SIZE))
+    except ValueError:
+        raise ValidationError({'batch_size': 'A valid integer is required.'})
+    return max(1, min(size, settings.BULK_MAX_BATCH_SIZE))
+
+
+def is_id(value):
+    """
+    Whether value is an int (not a bool) in ID_RANGE.
+    """
+    return isinstance(value, int) and not isinstance(value, bool) and value in ID_RANGE
+
+
+def row_id(value):
+    """
+    The id of a row: an int (not a bool), or the digits of one from a CSV
+    upload, in ID_RANGE. Returns None for anything else, floats and padded
+    strings included.
+    """
+    if isinstance(value, str) and CSV_ID.fullmatch(value):
+        value = int(value)
+    return value if is_id(value) else None
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def row_error(index, errors):
+    return {'row': index, 'errors': errors}
+
+
+def write_in_batches(items, size, write_batch):
+    """
+    Call write_batch(objects) for each batch of (row index, object) pairs, each
+    batch in its own transaction. A batch that fails at the database is retried
+    one row at a time, so one bad row only rejects itself.
+    Returns (number of rows written, per-row error reports).
+    """
+    written = 0
+    errors = []
+    for batch in chunks(items, size):
+        try:
+            with transaction.atomic():
+                write_batch([obj for _, obj in batch])
+            written += len(batch)
+            continue
+        except DatabaseError:
+            pass
+        for index, obj in batch:
+            try:
+                with transaction.atomic():
+                    write_batch([obj])
+                written += 1
+            except DatabaseError as exc:
+                errors.append(row_error(index, {'non_field_errors': [str(exc)]}))
+    return written, errors
@@ -0,0 +1,102 @@
+"""
+Versioned cache keys.
+
+Every data scope has a version number in the cache that is bumped after any
+write to its rows commits. Cached payloads put the versions they were built
+from into their keys, so one bump makes every dependent entry unreachable
+without having to know or delete the individual keys.
+"""
+import datetime
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+
+USERS = "users"
+WAREHOUSES = "warehouses"
+ANNOUNCEMENTS = "announcements"
+
+
+def _version_key(scope):
+    return f"data-version:{scope}"
+
+
+def _modified_key(scope):
+    return f"data-modified:{scope}"
+
+
+def versions(*scopes):
+    """
+    Return the current version of each scope, in order.
+    """
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Seed from the clock so a version lost to eviction never
+            # repeats one that older cache entries were built with.
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+    return tuple(found[key] for key in keys)
+
+
+def version(scope):
+    return versions(scope)[0]
+
+
+async def aversions(*scopes):
+    """
+    versions() for async views. One thread hop for all scopes, where the
+    cache's own async API would take one per key.
+    """
+    return await sync_to_async(versions)(*scopes)
+
+
+async def aversion(scope):
+    return (await aversions(scope))[0]
+
+
+def bump(*scopes):
+    now = time.time()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+        cache.set(_modified_key(scope), now, timeout=None)
+
+
+def last_modified(*scopes):
+    """
+    Return when any of the scopes was last written, including deletions.
+    A timestamp lost to eviction restarts at the current time, which can only
+    make clients revalidate early, never serve stale data.
+    """
+    keys = [_modified_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time(), timeout=None)
+            found[key] = cache.get(key)
+    return datetime.datetime.fromtimestamp(max(found.values()), tz=datetime.timezone.utc)
+
+
+async def alast_modified(*scopes):
+    """
+    last_modified() for async views, in one thread hop.
+    """
+    return await sync_to_async(last_modified)(*scopes)
+
+
+def bump_on_commit(*scopes):
+    """
+    Bump the scopes once the current transaction commits, so no reader can
+    cache pre-commit data under the new version.
+    """
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def versioned_key(prefix, *scopes):
+    return ":".join([prefix, *map(str, versions(*scopes))])
@@ -0,0 +1,26 @@
+"""
+System checks for settings the api app depends on.
+"""
+from django.conf import settings
+from django.core import checks
+
+
+@checks.register(checks.Tags.caches, checks.Tags.security)
+def check_auth_user_cache(app_configs, **kwargs):
+    """
+    AUTH_USER_CACHE needs a cache every process shares: with a per-process
+    one, a deactivated or deleted user stays cached, and authenticated, in
+    every worker but the one that made the change until their token expires.
+    """
+    backend = settings.CACHES["default"]["BACKEND"]
+    if settings.AUTH_USER_CACHE and backend.endswith(".LocMemCache"):
+        return [checks.Error(
+            "AUTH_USER_CACHE is on with a per-process cache.",
+            hint=(
+                "Point DJANGO_CACHE_BACKEND at a shared cache (Redis, Memcached) "
+                "or set AUTH_USER_CACHE=0."
+            ),
+            obj=backend,
+            id="api.E001",
+        )]
+    return []
@@ -0,0 +1,248 @@
+"""
+Warehouse clusters for map views, per zoom level and map tile.
+
+Tiles are the Web Mercator ("slippy map") tiles map libraries request: 2^z by
+2^z tiles at zoom z. Each tile is split into a GRID x GRID grid of cells and
+the warehouses in a cell become one cluster, with their centroid, count and
+the newest few ids. Bucketing is vectorized with NumPy over the tile's
+latitude and longitude columns, so a response holds at most GRID * GRID
+clusters per tile however many warehouses there are.
+
+Each tile is cached on its own under a generation number. Creating, moving
+or deleting a warehouse bumps the generation of the tiles containing its old
+and new position, one per zoom level, once the transaction commits; every
+other tile stays cached. Writes that bypass signals must call
+invalidate_points() themselves, or invalidate_all().
+"""
+import math
+import time
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+
+from . import geo
+from .cache import bump, version
+from .models import Warehouse
+
+MAX_ZOOM = 20
+# Cells per tile side: 4 cells of 64px on a 256px tile
+GRID = 4
+# Tiles per request; a 4K screen shows about 135 tiles of 256px
+MAX_TILES = 256
+# Ids listed per cluster
+SAMPLE_SIZE = 3
+# Mercator stops here; warehouses beyond it go in the top and bottom tile rows
+MAX_LATITUDE = 85.05112878
+# Runs of tiles covering more of the map than this scan the table: reading
+# most rows through geohash index ranges is several times slower
+FULL_SCAN_SHARE = 1 / 64
+# Invalidating more tiles than this at once bumps the epoch instead
+MAX_INVALIDATED_TILES = 1000
+
+# Data scope (see api.cache) bumped to drop every cached tile
+CLUSTERS = "warehouse-clusters"
+
+CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def cell_indices(latitudes, longitudes, zoom):
+    """
+    Return the global (column, row) cell index arrays of the coordinates at
+    the zoom level; the tile is the cell index // GRID.
+    """
+    cells = (1 << zoom) * GRID
+    lat = np.radians(np.clip(latitudes, -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(longitudes, dtype=float) + 180.0) / 360.0
+    y = (1.0 - np.arcsinh(np.tan(lat)) / math.pi) / 2.0
+    columns = np.clip(np.floor(x * cells), 0, cells - 1).astype(np.int64)
+    rows = np.clip(np.floor(y * cells), 0, cells - 1).astype(np.int64)
+    return columns, rows
+
+
+def tile_bounds(zoom, x, y):
+    """
+    Return the tile's (min_lon, min_lat, max_lon, max_lat). The top and
+    bottom rows reach the poles, as cell_indices() clamps latitudes there.
+    """
+    n = 1 << zoom
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    max_lat = 90.0 if y == 0 else latitude(y)
+    min_lat = -90.0 if y == n - 1 else latitude(y + 1)
+    return x / n * 360.0 - 180.0, min_lat, (x + 1) / n * 360.0 - 180.0, max_lat
+
+
+def tiles_for_bbox(zoom, min_lon, min_lat, max_lon, max_lat):
+    """
+    Return the (x, y) tiles covering the bounding box at the zoom level.
+    Raises ValueError beyond MAX_TILES.
+    """
+    spans = []
+    for box_min_lon, box_min_lat, box_max_lon, box_max_lat in geo.normalize_bbox(min_lon, min_lat, max_lon, max_lat):
+        columns, rows = cell_indices([box_min_lat, box_max_lat], [box_min_lon, box_max_lon], zoom)
+        x_start, x_stop = (columns // GRID).tolist()
+        # Rows count down from the north
+        y_stop, y_start = (rows // GRID).tolist()
+        spans.append((x_start, x_stop, y_start, y_stop))
+    total = sum((x_stop - x_start + 1) * (y_stop - y_start + 1) for x_start, x_stop, y_start, y_stop in spans)
+    if total > MAX_TILES:
+        raise ValueError(f"Covers {total} tiles at zoom {zoom}, more than {MAX_TILES}: zoom in or send a smaller bbox.")
+    return sorted({
+        (x, y)
+        for x_start, x_stop, y_start, y_stop in spans
+        for x in range(x_start, x_stop + 1)
+        for y in range(y_start, y_stop + 1)
+    })
+
+
+def cluster_tiles(zoom, tiles):
+    """
+    Compute the clusters of each (x, y) tile from the warehouse table, with
+    one query per run of adjacent tile columns. Returns {tile: [cluster]}.
+    """
+    n = 1 << zoom
+    found = {tile: [] for tile in tiles}
+    for x_start, x_stop, y_start, y_stop in _column_runs(tiles):
+        min_lon, min_lat, _, _ = tile_bounds(zoom, x_start, y_stop)
+        _, _, max_lon, max_lat = tile_bounds(zoom, x_stop, y_start)
+        if (x_stop - x_start + 1) * (y_stop - y_start + 1) > n * n * FULL_SCAN_SHARE:
+            queryset = Warehouse.objects.filter(
+                longitude__gte=min_lon, longitude__lte=max_lon, latitude__gte=min_lat, latitude__lte=max_lat,
+            )
+        else:
+            queryset = Warehouse.objects.within_bbox(min_lon, min_lat, max_lon, max_lat)
+        rows = list(queryset.values_list("id", "latitude", "longitude"))
+        if rows:
+            for tile, cluster in _bucket(zoom, np.array(rows, dtype=float), tiles):
+                found[tile].append(cluster)
+    return found
+
+
+def _column_runs(tiles):
+    """
+    Group tiles into runs of adjacent columns, two when a bbox crosses the
+    antimeridian, returning (x_start, x_stop, y_start, y_stop) for each.
+    """
+    runs = []
+    for x in sorted({x for x, _ in tiles}):
+        if runs and x == runs[-1][1] + 1:
+            runs[-1][1] = x
+        else:
+            runs.append([x, x])
+    return [
+        (start, stop, min(y for x, y in tiles if start <= x <= stop), max(y for x, y in tiles if start <= x <= stop))
+        for start, stop in runs
+    ]
+
+
+def _bucket(zoom, data, tiles):
+    """
+    Yield (tile, cluster) for the warehouse rows (id, latitude, longitude)
+    that fall in the tiles, cell by cell in row-major order.
+    """
+    n = 1 << zoom
+    ids = data[:, 0].astype(np.int64)
+    latitudes, longitudes = data[:, 1], data[:, 2]
+    columns, rows = cell_indices(latitudes, longitudes, zoom)
+    # The query covers whole runs and includes its edges, so rows from
+    # neighbouring and already cached tiles are dropped here
+    wanted = np.array([y * n + x for x, y in tiles], dtype=np.int64)
+    inside = np.isin((rows // GRID) * n + columns // GRID, wanted)
+    if not inside.all():
+        ids, latitudes, longitudes = ids[inside], latitudes[inside], longitudes[inside]
+        columns, rows = columns[inside], rows[inside]
+        if not len(ids):
+            return
+
+    cells = rows * (n * GRID) + columns
+    # Group by cell, newest id first within each
+    order = np.lexsort((-ids, cells))
+    cells, ids = cells[order], ids[order]
+    latitudes, longitudes = latitudes[order], longitudes[order]
+    starts = np.flatnonzero(np.r_[True, cells[1:] != cells[:-1]])
+    counts = np.diff(np.r_[starts, len(cells)])
+    centroid_lat = np.add.reduceat(latitudes, starts) / counts
+    centroid_lon = np.add.reduceat(longitudes, starts) / counts
+    tile_x = (cells[starts] % (n * GRID)) // GRID
+    tile_y = (cells[starts] // (n * GRID)) // GRID
+
+    for lat, lon, count, start, x, y in zip(
+        centroid_lat.tolist(), centroid_lon.tolist(), counts.tolist(), starts.tolist(), tile_x.tolist(), tile_y.tolist()
+    ):
+        yield (x, y), {
+            "latitude": round(lat, 6),
+            "longitude": round(lon, 6),
+            "count": count,
+            "sample_ids": ids[start:start + min(count, SAMPLE_SIZE)].tolist(),
+        }
+
+
+def _generation_key(zoom, x, y):
+    return f"warehouse-clusters-gen:{zoom}:{x}:{y}"
+
+
+def clusters_for_bbox(zoom, min_lon, min_lat, max_lon, max_lat):
+    """
+    Return the clusters of every tile covering the bounding box, computing
+    only the tiles that are not cached. Raises ValueError beyond MAX_TILES.
+    """
+    tiles = tiles_for_bbox(zoom, min_lon, min_lat, max_lon, max_lat)
+    generation_keys = [_generation_key(zoom, x, y) for x, y in tiles]
+    generations = cache.get_many(generation_keys)
+    for key in generation_keys:
+        if key not in generations:
+            # Seeded from the clock like api.cache versions, so a generation
+            # lost to eviction never repeats one a cached tile was built with
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+
+    epoch = version(CLUSTERS)
+    keys = {
+        tile: f"warehouse-clusters:{epoch}:{zoom}:{tile[0]}:{tile[1]}:{generations[key]}"
+        for tile, key in zip(tiles, generation_keys)
+    }
+    cached = cache.get_many(keys.values())
+    missing = [tile for tile in tiles if keys[tile] not in cached]
+    if missing:
+        computed = {keys[tile]: tile_clusters for tile, tile_clusters in cluster_tiles(zoom, missing).items()}
+        cache.set_many(computed, CACHE_TIMEOUT)
+        cached.update(computed)
+    return [cluster for tile in tiles for cluster in cached[keys[tile]]]
+
+
+def invalidate_points(points):
+    """
+    Drop the cached tiles containing any of the (latitude, longitude) points,
+    at every zoom level, once the current transaction commits.
+    """
+    points = list(points)
+    if not points:
+        return
+    latitudes, longitudes = np.array(points, dtype=float).reshape(-1, 2).T
+    keys = set()
+    for zoom in range(MAX_ZOOM + 1):
+        columns, rows = cell_indices(latitudes, longitudes, zoom)
+        keys.update(_generation_key(zoom, x, y) for x, y in set(zip((columns // GRID).tolist(), (rows // GRID).tolist())))
+        if len(keys) > MAX_INVALIDATED_TILES:
+            transaction.on_commit(invalidate_all)
+            return
+
+    def bump_generations():
+        for key in keys:
+            try:
+                cache.incr(key)
+            except ValueError:
+                # Never cached, or evicted: nothing was stored under it
+                pass
+
+    transaction.on_commit(bump_generations)
+
+
+def invalidate_all():
+    """
+    Drop every cached tile.
+    """
+    bump(CLUSTERS)
@@ -0,0 +1,136 @@
+"""
+Materialized counters for the users/count and warehouses/count endpoints.
+
+Each scope keeps a total row (empty key) plus breakdown rows: users by role
+and warehouses by owner. Signal handlers in api.signals apply deltas as rows
+are saved and deleted. Bulk writes that bypass signals (bulk_create,
+QuerySet.update) must call adjust() themselves, or be followed by
+`manage.py rebuild_counters`.
+"""
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Counter, User, Warehouse
+
+USERS = "users"
+WAREHOUSES = "warehouses"
+TOTAL = ""
+
+ROLE_PREFIX = "role:"
+OWNER_PREFIX = "owner:"
+
+
+def role_key(role):
+    return f"{ROLE_PREFIX}{role}"
+
+
+def owner_key(owner_id):
+    return f"{OWNER_PREFIX}{owner_id if owner_id is not None else 'none'}"
+
+
+def compute(scope):
+    """
+    Count the scope's rows from the source table, returning {key: value}.
+    """
+    if scope == USERS:
+        values = {TOTAL: User.objects.count()}
+        for row in User.objects.order_by().values("role").annotate(n=Count("id")):
+            values[role_key(row["role"])] = row["n"]
+    elif scope == WAREHOUSES:
+        values = {TOTAL: Warehouse.objects.count()}
+        for row in Warehouse.objects.order_by().values("created_by_id").annotate(n=Count("id")):
+            values[owner_key(row["created_by_id"])] = row["n"]
+    else:
+        raise ValueError(f"Unknown counter scope: {scope}")
+    return values
+
+
+def rebuild(scope, dry_run=False):
+    """
+    Recompute a scope from its table and replace the stored counters.
+    Returns the drift as {key: (stored, actual)} for keys that differed.
+    """
+    with transaction.atomic():
+        stored = dict(
+            Counter.objects.select_for_update().filter(scope=scope).values_list("key", "value")
+        )
+        actual = compute(scope)
+        drift = {
+            key: (stored.get(key, 0), actual.get(key, 0))
+            for key in stored.keys() | actual.keys()
+            if stored.get(key, 0) != actual.get(key, 0) or key not in stored
+        }
+        if not dry_run:
+            Counter.objects.filter(scope=scope).delete()
+            Counter.objects.bulk_create(
+                Counter(scope=scope, key=key, value=value) for key, value in actual.items() if value or key == TOTAL
+            )
+    return drift
+
+
+def adjust(scope, deltas):
+    """
+    Apply {key: delta} increments to a scope's counters.
+    A scope without a total row has never been built, so it is rebuilt from
+    its table instead, which already reflects the write being counted.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    if not Counter.objects.filter(scope=scope, key=TOTAL).exists():
+        rebuild(scope)
+        return
+    for key, delta in deltas.items():
+        if Counter.objects.filter(scope=scope, key=key).update(value=F("value") + delta):
+            continue
+        try:
+            with transaction.atomic():
+                Counter.objects.create(scope=scope, key=key, value=delta)
+        except IntegrityError:
+            # Created concurrently by another writer
+            Counter.objects.filter(scope=scope, key=key).update(value=F("value") + delta)
+
+
+def get(scope, key=TOTAL):
+    """
+    Read one counter, building the scope on first use.
+    """
+    value = Counter.objects.filter(scope=scope, key=key).values_list("value", flat=True).first()
+    if value is None:
+        if Counter.objects.filter(scope=scope, key=TOTAL).exists():
+            return 0
+        rebuild(scope)
+        value = Counter.objects.filter(scope=scope, key=key).values_list("value", flat=True).first()
+    return value or 0
+
+
+def breakdown(scope, prefix):
+    """
+    Return {suffix: value} for the scope's counters whose key starts with prefix.
+    """
+    get(scope)
+    rows = Counter.objects.filter(scope=scope, key__startswith=prefix).values_list("key", "value")
+    return {key[len(prefix):]: value for key, value in rows if value}
+
+
+async def aget(scope, key=TOTAL):
+    """
+    get() for async views.
+    """
+    value = await Counter.objects.filter(scope=scope, key=key).values_list("value", flat=True).afirst()
+    if value is None:
+        if await Counter.objects.filter(scope=scope, key=TOTAL).aexists():
+            return 0
+        await sync_to_async(rebuild)(scope)
+        value = await Counter.objects.filter(scope=scope, key=key).values_list("value", flat=True).afirst()
+    return value or 0
+
+
+async def abreakdown(scope, prefix):
+    """
+    breakdown() for async views.
+    """
+    await aget(scope)
+    rows = Counter.objects.filter(scope=scope, key__startswith=prefix).values_list("key", "value")
+    return {key[len(prefix):]: value async for key, value in rows if value}
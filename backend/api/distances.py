@@ -0,0 +1,249 @@
+"""
+Distance matrices and nearest-warehouse assignments for batches of points,
+for the warehouses/distances/ and warehouses/assign/ endpoints.
+
+The coordinates of every warehouse are loaded once per warehouses data
+version (see api.cache) and kept by the process as unit vectors, so a request
+runs no query beyond reading the version. Distances are haversine
+great-circle distances, with the haversine of the central angle θ between
+unit vectors a and b taken as sin²(θ/2) = |a - b|² / 4: a few array
+operations per block of points instead of a Python call per pair. The
+squared differences keep their precision down to centimetres, where
+1 - a·b would cancel out. Blocks hold at most CHUNK_CELLS distances, so
+memory stays bounded however many points and warehouses a request has.
+"""
+import threading
+import zipfile
+from typing import NamedTuple
+
+import numpy as np
+
+from . import geo
+from .cache import WAREHOUSES, version
+from .models import Warehouse
+
+# Points per request
+MAX_POINTS = 10_000
+# Distances per matrix request: 10,000 points by 10,000 warehouses
+MAX_MATRIX_CELLS = 100_000_000
+# Distances computed at once; a block and its scratch array take 16 MB of
+# float64 each
+CHUNK_CELLS = 2_000_000
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    # distances_km.npy (float32, one row per point), warehouse_ids.npy and
+    # points.npy, for numpy.load(); CSV text takes 40 times longer to write
+    "npz": "application/zip",
+}
+
+
+class Warehouses(NamedTuple):
+    version: int
+    # Ascending
+    ids: np.ndarray
+    # (len(ids), 3) unit vectors of their coordinates
+    vectors: np.ndarray
+
+
+_warehouses = None
+_lock = threading.Lock()
+
+
+def warehouses():
+    """
+    Return the Warehouses of the current warehouses data version, loading
+    them when a write has bumped the version since the last call.
+    """
+    global _warehouses
+    current = version(WAREHOUSES)
+    loaded = _warehouses
+    if loaded is None or loaded.version != current:
+        with _lock:
+            loaded = _warehouses
+            if loaded is None or loaded.version != current:
+                rows = Warehouse.objects.order_by("id").values_list("id", "latitude", "longitude")
+                data = np.array(list(rows), dtype=float).reshape(-1, 3)
+                loaded = _warehouses = Warehouses(
+                    current, data[:, 0].astype(np.int64), unit_vectors(data[:, 1:]),
+                )
+    return loaded
+
+
+def unit_vectors(points):
+    """
+    Return the unit vectors of an (n, 2) array of (latitude, longitude).
+    """
+    latitudes, longitudes = np.radians(points).T
+    cos_lat = np.cos(latitudes)
+    return np.stack([cos_lat * np.cos(longitudes), cos_lat * np.sin(longitudes), np.sin(latitudes)], axis=1)
+
+
+def to_km(haversines):
+    """
+    Turn haversines of central angles into great-circle distances in km,
+    in place.
+    """
+    np.sqrt(haversines, out=haversines)
+    np.minimum(haversines, 1.0, out=haversines)
+    np.arcsin(haversines, out=haversines)
+    haversines *= 2 * geo.EARTH_RADIUS_KM
+    return haversines
+
+
+def _blocks(points, vectors):
+    """
+    Yield (start, haversines): the haversines of the angles between
+    points[start:start + len(haversines)] and every warehouse vector,
+    CHUNK_CELLS at most at a time.
+    """
+    rows = max(1, CHUNK_CELLS // max(1, len(vectors)))
+    # One contiguous row per coordinate
+    columns = np.ascontiguousarray(vectors.T)
+    for start in range(0, len(points), rows):
+        block = unit_vectors(points[start:start + rows])
+        haversines = np.empty((len(block), len(vectors)))
+        squares = np.empty_like(haversines)
+        for axis in range(3):
+            out = haversines if axis == 0 else squares
+            np.subtract.outer(block[:, axis], columns[axis], out=out)
+            out *= out
+            if axis:
+                haversines += squares
+        haversines *= 0.25
+        yield start, haversines
+
+
+def parse_points(value):
+    """
+    Return request points, [latitude, longitude] pairs or {"latitude",
+    "longitude"} objects, as an (n, 2) array. Raises ValueError when they are
+    malformed, out of range or more than MAX_POINTS.
+    """
+    message = 'Expected a list of [latitude, longitude] pairs or {"latitude", "longitude"} objects.'
+    if not isinstance(value, list) or not value:
+        raise ValueError(message)
+    if len(value) > MAX_POINTS:
+        raise ValueError(f"At most {MAX_POINTS} points are accepted per request.")
+    try:
+        points = np.array(
+            [(point["latitude"], point["longitude"]) if isinstance(point, dict) else point for point in value],
+            dtype=float,
+        )
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(message) from None
+    if points.shape != (len(value), 2):
+        raise ValueError(message)
+    # Comparisons with NaN are false, so NaN is rejected too
+    if not ((np.abs(points[:, 0]) <= 90).all() and (np.abs(points[:, 1]) <= 180).all()):
+        raise ValueError("Coordinates are out of range.")
+    return points
+
+
+def nearest(points, k):
+    """
+    Return (ids, distances) of the k nearest warehouses to each of the
+    points, nearest first: arrays of shape (len(points), min(k, warehouses)),
+    distances in km.
+    """
+    loaded = warehouses()
+    k = min(k, len(loaded.ids))
+    ids = np.empty((len(points), k), dtype=np.int64)
+    distances = np.empty((len(points), k))
+    if not k:
+        return ids, distances
+    for start, haversines in _blocks(points, loaded.vectors):
+        # Only the k nearest are sorted
+        if k < haversines.shape[1]:
+            top = np.argpartition(haversines, k - 1, axis=1)[:, :k]
+            haversines = np.take_along_axis(haversines, top, axis=1)
+        else:
+            top = np.broadcast_to(np.arange(k), haversines.shape)
+        order = np.argsort(haversines, axis=1, kind="stable")
+        stop = start + len(haversines)
+        ids[start:stop] = loaded.ids[np.take_along_axis(top, order, axis=1)]
+        distances[start:stop] = to_km(np.take_along_axis(haversines, order, axis=1))
+    return ids, distances
+
+
+def assignments(points, k):
+    """
+    Return nearest() as a list per point of {"id", "distance_km"}, with
+    distances rounded to the metre.
+    """
+    ids, distances = nearest(points, k)
+    return [
+        [{"id": pk, "distance_km": distance} for pk, distance in zip(row_ids, row_distances)]
+        for row_ids, row_distances in zip(ids.tolist(), np.round(distances, 3).tolist())
+    ]
+
+
+def columns(warehouse_ids=None):
+    """
+    Return (ids, vectors) of the matrix columns: the given warehouse ids, in
+    order, or every warehouse by ascending id. Raises ValueError naming
+    unknown ids.
+    """
+    loaded = warehouses()
+    if warehouse_ids is None:
+        return loaded.ids, loaded.vectors
+    wanted = np.array(warehouse_ids, dtype=np.int64)
+    positions = np.searchsorted(loaded.ids, wanted)
+    found = positions < len(loaded.ids)
+    found[found] = loaded.ids[positions[found]] == wanted[found]
+    if not found.all():
+        unknown = wanted[~found][:10].tolist()
+        raise ValueError(f"Unknown warehouse ids: {', '.join(map(str, unknown))}.")
+    return wanted, loaded.vectors[positions]
+
+
+def stream_matrix(points, ids, vectors, matrix_format):
+    """
+    Yield the distance matrix from the points (rows) to the warehouses
+    (columns) as CSV or .npz, one block of rows at a time.
+    """
+    if matrix_format == "csv":
+        yield ",".join(["latitude", "longitude", *map(str, ids.tolist())]) + "\n"
+        row_format = "%.6f,%.6f" + ",%.3f" * len(ids) + "\n"
+        for start, haversines in _blocks(points, vectors):
+            rows = np.hstack([points[start:start + len(haversines)], to_km(haversines)])
+            yield "".join(row_format % tuple(row) for row in rows.tolist())
+    else:
+        yield from _stream_npz(points, ids, vectors)
+
+
+class _Pipe:
+    """
+    Write-only file for zipfile that hands back what was written.
+    """
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _stream_npz(points, ids, vectors):
+    pipe = _Pipe()
+    # Stored, not deflated: distances barely compress
+    with zipfile.ZipFile(pipe, "w", zipfile.ZIP_STORED) as archive:
+        for name, array in (("warehouse_ids", ids), ("points", points)):
+            with archive.open(f"{name}.npy", "w") as member:
+                np.lib.format.write_array(member, np.ascontiguousarray(array))
+        with archive.open("distances_km.npy", "w", force_zip64=True) as member:
+            np.lib.format.write_array_header_1_0(member, {
+                "descr": np.dtype(np.float32).str, "fortran_order": False, "shape": (len(points), len(ids)),
+            })
+            for _, haversines in _blocks(points, vectors):
+                member.write(to_km(haversines).astype(np.float32).tobytes())
+                yield pipe.drain()
+    yield pipe.drain()
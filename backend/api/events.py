@@ -0,0 +1,293 @@
+"""
+Server-Sent Events for announcement changes.
+
+Writes to announcements publish an event once their transaction commits
+(see api.signals) to the in-process Broker, which fans it out to every open
+stream. Each stream reads from its own bounded queue: a client that falls
+EVENTS_QUEUE_SIZE events behind is disconnected instead of being buffered
+without limit, and its EventSource reconnects where it left off.
+
+The broker keeps the last EVENTS_HISTORY events, so a reconnecting client's
+Last-Event-ID is resumed from memory. When the id is older than that, or was
+issued by another process (every process numbers its events under its own
+epoch), the client is sent a "reset" event and should reload with
+/announcements/recent/ instead.
+
+An open stream costs no queries and, under ASGI with EventStreamASGIHandler,
+no thread: it waits on the event loop until the broker wakes it or
+EVENTS_HEARTBEAT seconds pass, when a comment line is sent to keep proxies
+from timing the connection out. Under WSGI every open stream holds a server
+thread.
+
+Each process has its own broker, so with several worker processes a client
+only hears about the writes handled by the process it is connected to.
+"""
+import asyncio
+import collections
+import json
+import secrets
+import threading
+import time
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler, ASGIRequest
+from django.db import connections, transaction
+from django.http import StreamingHttpResponse
+from django.urls import Resolver404, resolve
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.utils.encoders import JSONEncoder
+
+HEARTBEAT = b": keep-alive\n\n"
+
+# A save of only these fields is published as a status toggle
+STATUS_FIELDS = frozenset({"is_active", "updated_at"})
+
+Event = collections.namedtuple("Event", "sequence payload")
+
+
+def encode_event(event_id, name, data):
+    # JSON escapes newlines, so the payload always fits on one data: line
+    data = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+    return f"id: {event_id}\nevent: {name}\ndata: {data}\n\n".encode()
+
+
+class Subscription:
+    """
+    One client's queue of encoded events. Async streams are woken through
+    their event loop, sync streams through a threading.Event.
+    """
+    def __init__(self, maxsize, loop=None):
+        self.maxsize = maxsize
+        self.loop = loop
+        self.payloads = collections.deque()
+        self.overflowed = False
+        self.ready = threading.Event() if loop is None else asyncio.Event()
+
+    def push(self, payload):
+        """
+        Queue a payload. Called on the subscription's own loop for async
+        streams and from any thread for sync ones.
+        """
+        # Once a payload has been dropped nothing more is queued, so the
+        # client never sees a gap, only an early end
+        if self.overflowed or len(self.payloads) >= self.maxsize:
+            self.overflowed = True
+        else:
+            self.payloads.append(payload)
+        self.ready.set()
+
+    def finished(self):
+        """
+        Whether the stream should end: it overflowed and what was queued
+        before that has been sent. The client resumes after it on reconnect.
+        """
+        return self.overflowed and not self.payloads
+
+    def drain(self):
+        self.ready.clear()
+        payloads = []
+        while self.payloads:
+            payloads.append(self.payloads.popleft())
+        return b"".join(payloads)
+
+
+class Broker:
+    """
+    Thread-safe fan-out of events to subscriptions, with a ring buffer of
+    recent events for resuming streams.
+    """
+    def __init__(self, history, queue_size):
+        self.lock = threading.Lock()
+        self.epoch = secrets.token_hex(4)
+        self.sequence = 0
+        self.history = collections.deque(maxlen=history)
+        self.queue_size = queue_size
+        # Subscriptions by event loop, None for sync streams
+        self.subscriptions = {}
+
+    def event_id(self, sequence):
+        return f"{self.epoch}-{sequence}"
+
+    def publish(self, name, data):
+        with self.lock:
+            self.sequence += 1
+            event = Event(self.sequence, encode_event(self.event_id(self.sequence), name, data))
+            self.history.append(event)
+            # Under the lock, so every subscription sees events in order
+            for loop, subscriptions in list(self.subscriptions.items()):
+                if loop is None:
+                    for subscription in subscriptions:
+                        subscription.push(event.payload)
+                    continue
+                # One wake-up per loop, however many streams it serves
+                try:
+                    loop.call_soon_threadsafe(deliver, tuple(subscriptions), event.payload)
+                except RuntimeError:
+                    # The loop was closed under its streams
+                    del self.subscriptions[loop]
+
+    def subscribe(self, last_event_id=None, loop=None):
+        """
+        Register a subscription and queue what the client needs first: a
+        "ready" event carrying the current event id, then either the events
+        it missed since last_event_id or a reset event when those are gone.
+        """
+        subscription = Subscription(self.queue_size, loop)
+        with self.lock:
+            current = self.event_id(self.sequence)
+            subscription.payloads.append(f"retry: {settings.EVENTS_RETRY_MS}\n".encode() + encode_event(current, "ready", {}))
+            if last_event_id:
+                missed = self.since(last_event_id)
+                if missed is None:
+                    subscription.payloads.append(encode_event(current, "reset", {}))
+                else:
+                    subscription.payloads.extend(event.payload for event in missed)
+            subscription.ready.set()
+            self.subscriptions.setdefault(loop, set()).add(subscription)
+        return subscription
+
+    def since(self, last_event_id):
+        """
+        Return the buffered events after last_event_id, or None when the id
+        is not one of this process's or the events are no longer buffered.
+        """
+        epoch, _, sequence = last_event_id.partition("-")
+        try:
+            sequence = int(sequence)
+        except ValueError:
+            return None
+        missed = self.sequence - sequence
+        if epoch != self.epoch or missed < 0 or missed > len(self.history):
+            return None
+        return list(self.history)[len(self.history) - missed:]
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.loop)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.loop]
+
+    def count(self):
+        with self.lock:
+            return sum(len(subscriptions) for subscriptions in self.subscriptions.values())
+
+    def stream(self, last_event_id=None, until=None):
+        """
+        Yield the client's events, blocking the calling thread between them,
+        until the Unix time until (for example when its credentials expire).
+        """
+        subscription = self.subscribe(last_event_id)
+        try:
+            while until is None or time.time() < until:
+                if not subscription.ready.wait(settings.EVENTS_HEARTBEAT):
+                    yield HEARTBEAT
+                    continue
+                yield subscription.drain()
+                if subscription.finished():
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+    async def astream(self, last_event_id=None, until=None):
+        """
+        stream() for ASGI: waits on the event loop, and ends when Django
+        cancels it on client disconnect.
+        """
+        subscription = self.subscribe(last_event_id, asyncio.get_running_loop())
+        try:
+            while until is None or time.time() < until:
+                try:
+                    await asyncio.wait_for(subscription.ready.wait(), settings.EVENTS_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+                    continue
+                yield subscription.drain()
+                if subscription.finished():
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+
+def deliver(subscriptions, payload):
+    for subscription in subscriptions:
+        subscription.push(payload)
+
+
+broker = Broker(settings.EVENTS_HISTORY, settings.EVENTS_QUEUE_SIZE)
+
+
+def publish_on_commit(name, build_data):
+    """
+    Publish an event built by build_data() once the current transaction
+    commits, so streams never announce a write that is rolled back.
+    """
+    transaction.on_commit(lambda: broker.publish(name, build_data()))
+
+
+def stream_response(request, until=None):
+    """
+    Return the text/event-stream response for a Django request, resuming
+    from its Last-Event-ID header or ?last_event_id= (for clients reopening
+    a stream themselves, since EventSource only sends the header on its own
+    reconnects). The stream is closed at the Unix time until.
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    # Authentication is the only database work; don't hold its connection
+    # for as long as the client stays connected
+    connections.close_all()
+    if isinstance(request, ASGIRequest):
+        content = broker.astream(last_event_id, until)
+    else:
+        content = broker.stream(last_event_id, until)
+    response = StreamingHttpResponse(content, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Tell nginx not to buffer the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+class FirstRendererNegotiation(BaseContentNegotiation):
+    """
+    Answer with the view's first renderer whatever the client accepts.
+    EventSource asks for text/event-stream, which no renderer produces: the
+    stream bypasses rendering, and errors before it starts are sent as JSON.
+    """
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class EventStreamASGIHandler(ASGIHandler):
+    """
+    ASGIHandler that serves event streams outside a ThreadSensitiveContext.
+
+    Django gives every request a context with a thread of its own for sync
+    code, which lives until the response has been sent: for a stream, as
+    long as the client stays connected. Without the context, a stream's sync
+    work (middleware, authentication) runs on asgiref's shared sync thread,
+    and an open stream holds no thread at all.
+    """
+    stream_url_names = frozenset({"announcement-stream"})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.is_event_stream(scope):
+            await self.handle(scope, receive, send)
+        else:
+            await super().__call__(scope, receive, send)
+
+    def is_event_stream(self, scope):
+        path = scope["path"]
+        # Cheap check first; only possible streams are resolved
+        if not path.endswith("/stream/"):
+            return False
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path):
+            path = path.removeprefix(root_path)
+        try:
+            return resolve(path).url_name in self.stream_url_names
+        except Resolver404:
+            return False
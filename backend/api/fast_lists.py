@@ -0,0 +1,254 @@
+"""
+Serializer-free list pages.
+
+ValuesSerializer turns a ModelSerializer into one values_list() query and a
+row builder. A page is fetched as tuples, joined columns such as
+created_by_username included, and turned into the dicts the serializer
+would have returned, without instantiating models or running the fields
+one by one. Only fields whose output depends on nothing but a column value
+are supported. Views opt in with api.views.FastListMixin, which uses it
+while FAST_LIST_RESPONSES is on.
+
+FastJSONRenderer renders those pages with orjson when it is installed, to
+the same bytes as JSONRenderer: orjson escapes strings like json does
+without ensure_ascii and writes floats the same way from 1e-4 up to 1e16.
+Pages with any float outside that range, NaN or infinity are rendered by
+json as before. api.tests.test_fast_lists checks both paths byte for byte
+and the bench_serializers command times them.
+"""
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import empty
+from rest_framework.settings import api_settings
+
+from .metrics import TimedJSONRenderer, stage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Fields whose output is the column value itself when the model field
+# already holds that type
+PASSTHROUGH_FIELDS = (
+    (serializers.BooleanField, models.BooleanField),
+    (serializers.CharField, (models.CharField, models.TextField)),
+    (serializers.FloatField, models.FloatField),
+    (serializers.IntegerField, models.IntegerField),
+)
+
+# Fields whose to_representation() takes the column value
+VALUE_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField,
+    serializers.DateField, serializers.DateTimeField, serializers.DecimalField,
+    serializers.DurationField, serializers.FloatField, serializers.IntegerField,
+    serializers.TimeField, serializers.UUIDField,
+)
+
+# Where json and orjson write floats identically (besides zero)
+ORJSON_FLOAT_RANGE = (1e-4, 1e16)
+
+
+class Rows(list):
+    """
+    A list of serialized rows, and whether orjson renders it to the same
+    bytes as json.
+    """
+    orjson_safe = False
+
+
+class ValuesSerializer:
+    """
+    The values_list() query and row builder standing in for a ModelSerializer
+    in list responses, for all of its fields or the named ones (see
+    api.sparse). Raises ImproperlyConfigured for serializers with fields it
+    cannot reproduce.
+    """
+    def __init__(self, serializer_class, fields=None):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.names = []
+        self.lookups = []
+        # (name, field) for fields whose to_representation() is needed
+        self.converters = []
+        # (name, lookup of a nullable relation on the way, output None
+        # instead of omitting the field when the relation is empty)
+        self.guards = []
+        self.float_names = []
+        for name, field in serializer.fields.items():
+            if not field.write_only and (fields is None or name in fields):
+                self.add_field(name, field)
+
+    def add_field(self, name, field):
+        if field.source == "*" or isinstance(field, serializers.BaseSerializer):
+            self.unsupported(name, field)
+        model_field, relations = self.resolve(name, field)
+        lookup = "__".join(field.source_attrs)
+        if lookup in self.lookups:
+            # Named rows have one column per lookup
+            self.unsupported(name, field)
+        self.names.append(name)
+        self.lookups.append(lookup)
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # values_list() returns the key itself for a relation
+            if not model_field.is_relation or field.pk_field is not None:
+                self.unsupported(name, field)
+        elif isinstance(field, VALUE_FIELDS):
+            if not any(isinstance(field, serializer_type) and isinstance(model_field, model_type)
+                       for serializer_type, model_type in PASSTHROUGH_FIELDS):
+                self.converters.append((name, field))
+            elif isinstance(field, serializers.FloatField):
+                self.float_names.append(name)
+        elif not isinstance(field, serializers.ReadOnlyField):
+            self.unsupported(name, field)
+
+        for relation in relations:
+            if field.default is not empty:
+                self.unsupported(name, field)
+            self.guards.append((name, relation, field.allow_null))
+
+    def resolve(self, name, field):
+        """
+        Return the model field behind field.source and the lookups of the
+        nullable relations followed to reach it. Through an empty one the
+        serializer omits the field (or outputs None if it allows null).
+        """
+        model = self.model
+        relations = []
+        for index, attr in enumerate(field.source_attrs):
+            try:
+                model_field = model._meta.get_field(attr)
+            except FieldDoesNotExist:
+                self.unsupported(name, field)
+            if index < len(field.source_attrs) - 1:
+                # Only forward relations: reverse ones would repeat rows
+                if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+                    self.unsupported(name, field)
+                if model_field.null:
+                    relations.append("__".join(field.source_attrs[:index + 1]))
+                model = model_field.related_model
+        return model_field, relations
+
+    def unsupported(self, name, field):
+        raise ImproperlyConfigured(
+            f"{type(field).__name__} {name!r} (source {field.source!r}) cannot be built from values_list() rows."
+        )
+
+    def queryset(self, queryset):
+        """
+        Turn a list queryset into its values_list() query. Rows are named
+        tuples, and the ordering columns are included so that they work as
+        keyset pagination cursors just like model instances.
+        """
+        lookups = list(self.lookups)
+        lookups += [relation for _, relation, _ in self.guards]
+        opts = self.model._meta
+        for name in ["pk", *(str(field).lstrip("-") for field in queryset.query.order_by)]:
+            try:
+                lookups.append(opts.pk.attname if name == "pk" else opts.get_field(name).attname)
+            except FieldDoesNotExist:
+                pass
+        return queryset.values_list(*dict.fromkeys(lookups), named=True)
+
+    def to_representation(self, rows):
+        """
+        Return the serializer's output for a list of values_list() rows.
+        """
+        names = self.names
+        positions = {lookup: index for index, lookup in enumerate(rows[0]._fields)} if rows else {}
+        data = Rows([dict(zip(names, row)) for row in rows])
+        if self.guards:
+            guards = [(name, positions[relation], allow_null) for name, relation, allow_null in self.guards]
+            for item, row in zip(data, rows):
+                for name, position, allow_null in guards:
+                    if row[position] is None and name in item:
+                        if allow_null:
+                            item[name] = None
+                        else:
+                            del item[name]
+        for name, field in self.converters:
+            convert = converter(field)
+            for item in data:
+                value = item.get(name)
+                if value is not None:
+                    item[name] = convert(value)
+        if orjson is not None:
+            data.orjson_safe = self.floats_in_range(data)
+        return data
+
+    def floats_in_range(self, data):
+        low, high = ORJSON_FLOAT_RANGE
+        for name in self.float_names:
+            for item in data:
+                value = item.get(name)
+                # NaN fails every comparison, infinity the upper bound
+                if value is not None and value != 0 and not low <= abs(value) < high:
+                    return False
+        return True
+
+
+def converter(field):
+    """
+    Return the function representing field's values for one page. For
+    DateTimeFields that is to_representation() with the time zone looked
+    up once instead of for every value.
+    """
+    if type(field) is not serializers.DateTimeField:
+        return field.to_representation
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or value.utcoffset() is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+_values_serializers = {}
+
+
+def values_serializer(serializer_class, fields=None):
+    """
+    Return the (cached) ValuesSerializer for serializer_class, or for the
+    named fields of it.
+    """
+    key = (serializer_class, fields)
+    values = _values_serializers.get(key)
+    if values is None:
+        values = _values_serializers[key] = ValuesSerializer(serializer_class, fields)
+    return values
+
+
+def orjson_renderable(data):
+    if isinstance(data, dict):
+        # A paginated page: count, links and the results
+        data = data.get("results")
+    return isinstance(data, Rows) and data.orjson_safe
+
+
+class FastJSONRenderer(TimedJSONRenderer):
+    """
+    TimedJSONRenderer that renders ValuesSerializer pages with orjson, to
+    the same bytes. Everything else goes through json as before.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or self.ensure_ascii or not self.compact or not orjson_renderable(data)
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        with stage("render"):
+            try:
+                content = orjson.dumps(data)
+            except TypeError:
+                # A value orjson has no encoding for, in the page envelope
+                return super().render(data, accepted_media_type, renderer_context)
+        # JSONRenderer escapes these two so the output is valid JavaScript
+        return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
@@ -0,0 +1,153 @@
+import math
+
+# Geohash base32 alphabet (no a, i, l, o)
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 12
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Upper bound on the number of geohash cells used to cover a bounding box.
+# More cells means a tighter cover but more index range lookups per query.
+MAX_COVER_CELLS = 16
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """
+    Encode a coordinate as a geohash string of the given precision.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                bits = (bits << 1) | 1
+                lon_range[0] = mid
+            else:
+                bits <<= 1
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                bits = (bits << 1) | 1
+                lat_range[0] = mid
+            else:
+                bits <<= 1
+                lat_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """
+    Return the (height, width) in degrees of a geohash cell at the given precision.
+    """
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = math.floor(precision * 5 / 2)
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """
+    Great-circle distance between two coordinates in kilometres.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def normalize_bbox(min_lon, min_lat, max_lon, max_lat):
+    """
+    Split a bounding box into boxes that do not cross the antimeridian.
+    A box with min_lon > max_lon is treated as wrapping around 180 degrees.
+    """
+    min_lat = max(-90.0, min_lat)
+    max_lat = min(90.0, max_lat)
+    if min_lon > max_lon:
+        return [(min_lon, min_lat, 180.0, max_lat), (-180.0, min_lat, max_lon, max_lat)]
+    return [(max(-180.0, min_lon), min_lat, min(180.0, max_lon), max_lat)]
+
+
+def bbox_around(latitude, longitude, radius_km):
+    """
+    Return the bounding boxes (min_lon, min_lat, max_lon, max_lat) that
+    contain every point within radius_km of the given coordinate.
+    """
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = latitude - dlat
+    max_lat = latitude + dlat
+    if min_lat <= -90.0 or max_lat >= 90.0:
+        # The circle covers a pole, so every longitude is in range
+        return normalize_bbox(-180.0, min_lat, 180.0, max_lat)
+    dlon = math.degrees(radius_km / (EARTH_RADIUS_KM * math.cos(math.radians(latitude))))
+    if dlon >= 180.0:
+        return normalize_bbox(-180.0, min_lat, 180.0, max_lat)
+    min_lon = longitude - dlon
+    max_lon = longitude + dlon
+    if min_lon < -180.0:
+        min_lon += 360.0
+    if max_lon > 180.0:
+        max_lon -= 360.0
+    return normalize_bbox(min_lon, min_lat, max_lon, max_lat)
+
+
+def _cells_for_bbox(bbox, precision):
+    min_lon, min_lat, max_lon, max_lat = bbox
+    height, width = cell_size(precision)
+    lat_start = math.floor((min_lat + 90.0) / height)
+    lat_stop = math.floor((min(max_lat, 90.0 - 1e-9) + 90.0) / height)
+    lon_start = math.floor((min_lon + 180.0) / width)
+    lon_stop = math.floor((min(max_lon, 180.0 - 1e-9) + 180.0) / width)
+    return lat_start, lat_stop, lon_start, lon_stop
+
+
+def cover_bbox(min_lon, min_lat, max_lon, max_lat, max_cells=MAX_COVER_CELLS):
+    """
+    Return a sorted list of geohash prefixes whose cells together cover the
+    bounding box, using the finest precision that needs at most max_cells cells.
+    """
+    boxes = normalize_bbox(min_lon, min_lat, max_lon, max_lat)
+    best = None
+    for precision in range(1, GEOHASH_PRECISION + 1):
+        spans = [_cells_for_bbox(box, precision) for box in boxes]
+        total = sum((s[1] - s[0] + 1) * (s[3] - s[2] + 1) for s in spans)
+        if total > max_cells:
+            break
+        best = (precision, spans)
+    if best is None:
+        # Even single-character cells exceed the budget; fall back to precision 1
+        best = (1, [_cells_for_bbox(box, 1) for box in boxes])
+
+    precision, spans = best
+    height, width = cell_size(precision)
+    prefixes = set()
+    for lat_start, lat_stop, lon_start, lon_stop in spans:
+        for lat_index in range(lat_start, lat_stop + 1):
+            for lon_index in range(lon_start, lon_stop + 1):
+                prefixes.add(encode_geohash(
+                    -90.0 + (lat_index + 0.5) * height,
+                    -180.0 + (lon_index + 0.5) * width,
+                    precision,
+                ))
+    return sorted(prefixes)
+
+
+def prefix_range(prefix):
+    """
+    Return the half-open [start, stop) string range matching every geohash
+    with the given prefix. Range lookups use the column index on every backend,
+    unlike LIKE 'prefix%' which SQLite cannot serve from an index by default.
+    """
+    return prefix, prefix + "~"
@@ -0,0 +1,187 @@
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+
+from api.benchmarks import summarize, time_concurrently
+
+from .benchmark import PooledWSGIServer
+
+BENCH_USERNAME = "bench-asgi"
+DEFAULT_PATHS = "/api/warehouses/,/api/warehouses/count/,/api/current-user/"
+
+CREATE_TOKEN = """
+from rest_framework_simplejwt.tokens import AccessToken
+from api.models import User
+user = User.objects.filter(username={username!r}).first() or User.objects.create_user(
+    {username!r}, password=None, role=User.Role.PLATFORM_ADMIN
+)
+print(AccessToken.for_user(user))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare read throughput of the WSGI stack (sync views on a fixed thread "
+        "pool) with the ASGI stack (async views under uvicorn) at increasing client "
+        "concurrency, against a throwaway SQLite database with added per-query "
+        "latency standing in for a remote database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", default="8,32,64,128", help="Comma-separated client concurrency levels.")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per path and concurrency level.")
+        parser.add_argument("--latency-ms", type=float, default=50.0, help="Delay added to every SQL query.")
+        parser.add_argument("--threads", type=int, default=8, help="WSGI server threads.")
+        parser.add_argument("--rows", type=int, default=2000, help="Warehouses to seed, with a tenth as many announcements.")
+        parser.add_argument("--paths", default=DEFAULT_PATHS, help="Comma-separated GET paths to measure.")
+        parser.add_argument("--serve", choices=["wsgi", "asgi"], help="Internal: run one server.")
+        parser.add_argument("--port", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if options["serve"]:
+            self.serve(options["serve"], options["port"], options["latency_ms"], options["threads"])
+            return
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise CommandError("bench_asgi needs uvicorn (pip install uvicorn).")
+
+        levels = [int(level) for level in options["concurrency"].split(",")]
+        paths = options["paths"].split(",")
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, "SQLITE_PATH": os.path.join(directory, "bench.sqlite3"), "METRICS_ENABLED": "0"}
+            self.manage(env, "migrate", "-v0")
+            rows = options["rows"]
+            self.manage(
+                env, "seed_data", "--users", str(max(rows // 100, 1)), "--warehouses", str(rows),
+                "--announcements", str(rows // 10), "--seed", "1",
+            )
+            self.stdout.write(
+                f"{options['latency_ms']:g}ms per query, {options['requests']} requests per level, "
+                f"WSGI with {options['threads']} threads"
+            )
+            results = {
+                stack: self.run_stack(stack, env, options, paths, levels)
+                for stack in ("wsgi", "asgi")
+            }
+
+        for path in paths:
+            self.stdout.write(f"\n{path}")
+            for level in levels:
+                wsgi, asgi = results["wsgi"][path, level], results["asgi"][path, level]
+                line = (
+                    f"  c={level:<4} wsgi {wsgi['rps']:8.1f} req/s p95={wsgi['p95_ms']:8.2f}ms   "
+                    f"asgi {asgi['rps']:8.1f} req/s p95={asgi['p95_ms']:8.2f}ms   "
+                    f"x{asgi['rps'] / wsgi['rps']:.2f}"
+                )
+                if wsgi["errors"] or asgi["errors"]:
+                    line += self.style.ERROR(f"  errors={wsgi['errors']}/{asgi['errors']}")
+                self.stdout.write(line)
+
+    def manage(self, env, *args):
+        result = subprocess.run(
+            [sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), *args],
+            env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"manage.py {' '.join(args)} failed:\n{result.stderr}")
+        return result.stdout
+
+    def run_stack(self, stack, env, options, paths, levels):
+        env = dict(env)
+        if stack == "asgi":
+            # What warehouse_admin.asgi sets, which the server process has
+            # already read its settings without
+            env.update(ASYNC_READ_VIEWS="1", DATABASE_CONN_MAX_AGE="0")
+        else:
+            env["ASYNC_READ_VIEWS"] = "0"
+        token = self.manage(env, "shell", "-c", CREATE_TOKEN.format(username=BENCH_USERNAME)).strip().splitlines()[-1]
+        port = free_port()
+        log = tempfile.TemporaryFile("w+")
+        server = subprocess.Popen(
+            [
+                sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "bench_asgi",
+                "--serve", stack, "--port", str(port),
+                "--latency-ms", str(options["latency_ms"]), "--threads", str(options["threads"]),
+            ],
+            env=env, stdout=subprocess.DEVNULL, stderr=log,
+        )
+        try:
+            self.wait_for(server, port, log)
+            results = {}
+            for path in paths:
+                for level in levels:
+                    samples, statuses, elapsed = time_concurrently(
+                        self.request, [(port, path, token)] * options["requests"], level
+                    )
+                    summary = summarize(samples)
+                    results[path, level] = {
+                        "rps": len(samples) / elapsed,
+                        "p95_ms": summary["p95_ms"],
+                        "errors": sum(1 for status in statuses if status != 200),
+                    }
+            return results
+        finally:
+            server.terminate()
+            server.wait()
+            log.close()
+
+    def wait_for(self, server, port, log, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                log.seek(0)
+                raise CommandError(f"Server exited:\n{log.read()}")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError(f"Server did not start on port {port}")
+
+    def request(self, port, path, token):
+        client = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        try:
+            client.request("GET", path, headers={"Authorization": f"Bearer {token}"})
+            response = client.getresponse()
+            response.read()
+            return response.status
+        finally:
+            client.close()
+
+    def serve(self, stack, port, latency_ms, threads):
+        delay = latency_ms / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            connection.execute_wrappers.append(slow_query)
+
+        connection_created.connect(add_latency, weak=False)
+        if stack == "wsgi":
+            from django.core.wsgi import get_wsgi_application
+
+            server = PooledWSGIServer(("127.0.0.1", port), threads)
+            server.set_app(get_wsgi_application())
+            server.serve_forever()
+        else:
+            import uvicorn
+            from django.core.asgi import get_asgi_application
+
+            uvicorn.run(get_asgi_application(), host="127.0.0.1", port=port, log_level="warning", lifespan="off")
+
+
+def free_port():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import CachedJWTAuthentication
+from api.benchmarks import create_warehouses, rolled_back
+from api.models import User
+from api.views import AnnouncementViewSet, WarehouseViewSet
+
+
+class Command(BaseCommand):
+    help = "Compare request throughput with simplejwt's JWTAuthentication and the cached variant."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        total = options["requests"]
+        with rolled_back():
+            create_warehouses(100)
+            user = User.objects.create(username="bench-auth", role=User.Role.PLATFORM_ADMIN)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+            etag = client.get("/api/warehouses/")["ETag"]
+
+            scenarios = [
+                ("warehouses list", "/api/warehouses/", {}),
+                ("warehouses list (304)", "/api/warehouses/", {"HTTP_IF_NONE_MATCH": etag}),
+                ("announcements recent", "/api/announcements/recent/", {}),
+            ]
+            viewsets = (WarehouseViewSet, AnnouncementViewSet)
+            original = [viewset.authentication_classes for viewset in viewsets]
+            try:
+                for label, path, headers in scenarios:
+                    for authentication in (JWTAuthentication, CachedJWTAuthentication):
+                        for viewset in viewsets:
+                            viewset.authentication_classes = [authentication]
+                        client.get(path, **headers)
+                        start = time.perf_counter()
+                        for _ in range(total):
+                            client.get(path, **headers)
+                        elapsed = time.perf_counter() - start
+                        self.stdout.write(f"{label:<24} {authentication.__name__:<26} {total / elapsed:8.0f} req/s")
+            finally:
+                for viewset, classes in zip(viewsets, original):
+                    viewset.authentication_classes = classes
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.benchmarks import format_summary, rolled_back, time_calls
+from api.models import User
+from api.seeding import Seeder
+
+# What the dashboard and list screens load when they open
+SCREEN = (
+    "/api/current-user/",
+    "/api/dashboard/",
+    "/api/warehouses/count/",
+    "/api/users/count/",
+    "/api/warehouses/?page_size=20",
+    "/api/announcements/recent/",
+    "/api/announcements/?page_size=20&omit=content",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare loading a screen's API calls one request at a time with one "
+        "batch/ request, both authenticated with a JWT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000, help="Warehouses and announcements to seed.")
+        parser.add_argument("--screens", type=int, default=200, help="Screens loaded each way.")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.stdout.write(f"Seeding {options['rows']} warehouses and announcements (rolled back afterwards)...")
+            seeder = Seeder(seed=0)
+            seeder.users(100, "bench-batch", prefix="bench-batch-")
+            seeder.warehouses(options["rows"])
+            seeder.announcements(options["rows"])
+            user = User.objects.create(username="bench-batch", role=User.Role.PLATFORM_ADMIN)
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+
+            def separately():
+                for path in SCREEN:
+                    response = client.get(path)
+                    if response.status_code != 200:
+                        raise CommandError(f"{path} returned {response.status_code}")
+
+            def batched():
+                response = client.post("/api/batch/", {"requests": [{"path": path} for path in SCREEN]}, format="json")
+                statuses = [item["status"] for item in response.json()["responses"]]
+                if response.status_code != 200 or set(statuses) != {200}:
+                    raise CommandError(f"batch/ returned {response.status_code}: {statuses}")
+
+            separately()
+            batched()
+            screens = [()] * options["screens"]
+            self.stdout.write(f"{len(SCREEN)} calls per screen:")
+            self.stdout.write(format_summary("  one request per call", time_calls(separately, screens)))
+            self.stdout.write(format_summary("  one batch/ request", time_calls(batched, screens)))
+            # Everything runs in one transaction, so batches never use their thread pool here
+            self.stdout.write("  (in-process, without network round trips; concurrent batches are not timed)")
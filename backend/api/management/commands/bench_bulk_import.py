@@ -0,0 +1,44 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from api.benchmarks import rolled_back
+from api.models import User
+
+
+class Command(BaseCommand):
+    help = "Compare warehouse import rows/second: one POST per row vs the bulk endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000)
+        parser.add_argument("--single-rows", type=int, default=1000,
+                            help="Rows to import through the one-at-a-time path.")
+        parser.add_argument("--batch-size", type=int, nargs="+", default=[100, 1000, 5000])
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        rows = [
+            {"city": f"City {index}", "latitude": rng.uniform(-85, 85), "longitude": rng.uniform(-180, 180)}
+            for index in range(options["rows"])
+        ]
+        with rolled_back():
+            user = User.objects.create(username="bench-bulk", role=User.Role.PLATFORM_ADMIN)
+            client = APIClient()
+            client.force_authenticate(user)
+
+            single = rows[:options["single_rows"]]
+            start = time.perf_counter()
+            for row in single:
+                response = client.post("/api/warehouses/", row, format="json")
+                assert response.status_code == 201, response.content
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{'one POST per row':<28} rows={len(single):<7} {len(single) / elapsed:10.0f} rows/s")
+
+            for size in options["batch_size"]:
+                start = time.perf_counter()
+                response = client.post(f"/api/warehouses/bulk/?batch_size={size}", rows, format="json")
+                elapsed = time.perf_counter() - start
+                assert response.data["created"] == len(rows), response.data
+                self.stdout.write(f"{f'bulk (batch_size={size})':<28} rows={len(rows):<7} {len(rows) / elapsed:10.0f} rows/s")
@@ -0,0 +1,99 @@
+import json
+import math
+import random
+import statistics
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+from api import clusters
+from api.benchmarks import format_summary, rolled_back, time_calls
+from api.models import User, Warehouse
+from api.seeding import METROS, Seeder
+
+# Viewport in 256px tiles: a 1280x800 map
+VIEWPORT_TILES = (5, 3.125)
+
+
+def viewport(zoom, latitude, longitude):
+    """
+    Return the bbox of a VIEWPORT_TILES map centred on the coordinate.
+    """
+    n = 1 << zoom
+    lat = math.radians(max(-clusters.MAX_LATITUDE, min(clusters.MAX_LATITUDE, latitude)))
+    x = (longitude + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(lat)) / math.pi) / 2.0 * n
+    half_width, half_height = VIEWPORT_TILES[0] / 2, VIEWPORT_TILES[1] / 2
+
+    def to_lon(tile_x):
+        return max(-180.0, min(180.0, tile_x / n * 360.0 - 180.0))
+
+    def to_lat(tile_y):
+        tile_y = max(0.0, min(float(n), tile_y))
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * tile_y / n))))
+
+    return to_lon(x - half_width), to_lat(y + half_height), to_lon(x + half_width), to_lat(y - half_height)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time warehouses/clusters/ map views, with cold and warm tile caches, "
+        "and compare their size with downloading every warehouse in view."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--zooms", type=int, nargs="+", default=[2, 5, 8, 11])
+        parser.add_argument("--viewports", type=int, default=20, help="Map views per zoom level.")
+        parser.add_argument("--download-viewports", type=int, default=3,
+                            help="Map views per zoom level downloading every warehouse (slow when zoomed out).")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        with rolled_back():
+            user = User.objects.create(username="bench-clusters", role=User.Role.PLATFORM_ADMIN)
+            self.stdout.write(f"Seeding {options['rows']} warehouses around metro areas (rolled back afterwards)...")
+            Seeder(seed=options["seed"]).warehouses(options["rows"])
+            client = APIClient()
+            client.force_authenticate(user)
+            sizes = []
+
+            def map_view(zoom, bbox):
+                response = client.get("/api/warehouses/clusters/", {"zoom": zoom, "bbox": ",".join(map(str, bbox))})
+                if response.status_code != 200:
+                    raise CommandError(f"zoom={zoom} bbox={bbox} returned {response.status_code}: {response.content[:200]!r}")
+                sizes.append(len(response.content))
+
+            def cold_map_view(zoom, bbox):
+                clusters.invalidate_all()
+                map_view(zoom, bbox)
+
+            downloads = []
+
+            def download(zoom, bbox):
+                # The least a browser clustering on its own would need
+                rows = list(Warehouse.objects.within_bbox(*bbox).values_list("id", "latitude", "longitude"))
+                downloads.append((len(rows), len(json.dumps(rows, separators=(",", ":")))))
+
+            self.stdout.write(f"Warehouses: {Warehouse.objects.count()}")
+            for zoom in options["zooms"]:
+                views = []
+                for _ in range(options["viewports"]):
+                    _, latitude, longitude, _ = rng.choice(METROS)
+                    views.append((zoom, viewport(zoom, latitude + rng.uniform(-2, 2), longitude + rng.uniform(-2, 2))))
+                sizes.clear()
+                downloads.clear()
+                self.stdout.write(f"zoom {zoom}:")
+                self.stdout.write(format_summary("  clusters, cold cache", time_calls(cold_map_view, views)))
+                for view in views:
+                    map_view(*view)
+                self.stdout.write(format_summary("  clusters, warm cache", time_calls(map_view, views)))
+                self.stdout.write(format_summary(
+                    "  every warehouse in view", time_calls(download, views[:options["download_viewports"]])))
+                self.stdout.write(
+                    f"  response size: clusters {statistics.fmean(sizes) / 1024:.1f} KiB, every warehouse "
+                    f"{statistics.fmean(size for _, size in downloads) / 1024:.1f} KiB "
+                    f"({statistics.fmean(count for count, _ in downloads):.0f} rows)"
+                )
+            clusters.invalidate_all()
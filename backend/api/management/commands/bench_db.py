@@ -0,0 +1,111 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, transaction
+
+from api.models import Warehouse
+
+BENCH_CITY = "bench-db"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure mixed read/write throughput from concurrent worker processes for "
+        "each DATABASE_PROFILE. SQLite profiles run against a throwaway file; the "
+        "postgres profile uses the PG* database and deletes its rows afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profiles", default="sqlite-basic,sqlite", help="Comma-separated profiles, e.g. sqlite-basic,sqlite,postgres")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds each worker runs.")
+        parser.add_argument("--write-ratio", type=float, default=0.2)
+        parser.add_argument("--conn-max-age", type=int, default=None, help="Override DATABASE_CONN_MAX_AGE.")
+        parser.add_argument("--worker", action="store_true", help="Internal: run one worker loop and print its counts.")
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            self.stdout.write(json.dumps(self.work(options["duration"], options["write_ratio"])))
+            return
+
+        self.stdout.write(
+            f"{options['workers']} workers, {options['duration']:.0f}s, "
+            f"{options['write_ratio']:.0%} writes"
+        )
+        for profile in options["profiles"].split(","):
+            with tempfile.TemporaryDirectory() as directory:
+                env = {**os.environ, "DATABASE_PROFILE": profile, "SQLITE_PATH": os.path.join(directory, "bench.sqlite3")}
+                if options["conn_max_age"] is not None:
+                    env["DATABASE_CONN_MAX_AGE"] = str(options["conn_max_age"])
+                self.manage(env, "migrate", "-v0")
+                try:
+                    totals = self.run_workers(env, options)
+                finally:
+                    if profile == "postgres":
+                        self.manage(env, "shell", "-c", f"from api.models import Warehouse; Warehouse.objects.filter(city={BENCH_CITY!r}).delete()")
+            ops = totals["reads"] + totals["writes"]
+            self.stdout.write(
+                f"{profile:<14} {ops / options['duration']:9.0f} ops/s  "
+                f"reads={totals['reads']:<7} writes={totals['writes']:<6} locked={totals['locked']}"
+            )
+
+    def manage(self, env, *args):
+        result = subprocess.run(
+            [sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), *args],
+            env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"manage.py {' '.join(args)} failed:\n{result.stderr}")
+        return result.stdout
+
+    def run_workers(self, env, options):
+        command = [
+            sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), "bench_db", "--worker",
+            "--duration", str(options["duration"]), "--write-ratio", str(options["write_ratio"]),
+        ]
+        workers = [
+            subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            for _ in range(options["workers"])
+        ]
+        totals = {"reads": 0, "writes": 0, "locked": 0}
+        for worker in workers:
+            stdout, stderr = worker.communicate()
+            if worker.returncode:
+                raise CommandError(f"Worker failed:\n{stderr}")
+            for name, value in json.loads(stdout.strip().splitlines()[-1]).items():
+                totals[name] += value
+        return totals
+
+    def work(self, duration, write_ratio):
+        """
+        Alternate request-sized reads and writes until duration elapses. Each
+        operation is bracketed like a request, so connections are closed or
+        reused according to the profile's CONN_MAX_AGE.
+        """
+        rng = random.Random(os.getpid())
+        counts = {"reads": 0, "writes": 0, "locked": 0}
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            close_old_connections()
+            try:
+                if rng.random() < write_ratio:
+                    with transaction.atomic():
+                        Warehouse.objects.create(
+                            city=BENCH_CITY, latitude=rng.uniform(-85, 85), longitude=rng.uniform(-180, 180)
+                        )
+                    counts["writes"] += 1
+                else:
+                    list(Warehouse.objects.order_by("-created_at", "-id")[:20])
+                    counts["reads"] += 1
+            except OperationalError:
+                # "database is locked": the write lock was not granted in time
+                counts["locked"] += 1
+            close_old_connections()
+        return counts
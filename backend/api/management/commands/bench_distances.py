@@ -0,0 +1,99 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.test import APIClient
+
+from api import distances, geo
+from api.benchmarks import format_summary, rolled_back, time_calls
+from api.cache import WAREHOUSES, bump
+from api.models import User, Warehouse
+from api.seeding import METROS, Seeder
+
+
+def random_points(rng, count):
+    """
+    count [latitude, longitude] points scattered around metro areas, where
+    deliveries are.
+    """
+    points = []
+    for _ in range(count):
+        _, latitude, longitude, _ = rng.choice(METROS)
+        points.append([latitude + rng.uniform(-1, 1), longitude + rng.uniform(-1, 1)])
+    return points
+
+
+class Command(BaseCommand):
+    help = (
+        "Time warehouses/distances/ matrices and warehouses/assign/ nearest "
+        "warehouses against a Python loop over geo.haversine_km."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000, help="Warehouses.")
+        parser.add_argument("--points", type=int, default=10_000, help="Points per request.")
+        parser.add_argument("--k", type=int, nargs="+", default=[1, 10])
+        parser.add_argument("--repeat", type=int, default=3, help="Requests of each kind.")
+        parser.add_argument("--loop-points", type=int, default=100,
+                            help="Points run through the Python loop, extrapolated to --points.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        with rolled_back():
+            user = User.objects.create(username="bench-distances", role=User.Role.PLATFORM_ADMIN)
+            self.stdout.write(f"Seeding {options['rows']} warehouses around metro areas (rolled back afterwards)...")
+            Seeder(seed=options["seed"]).warehouses(options["rows"])
+            # on_commit never runs in the rolled back transaction
+            bump(WAREHOUSES)
+            client = APIClient()
+            client.force_authenticate(user)
+            count = options["points"]
+            requests = [random_points(rng, count) for _ in range(options["repeat"])]
+
+            start = time.perf_counter()
+            distances.warehouses()
+            self.stdout.write(f"Warehouses: {Warehouse.objects.count()}, loaded in {time.perf_counter() - start:.2f}s")
+
+            coordinates = list(Warehouse.objects.values_list("id", "latitude", "longitude"))
+            loop_points = requests[0][:options["loop_points"]]
+            start = time.perf_counter()
+            for latitude, longitude in loop_points:
+                row = [(geo.haversine_km(latitude, longitude, lat, lon), pk) for pk, lat, lon in coordinates]
+                min(row)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"Python loop, {len(loop_points)} points: {elapsed:.2f}s, "
+                f"about {elapsed * count / len(loop_points):.0f}s for {count} points"
+            )
+
+            def post(path, points, **body):
+                response = client.post(path, {"points": points, **body}, format="json")
+                if response.status_code != 200:
+                    raise CommandError(f"{path} returned {response.status_code}: {response.content[:200]!r}")
+                return response
+
+            sizes = []
+
+            def matrix(points, matrix_format):
+                response = post(f"/api/warehouses/distances/?format={matrix_format}", points)
+                sizes.append(sum(len(chunk) for chunk in response.streaming_content))
+
+            label = f"{count} x {len(coordinates)}"
+            self.stdout.write(format_summary(
+                f"distances/ {label}, npz", time_calls(matrix, [(points, "npz") for points in requests])))
+            self.stdout.write(f"  {sizes[-1] / 2 ** 20:.0f} MiB")
+            sizes.clear()
+            self.stdout.write(format_summary(
+                f"distances/ {label}, csv", time_calls(matrix, [(requests[0], "csv")])))
+            self.stdout.write(f"  {sizes[-1] / 2 ** 20:.0f} MiB")
+
+            for k in options["k"]:
+                def assign(points):
+                    post(f"/api/warehouses/assign/?k={k}", points)
+
+                self.stdout.write(format_summary(
+                    f"assign/ k={k}, {count} points", time_calls(assign, [(points,) for points in requests])))
+                self.stdout.write(format_summary(
+                    f"assign/ k={k}, {count} points, cached", time_calls(assign, [(points,) for points in requests])))
+        bump(WAREHOUSES)
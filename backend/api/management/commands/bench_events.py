@@ -0,0 +1,209 @@
+import asyncio
+import http.client
+import json
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import format_summary, summarize
+
+from .bench_asgi import CREATE_TOKEN, free_port
+
+BENCH_USERNAME = "bench-events"
+STREAM_PATH = "/api/announcements/stream/"
+# For reading the server's /metrics
+METRICS_TOKEN = secrets.token_urlsafe()
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many idle announcement event streams against a uvicorn server on a "
+        "throwaway SQLite database, then report what they cost the server while "
+        "idle (threads, memory, CPU, queries) and how long created announcements "
+        "take to reach every client."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=2000, help="Event streams to open.")
+        parser.add_argument("--events", type=int, default=10, help="Announcements to create while the streams are open.")
+        parser.add_argument("--idle", type=float, default=20.0, help="Seconds to hold the streams idle before measuring.")
+        parser.add_argument("--heartbeat", type=float, default=15.0, help="EVENTS_HEARTBEAT for the server.")
+
+    def handle(self, *args, **options):
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise CommandError("bench_events needs uvicorn (pip install uvicorn).")
+
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                **os.environ,
+                "SQLITE_PATH": os.path.join(directory, "bench.sqlite3"),
+                "EVENTS_HEARTBEAT": str(options["heartbeat"]),
+                "METRICS_TOKEN": METRICS_TOKEN,
+            }
+            self.manage(env, "migrate", "-v0")
+            token = self.manage(env, "shell", "-c", CREATE_TOKEN.format(username=BENCH_USERNAME)).strip().splitlines()[-1]
+            port = free_port()
+            log = tempfile.TemporaryFile("w+")
+            server = subprocess.Popen(
+                [
+                    sys.executable, "-m", "uvicorn", "warehouse_admin.asgi:application",
+                    "--port", str(port), "--log-level", "warning", "--lifespan", "off",
+                ],
+                cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=log,
+            )
+            try:
+                self.wait_for(server, port, log)
+                asyncio.run(self.run(server.pid, port, token, options))
+            finally:
+                server.terminate()
+                server.wait()
+                log.close()
+
+    async def run(self, pid, port, token, options):
+        baseline = process_stats(pid)
+        start = time.perf_counter()
+        streams = []
+        # In batches, so the server's listen backlog never overflows
+        for offset in range(0, options["clients"], 100):
+            batch = min(100, options["clients"] - offset)
+            streams += await asyncio.gather(*[open_stream(port, token) for _ in range(batch)])
+        opened = time.perf_counter() - start
+        self.stdout.write(
+            f"{len(streams)} streams open in {opened:.1f}s "
+            f"({opened / len(streams) * 1000:.2f}ms each)"
+        )
+
+        before_idle = process_stats(pid)
+        queries_before = await asyncio.to_thread(query_total, port)
+        await asyncio.sleep(options["idle"])
+        idle = process_stats(pid)
+        queries_during = await asyncio.to_thread(query_total, port) - queries_before
+        if idle:
+            per_stream = (idle["rss_kb"] - baseline["rss_kb"]) / len(streams)
+            cpu = (idle["cpu_seconds"] - before_idle["cpu_seconds"]) / options["idle"] * 100
+            self.stdout.write(
+                f"idle for {options['idle']:g}s: threads={idle['threads']} "
+                f"rss={idle['rss_kb'] / 1024:.1f}MB (+{per_stream:.1f}KB per stream) cpu={cpu:.1f}%"
+            )
+        self.stdout.write(f"queries while idle: {queries_during}")
+
+        samples = []
+        for number in range(options["events"]):
+            waiters = [asyncio.create_task(wait_for_event(reader, "announcement.created")) for reader, _ in streams]
+            published = time.perf_counter()
+            await asyncio.to_thread(create_announcement, port, token, number)
+            arrivals = await asyncio.gather(*waiters)
+            samples += [arrival - published for arrival in arrivals]
+        self.stdout.write(format_summary(f"fan-out to {len(streams)} streams", summarize(samples)))
+
+        for _, writer in streams:
+            writer.close()
+        await asyncio.sleep(1)
+        self.stdout.write(f"after disconnecting: {await asyncio.to_thread(open_streams, port)} streams open")
+
+    def manage(self, env, *args):
+        result = subprocess.run(
+            [sys.executable, os.path.join(settings.BASE_DIR, "manage.py"), *args],
+            env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"manage.py {' '.join(args)} failed:\n{result.stderr}")
+        return result.stdout
+
+    def wait_for(self, server, port, log, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                log.seek(0)
+                raise CommandError(f"Server exited:\n{log.read()}")
+            try:
+                fetch(port, "GET", "/metrics", token=METRICS_TOKEN)
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError(f"Server did not start on port {port}")
+
+
+async def open_stream(port, token):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"GET {STREAM_PATH}?token={token} HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+        f"Accept: text/event-stream\r\n\r\n".encode()
+    )
+    await writer.drain()
+    await wait_for_event(reader, "ready")
+    return reader, writer
+
+
+async def wait_for_event(reader, name):
+    """
+    Read the stream up to the end of the first event with the given name and
+    return when it arrived. The server writes each event whole, so reading
+    up to the blank line that ends it never splits one.
+    """
+    marker = f"event: {name}\n".encode()
+    while marker not in await reader.readuntil(b"\n\n"):
+        pass
+    return time.perf_counter()
+
+
+def fetch(port, method, path, body=None, token=None):
+    client = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    try:
+        client.request(method, path, body, headers)
+        response = client.getresponse()
+        return response.status, response.read()
+    finally:
+        client.close()
+
+
+def create_announcement(port, token, number):
+    body = json.dumps({"title": f"Benchmark announcement {number}", "content": "Pushed to every open stream."})
+    status, content = fetch(port, "POST", "/api/announcements/", body, token)
+    if status != 201:
+        raise CommandError(f"Creating an announcement failed with {status}: {content[:200]!r}")
+
+
+def metric_lines(port, name):
+    _, content = fetch(port, "GET", "/metrics", token=METRICS_TOKEN)
+    return [line for line in content.decode().splitlines() if line.startswith(name)]
+
+
+def query_total(port):
+    return sum(int(float(line.rsplit(" ", 1)[1])) for line in metric_lines(port, "db_queries_total{"))
+
+
+def open_streams(port):
+    return int(metric_lines(port, "event_streams_open ")[0].rsplit(" ", 1)[1])
+
+
+def process_stats(pid):
+    """
+    Threads, resident memory and CPU time of a process, from /proc (Linux
+    only; None elsewhere).
+    """
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status)
+        with open(f"/proc/{pid}/stat") as stat:
+            ticks = stat.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    clock = os.sysconf("SC_CLK_TCK")
+    return {
+        "threads": int(fields["Threads"]),
+        "rss_kb": int(fields["VmRSS"].split()[0]),
+        # utime and stime, the 14th and 15th fields
+        "cpu_seconds": (int(ticks[11]) + int(ticks[12])) / clock,
+    }
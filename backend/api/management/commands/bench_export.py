@@ -0,0 +1,51 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from api.benchmarks import create_warehouses, rolled_back
+from api.models import User, Warehouse
+
+
+class Command(BaseCommand):
+    help = (
+        "Time a streamed warehouse export and report its peak Python memory. "
+        "api.tests.test_exports checks the memory ceiling."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            existing = Warehouse.objects.count()
+            if existing < options["rows"]:
+                self.stdout.write(f"Seeding {options['rows'] - existing} warehouses (rolled back afterwards)...")
+                create_warehouses(options["rows"] - existing)
+            user = User.objects.create(username="bench-export", role=User.Role.PLATFORM_ADMIN)
+            client = APIClient()
+            client.force_authenticate(user)
+
+            tracemalloc.start()
+            start = time.perf_counter()
+            response = client.get("/api/warehouses/export/", {"format": options["format"]})
+            first_byte = None
+            size = 0
+            lines = 0
+            for chunk in response.streaming_content:
+                if first_byte is None:
+                    first_byte = time.perf_counter() - start
+                size += len(chunk)
+                lines += chunk.count(b"\n")
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        peak_mb = peak / (1024 * 1024)
+        self.stdout.write(f"lines:            {lines}")
+        self.stdout.write(f"bytes:            {size}")
+        self.stdout.write(f"time to 1st byte: {first_byte * 1000:.2f} ms")
+        self.stdout.write(f"total time:       {elapsed:.2f} s ({lines / elapsed:.0f} rows/s)")
+        self.stdout.write(f"peak memory:      {peak_mb:.2f} MB")
@@ -0,0 +1,69 @@
+from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.benchmarks import format_summary, rolled_back, time_calls
+from api.models import User
+from api.seeding import Seeder
+
+# (endpoint, query string) for the field subsets screens ask for
+SUBSETS = (
+    ("/api/announcements/", ""),
+    ("/api/announcements/", "omit=content"),
+    ("/api/announcements/", "fields=id,title,created_at,created_by_username"),
+    ("/api/announcements/", "fields=id,title"),
+    ("/api/warehouses/", ""),
+    ("/api/warehouses/", "omit=created_by,created_by_username"),
+    ("/api/warehouses/", "fields=id,latitude,longitude"),
+    ("/api/warehouses/", "fields=id,city"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare list page size and latency for common ?fields= / ?omit= "
+        "subsets, with the serializers and with FAST_LIST_RESPONSES."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20_000, help="Warehouses and announcements to seed.")
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--requests", type=int, default=50, help="Pages fetched per subset.")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.stdout.write(f"Seeding {options['rows']} warehouses and announcements (rolled back afterwards)...")
+            seeder = Seeder(seed=0)
+            seeder.users(100, "bench-fields", prefix="bench-fields-")
+            seeder.warehouses(options["rows"])
+            seeder.announcements(options["rows"])
+            user = User.objects.create(username="bench-fields", role=User.Role.PLATFORM_ADMIN)
+            client = APIClient()
+            client.force_authenticate(user)
+            page_size = options["page_size"]
+            pages = max(1, options["rows"] // page_size)
+
+            for fast in (False, True):
+                self.stdout.write(f"FAST_LIST_RESPONSES={fast}, {page_size} rows per page:")
+                with override_settings(FAST_LIST_RESPONSES=fast):
+                    for path, query in SUBSETS:
+                        sizes = []
+
+                        def fetch(page):
+                            url = f"{path}?page_size={page_size}&page={page}" + (f"&{query}" if query else "")
+                            response = client.get(url)
+                            if response.status_code != 200:
+                                raise CommandError(f"{url} returned {response.status_code}: {response.content[:200]!r}")
+                            sizes.append(len(response.content))
+
+                        with CaptureQueriesContext(connection) as queries:
+                            fetch(1)
+                        joined = any("JOIN" in query["sql"] for query in queries.captured_queries)
+                        summary = time_calls(fetch, [(page % pages + 1,) for page in range(options["requests"])])
+                        self.stdout.write(format_summary(f"  {path.split('/')[2]}?{query or '(all fields)'}", summary))
+                        self.stdout.write(
+                            f"    {sum(sizes) / len(sizes) / 1024:.1f} KiB per page, "
+                            f"{'joins' if joined else 'no join on'} api_user"
+                        )
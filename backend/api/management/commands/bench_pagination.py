@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from api.benchmarks import create_warehouses, format_summary, rolled_back, time_calls
+from api.models import User, Warehouse
+from api.pagination import KeysetPagination
+from api.views import WarehouseViewSet
+
+
+class Command(BaseCommand):
+    help = "Benchmark page-N latency of page number vs keyset pagination on /api/warehouses/."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200_000)
+        parser.add_argument("--page-size", type=int, default=10)
+        parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        repeat = options["repeat"]
+        with rolled_back():
+            existing = Warehouse.objects.count()
+            if existing < options["rows"]:
+                self.stdout.write(f"Seeding {options['rows'] - existing} warehouses (rolled back afterwards)...")
+                create_warehouses(options["rows"] - existing)
+            total = Warehouse.objects.count()
+            user = User.objects.create(username="bench-pagination", role=User.Role.PLATFORM_ADMIN)
+            client = APIClient()
+            client.force_authenticate(user)
+
+            queryset = WarehouseViewSet.queryset.all()
+            keyset = KeysetPagination()
+            keyset.model = queryset.model
+            keyset.ordering = keyset.get_ordering(queryset)
+
+            self.stdout.write(f"Warehouses: {total}, page size {page_size}")
+            for page in options["pages"]:
+                if (page - 1) * page_size >= total:
+                    continue
+                params = {"page": page, "page_size": page_size}
+                self.stdout.write(format_summary(f"page={page} (page number)", time_calls(
+                    lambda: client.get("/api/warehouses/", params), [()] * repeat)))
+
+                cursor_params = {"pagination": "cursor", "page_size": page_size}
+                if page > 1:
+                    # The cursor a client would hold after walking to page N-1
+                    anchor = queryset[(page - 1) * page_size - 1]
+                    cursor_params["cursor"] = keyset.encode_cursor(anchor)
+                self.stdout.write(format_summary(f"page={page} (keyset)", time_calls(
+                    lambda: client.get("/api/warehouses/", cursor_params), [()] * repeat)))
@@ -0,0 +1,117 @@
+import itertools
+import random
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from rest_framework.test import APIClient
+
+from api import search
+from api.benchmarks import format_summary, rolled_back, time_calls
+from api.models import Announcement, User
+
+SYLLABLES = [consonant + vowel for consonant in "bdfgklmnprstvz" for vowel in "aeiou"]
+
+
+def vocabulary(rng, size):
+    """
+    size distinct made-up words, most frequent first. The seeder's 22 words
+    each appear in nearly every announcement, which says nothing about search.
+    """
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words, key=lambda word: rng.random())
+
+
+def create_announcements(count, words, rng, author, batch_size=5000, stdout=None):
+    """
+    Bulk insert count announcements whose words follow Zipf's law, as in
+    real text: a few words are everywhere, most are rare.
+    """
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    created = 0
+    while created < count:
+        batch = [
+            Announcement(
+                title=" ".join(rng.choices(words, cum_weights=cum_weights, k=5)).capitalize(),
+                content=" ".join(rng.choices(words, cum_weights=cum_weights, k=40)),
+                created_by=author,
+            )
+            for _ in range(min(batch_size, count - created))
+        ]
+        Announcement.objects.bulk_create(batch)
+        created += len(batch)
+        if stdout is not None and (created % 100_000 == 0 or created == count):
+            stdout.write(f"  inserted {created}/{count} announcements")
+    return created
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare announcement search latency through the full-text index "
+        "(announcements/search/ and the admin) with the admin's LIKE scan."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--words", type=int, default=20_000, help="Vocabulary size.")
+        parser.add_argument("--queries", type=int, default=20, help="Queries of each kind.")
+        parser.add_argument("--scan-queries", type=int, default=3,
+                            help="LIKE queries of each kind (they are slow at 1M rows).")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        index = search.index_for(connection)
+        if not index.install_sql:
+            raise CommandError(f"{connection.vendor} has no full-text index to benchmark.")
+        rng = random.Random(options["seed"])
+        words = vocabulary(rng, options["words"])
+        count = options["queries"]
+        # The search box input for each kind of query, by word frequency rank
+        kinds = (
+            ("common word", [(rng.choice(words[:10]),) for _ in range(count)]),
+            ("mid-frequency word", [(rng.choice(words[100:1000]),) for _ in range(count)]),
+            ("rare word", [(rng.choice(words[-5000:]),) for _ in range(count)]),
+            ("two words", [(f"{rng.choice(words[:100])} {rng.choice(words[100:1000])}",) for _ in range(count)]),
+            ("prefix", [(rng.choice(words[100:1000])[:3],) for _ in range(count)]),
+        )
+
+        with rolled_back():
+            user = User.objects.create(username="bench-search", role=User.Role.PLATFORM_ADMIN,
+                                       is_staff=True, is_superuser=True)
+            self.stdout.write(f"Seeding {options['rows']} announcements (rolled back afterwards)...")
+            create_announcements(options["rows"], words, rng, user, stdout=self.stdout)
+            self.stdout.write(f"Announcements: {Announcement.objects.count()} ({type(index).__name__})")
+
+            client = APIClient()
+            client.force_authenticate(user)
+            model_admin = admin.site._registry[Announcement]
+            request = RequestFactory().get("/admin/api/announcement/")
+            request.user = user
+            per_page = model_admin.list_per_page
+            queryset = model_admin.get_queryset(request).order_by("-pk")
+
+            def api_search(text):
+                response = client.get("/api/announcements/search/", {"q": text})
+                if response.status_code != 200:
+                    raise CommandError(f"Search for {text!r} returned {response.status_code}")
+
+            def admin_page(get_search_results):
+                # What the changelist runs: the page, and the count for the paginator
+                def run(text):
+                    results, _ = get_search_results(request, queryset, text)
+                    list(results[:per_page])
+                    results.count()
+                return run
+
+            index_admin = admin_page(model_admin.get_search_results)
+            like_admin = admin_page(lambda *args: admin.ModelAdmin.get_search_results(model_admin, *args))
+
+            for label, queries in kinds:
+                self.stdout.write(f"{label}, e.g. {queries[0][0]!r}:")
+                self.stdout.write(format_summary("  api search (ranked page)", time_calls(api_search, queries)))
+                self.stdout.write(format_summary("  admin, full-text index", time_calls(index_admin, queries)))
+                self.stdout.write(format_summary(
+                    "  admin, LIKE scan", time_calls(like_admin, queries[:options["scan_queries"]])))
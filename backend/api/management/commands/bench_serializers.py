@@ -0,0 +1,78 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api import fast_lists
+from api.benchmarks import rolled_back
+from api.seeding import Seeder
+from api.views import AnnouncementViewSet, WarehouseViewSet
+
+ENDPOINTS = (
+    ("warehouses", WarehouseViewSet),
+    ("announcements", AnnouncementViewSet),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows serialized per second by ModelSerializer and by "
+        "api.fast_lists at several page sizes. api.tests.test_fast_lists checks "
+        "that both give the same bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=5000, help="Warehouses and announcements to seed.")
+        parser.add_argument("--page-sizes", type=int, nargs="+", default=[10, 100, 1000])
+        parser.add_argument("--min-rows", type=int, default=50_000, help="Rows serialized per measurement.")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.stdout.write(f"Seeding {options['rows']} warehouses and announcements (rolled back afterwards)...")
+            seeder = Seeder(seed=0)
+            seeder.users(100, "bench-serializers", prefix="bench-serializers-")
+            seeder.warehouses(options["rows"])
+            seeder.announcements(options["rows"])
+
+            self.stdout.write(
+                f"JSON encoding on the fast path: {'orjson' if fast_lists.orjson else 'json (orjson is not installed)'}"
+            )
+            for label, viewset in ENDPOINTS:
+                for page_size in options["page_sizes"]:
+                    self.compare(label, viewset, page_size, options["min_rows"])
+
+    def compare(self, label, viewset, page_size, min_rows):
+        serializer_class = viewset.serializer_class
+        values = fast_lists.values_serializer(serializer_class)
+        instances = viewset.queryset.all()[:page_size]
+        rows = values.queryset(viewset.queryset.all())[:page_size]
+        repeat = max(3, min_rows // page_size)
+        renderer = JSONRenderer()
+        fast_renderer = fast_lists.FastJSONRenderer()
+
+        def serializer_page(page):
+            return serializer_class(page, many=True).data
+
+        fetched_instances, fetched_rows = list(instances), list(rows)
+        stages = (
+            ("serialize", lambda: serializer_page(fetched_instances), lambda: values.to_representation(fetched_rows)),
+            ("fetch + serialize",
+             lambda: serializer_page(list(instances.all())),
+             lambda: values.to_representation(list(rows.all()))),
+            ("fetch + serialize + render",
+             lambda: renderer.render(serializer_page(list(instances.all()))),
+             lambda: fast_renderer.render(values.to_representation(list(rows.all())))),
+        )
+        self.stdout.write(f"{label}, page_size={page_size} (serializer -> fast path):")
+        for stage, serializer_path, fast_path in stages:
+            before = rows_per_second(serializer_path, page_size, repeat)
+            after = rows_per_second(fast_path, page_size, repeat)
+            self.stdout.write(f"  {stage:<28} {before:9.0f} -> {after:9.0f} rows/s ({after / before:4.1f}x)")
+
+
+def rows_per_second(func, page_size, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return page_size * repeat / (time.perf_counter() - start)
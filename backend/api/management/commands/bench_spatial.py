@@ -0,0 +1,66 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from api import geo
+from api.benchmarks import create_warehouses, format_summary, rolled_back, time_calls
+from api.models import Warehouse
+
+
+def scan_nearby(latitude, longitude, radius_km, k):
+    """
+    Baseline: evaluate the distance of every warehouse.
+    """
+    results = []
+    for warehouse in Warehouse.objects.all():
+        distance = geo.haversine_km(latitude, longitude, warehouse.latitude, warehouse.longitude)
+        if distance <= radius_km:
+            results.append((distance, warehouse.pk))
+    results.sort()
+    return results[:k]
+
+
+def scan_bbox(min_lon, min_lat, max_lon, max_lat):
+    """
+    Baseline: coordinate range filter without the geohash index.
+    """
+    return list(Warehouse.objects.filter(
+        Q(longitude__gte=min_lon, longitude__lte=max_lon, latitude__gte=min_lat, latitude__lte=max_lat)
+    ))
+
+
+class Command(BaseCommand):
+    help = "Benchmark nearby/bbox warehouse queries against a full scan."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--radius-km", type=float, default=50.0)
+        parser.add_argument("--k", type=int, default=10)
+        parser.add_argument("--scan-queries", type=int, default=5,
+                            help="Number of full-scan queries (they are slow at 1M rows).")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        radius_km = options["radius_km"]
+        k = options["k"]
+        points = [(rng.uniform(-60, 60), rng.uniform(-170, 170)) for _ in range(options["queries"])]
+        boxes = [(lon - 1, lat - 1, lon + 1, lat + 1) for lat, lon in points]
+        scan_count = options["scan_queries"]
+
+        with rolled_back():
+            existing = Warehouse.objects.count()
+            if existing < options["rows"]:
+                self.stdout.write(f"Seeding {options['rows'] - existing} warehouses (rolled back afterwards)...")
+                create_warehouses(options["rows"] - existing, seed=options["seed"], stdout=self.stdout)
+
+            self.stdout.write(f"Warehouses: {Warehouse.objects.count()}")
+            self.stdout.write(format_summary("nearby (geohash index)", time_calls(
+                lambda lat, lon: Warehouse.objects.nearby(lat, lon, radius_km, k), points)))
+            self.stdout.write(format_summary("nearby (full scan)", time_calls(
+                lambda lat, lon: scan_nearby(lat, lon, radius_km, k), points[:scan_count])))
+            self.stdout.write(format_summary("bbox (geohash index)", time_calls(
+                lambda *box: list(Warehouse.objects.within_bbox(*box)), boxes)))
+            self.stdout.write(format_summary("bbox (full scan)", time_calls(scan_bbox, boxes[:scan_count])))
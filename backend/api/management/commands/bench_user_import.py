@@ -0,0 +1,71 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api import passwords
+from api.benchmarks import rolled_back
+from api.models import User
+
+
+def user_rows(prefix, count):
+    return [
+        {
+            "username": f"{prefix}{index}",
+            "password": f"Provisioned-{index}-Kx9!",
+            "email": f"{prefix}{index}@example.com",
+            "first_name": "Bench",
+            "last_name": f"User {index}",
+            "role": User.Role.WAREHOUSE_ADMIN,
+        }
+        for index in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare user provisioning rows/second: one POST /api/users/ per user vs the "
+        "users/bulk/ endpoint hashing passwords with different numbers of processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100, help="Users per bulk import.")
+        parser.add_argument("--single-rows", type=int, default=20,
+                            help="Users created through the one-at-a-time path.")
+        parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}),
+                            help="PASSWORD_HASH_WORKERS values to compare.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"CPUs: {os.cpu_count()}")
+        with rolled_back():
+            admin = User.objects.create(username="bench-user-import", role=User.Role.PLATFORM_ADMIN)
+            client = APIClient()
+            client.force_authenticate(admin)
+
+            single = user_rows("bench-single-", options["single_rows"])
+            start = time.perf_counter()
+            for row in single:
+                response = client.post("/api/users/", {**row, "password2": row["password"]}, format="json")
+                if response.status_code != 201:
+                    raise CommandError(f"POST /api/users/ returned {response.status_code}: {response.content[:200]!r}")
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{'one POST per user':<34} rows={len(single):<6} {len(single) / elapsed:8.2f} rows/s")
+
+            try:
+                for workers in options["workers"]:
+                    rows = user_rows(f"bench-bulk-{workers}-", options["rows"])
+                    # Start the pool first: a server pays for that once, not per import
+                    passwords.hash_passwords(["warm-up"] * workers * 2, workers)
+                    with override_settings(PASSWORD_HASH_WORKERS=workers):
+                        start = time.perf_counter()
+                        response = client.post(f"/api/users/bulk/?batch_size={options['batch_size']}", rows, format="json")
+                        elapsed = time.perf_counter() - start
+                    if response.status_code != 200 or response.data["created"] != len(rows):
+                        raise CommandError(f"Bulk import failed: {response.status_code} {response.content[:300]!r}")
+                    label = f"bulk ({workers} hashing process{'es' if workers > 1 else ''})"
+                    self.stdout.write(f"{label:<34} rows={len(rows):<6} {len(rows) / elapsed:8.2f} rows/s")
+            finally:
+                passwords.shutdown()
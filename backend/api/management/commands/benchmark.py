@@ -0,0 +1,342 @@
+import datetime
+import http.client
+import json
+import os
+import platform
+import secrets
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+import django
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from api import seeding
+from api.benchmarks import scratch_database, summarize, time_concurrently
+from api.models import Announcement, User, Warehouse
+
+BENCH_USERNAME = "bench-admin"
+QUERY_COUNT_HEADER = "X-Query-Count"
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"
+
+
+class PooledWSGIServer(WSGIServer):
+    """
+    WSGI server handling requests on a fixed pool of threads, so each thread
+    keeps its database connection across requests like a real worker.
+    """
+    # socketserver's default backlog of 5 refuses connections under load
+    request_queue_size = 128
+
+    def __init__(self, address, workers):
+        super().__init__(address, QuietHandler)
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(workers)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        # One task per worker thread, held at the barrier until every thread
+        # has one, closes each thread's database connection
+        barrier = threading.Barrier(self.workers)
+
+        def close_connections():
+            barrier.wait(timeout=10)
+            connections.close_all()
+
+        for _ in range(self.workers):
+            self.executor.submit(close_connections)
+        self.executor.shutdown(wait=True)
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def count_queries(application):
+    """
+    Wrap a WSGI application to report the number of SQL queries each request
+    ran in a response header.
+    """
+    def counted(environ, start_response):
+        queries = 0
+
+        def record(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        def counted_start_response(status, headers, exc_info=None):
+            return start_response(status, [*headers, (QUERY_COUNT_HEADER, str(queries))], exc_info)
+
+        with connection.execute_wrapper(record):
+            return application(environ, counted_start_response)
+
+    return counted
+
+
+class Scenario:
+    """
+    One route to drive. path, body and headers may be callables taking the
+    request index, for requests that address rows created earlier in the run.
+    count overrides the number of requests (an int, or a callable evaluated
+    when the scenario starts); collect is a list that receives the ids of the
+    rows created.
+    """
+    def __init__(self, name, method, path, body=None, headers=None, status=200, auth=True, count=None, collect=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.headers = headers
+        self.status = status
+        self.auth = auth
+        self.count = count
+        self.collect = collect
+
+    def resolve(self, value, index):
+        return value(index) if callable(value) else value
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every API route through a local WSGI server at a fixed concurrency and "
+        "record throughput, latency percentiles and queries per request. Runs against a "
+        "scratch database that is seeded for the run and destroyed afterwards. Results "
+        "can be saved as a JSON baseline and compared against one to flag regressions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+        parser.add_argument("--token-requests", type=int, default=20, help="Requests for the token endpoint (password hashing dominates).")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--server-threads", type=int, default=8)
+        parser.add_argument("--rows", type=int, default=10_000, help="Seed this many warehouses, a tenth as many announcements and a hundredth as many users.")
+        parser.add_argument("--only", action="append", help="Run only scenarios whose name contains this text (repeatable).")
+        parser.add_argument("--save", nargs="?", const=str(DEFAULT_BASELINE), help="Write the results as a baseline.")
+        parser.add_argument("--compare", nargs="?", const=str(DEFAULT_BASELINE), help="Compare against a baseline and exit 1 on regression.")
+        parser.add_argument("--threshold", type=float, default=20.0, help="Allowed throughput/p95 regression in percent.")
+
+    def handle(self, *args, **options):
+        # Query logging under DEBUG would skew both time and memory
+        settings.DEBUG = False
+        # The scenarios create, change and delete rows, from the server's
+        # threads, so nothing they do may reach the configured database
+        with scratch_database():
+            results = self.run(options)
+
+        report = {"meta": self.metadata(options), "scenarios": results}
+        if options["save"]:
+            path = Path(options["save"])
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(report, indent=2) + "\n")
+            self.stdout.write(f"Baseline written to {path}")
+        if options["compare"]:
+            self.compare(results, Path(options["compare"]), options["threshold"])
+
+    def run(self, options):
+        rows = options["rows"]
+        self.stdout.write("Seeding benchmark data in a scratch database...")
+        seeding.seed(users=rows // 100, warehouses=rows, announcements=rows // 10, seed=0)
+        # A new password each run; the account goes with the database
+        self.password = secrets.token_urlsafe()
+        user = User.objects.create_user(BENCH_USERNAME, password=self.password, role=User.Role.PLATFORM_ADMIN)
+        self.access = str(AccessToken.for_user(user))
+        self.refresh = str(RefreshToken.for_user(user))
+
+        server = PooledWSGIServer(("127.0.0.1", 0), options["server_threads"])
+        server.set_app(count_queries(WSGIHandler()))
+        thread = ThreadPoolExecutor(1)
+        thread.submit(server.serve_forever)
+        self.port = server.server_port
+        try:
+            return self.run_scenarios(options)
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.shutdown()
+
+    def request(self, method, path, body=None, headers=None, auth=True):
+        client = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        headers = dict(headers or {})
+        if auth:
+            headers["Authorization"] = f"Bearer {self.access}"
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        try:
+            client.request(method, path, body=payload, headers=headers)
+            response = client.getresponse()
+            content = response.read()
+            return response.status, response.getheader(QUERY_COUNT_HEADER), response.getheader("ETag"), content
+        finally:
+            client.close()
+
+    def scenarios(self, options):
+        warehouse_id = Warehouse.objects.order_by("-id").values_list("id", flat=True).first()
+        announcement_id = Announcement.objects.order_by("-id").values_list("id", flat=True).first()
+        user_id = User.objects.order_by("-id").values_list("id", flat=True).first()
+        _, _, warehouses_etag, _ = self.request("GET", "/api/warehouses/")
+        created_warehouses = []
+        created_announcements = []
+
+        def created(ids):
+            return lambda index: ids[index % len(ids)]
+
+        return [
+            Scenario("token obtain", "POST", "/api/token/", {"username": BENCH_USERNAME, "password": self.password}, auth=False, count=options["token_requests"]),
+            Scenario("token refresh", "POST", "/api/token/refresh/", {"refresh": self.refresh}, auth=False),
+            Scenario("current-user", "GET", "/api/current-user/"),
+            Scenario("dashboard", "GET", "/api/dashboard/"),
+            Scenario("users list", "GET", "/api/users/"),
+            Scenario("users detail", "GET", f"/api/users/{user_id}/"),
+            Scenario("users count", "GET", "/api/users/count/?by=role"),
+            Scenario("warehouses list", "GET", "/api/warehouses/"),
+            Scenario("warehouses list 304", "GET", "/api/warehouses/", headers={"If-None-Match": warehouses_etag}, status=304),
+            Scenario("warehouses list deep page", "GET", "/api/warehouses/?page=500"),
+            Scenario("warehouses list cursor", "GET", "/api/warehouses/?pagination=cursor"),
+            Scenario("warehouses detail", "GET", f"/api/warehouses/{warehouse_id}/"),
+            Scenario("warehouses count", "GET", "/api/warehouses/count/?by=owner"),
+            Scenario("warehouses nearby", "GET", "/api/warehouses/nearby/?lat=51.5&lon=-0.12&radius_km=50"),
+            Scenario("announcements list", "GET", "/api/announcements/"),
+            Scenario("announcements recent", "GET", "/api/announcements/recent/"),
+            Scenario("announcements detail", "GET", f"/api/announcements/{announcement_id}/"),
+            Scenario(
+                "warehouses create", "POST", "/api/warehouses/",
+                lambda index: {"city": f"Bench {index}", "latitude": 10 + index % 50, "longitude": 20 + index % 50},
+                status=201, collect=created_warehouses,
+            ),
+            Scenario(
+                "warehouses update", "PATCH", lambda index: f"/api/warehouses/{created(created_warehouses)(index)}/",
+                lambda index: {"city": f"Bench updated {index}"},
+            ),
+            Scenario(
+                "warehouses delete", "DELETE", lambda index: f"/api/warehouses/{created_warehouses[index]}/",
+                status=204, count=lambda: len(created_warehouses),
+            ),
+            Scenario(
+                "announcements create", "POST", "/api/announcements/",
+                lambda index: {"title": f"Bench {index}", "content": "Benchmark announcement"},
+                status=201, collect=created_announcements,
+            ),
+            Scenario(
+                "announcements toggle-status", "PATCH",
+                lambda index: f"/api/announcements/{created(created_announcements)(index)}/toggle-status/",
+            ),
+            Scenario(
+                "announcements update", "PATCH", lambda index: f"/api/announcements/{created(created_announcements)(index)}/",
+                lambda index: {"content": f"Updated {index}"},
+            ),
+            Scenario(
+                "announcements delete", "DELETE", lambda index: f"/api/announcements/{created_announcements[index]}/",
+                status=204, count=lambda: len(created_announcements),
+            ),
+        ]
+
+    def run_scenarios(self, options):
+        results = {}
+        for scenario in self.scenarios(options):
+            if options["only"] and not any(text in scenario.name for text in options["only"]):
+                continue
+            count = scenario.count() if callable(scenario.count) else scenario.count or options["requests"]
+            if not count:
+                continue
+
+            def call(index, scenario=scenario):
+                return self.request(
+                    scenario.method, scenario.resolve(scenario.path, index),
+                    scenario.resolve(scenario.body, index), scenario.resolve(scenario.headers, index),
+                    scenario.auth,
+                )
+
+            samples, responses, elapsed = time_concurrently(call, [(index,) for index in range(count)], options["concurrency"])
+            errors = sum(1 for status, _, _, _ in responses if status != scenario.status)
+            if scenario.collect is not None:
+                scenario.collect.extend(
+                    json.loads(content)["id"] for status, _, _, content in responses if status == scenario.status
+                )
+            queries = [int(count) for _, count, _, _ in responses if count is not None]
+            summary = summarize(samples)
+            results[scenario.name] = {
+                "requests": count,
+                "errors": errors,
+                "rps": round(count / elapsed, 1),
+                "p50_ms": round(summary["p50_ms"], 2),
+                "p95_ms": round(summary["p95_ms"], 2),
+                "p99_ms": round(summary["p99_ms"], 2),
+                "queries": round(sum(queries) / len(queries), 2) if queries else None,
+            }
+            line = (
+                f"{scenario.name:<30} {results[scenario.name]['rps']:8.1f} req/s  "
+                f"p50={summary['p50_ms']:8.2f}ms p95={summary['p95_ms']:8.2f}ms p99={summary['p99_ms']:8.2f}ms  "
+                f"queries={results[scenario.name]['queries']}"
+            )
+            if errors:
+                line += self.style.ERROR(f"  errors={errors}")
+            self.stdout.write(line)
+        return results
+
+    def metadata(self, options):
+        try:
+            commit = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        return {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "machine": f"{platform.machine()} x{os.cpu_count()}",
+            "requests": options["requests"],
+            "concurrency": options["concurrency"],
+            "server_threads": options["server_threads"],
+            "rows": options["rows"],
+        }
+
+    def compare(self, results, path, threshold):
+        """
+        Flag scenarios whose throughput fell or p95 latency rose by more than
+        threshold percent, or that now run more queries per request.
+        """
+        if not path.exists():
+            raise CommandError(f"No baseline at {path}; create one with --save.")
+        baseline = json.loads(path.read_text())["scenarios"]
+        factor = threshold / 100
+        regressions = []
+        for name, current in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            if current["rps"] < previous["rps"] * (1 - factor):
+                regressions.append(f"{name}: throughput {previous['rps']} -> {current['rps']} req/s")
+            if current["p95_ms"] > previous["p95_ms"] * (1 + factor):
+                regressions.append(f"{name}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+            if None not in (current["queries"], previous["queries"]) and current["queries"] > previous["queries"] + 0.5:
+                regressions.append(f"{name}: queries per request {previous['queries']} -> {current['queries']}")
+        if regressions:
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(f"REGRESSION {regression}"))
+            raise CommandError(f"{len(regressions)} regressions against {path}")
+        self.stdout.write(self.style.SUCCESS(f"No regressions beyond {threshold:g}% against {path}"))
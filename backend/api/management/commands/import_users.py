@@ -0,0 +1,53 @@
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ParseError
+
+from api import bulk, provisioning
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users from a CSV file (with a header row) or a JSON array of objects "
+        "with username, password, email, first_name, last_name and role, as the "
+        "users/bulk/ endpoint does. Invalid rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="A .csv or .json file.")
+        parser.add_argument("--batch-size", type=int, default=settings.BULK_BATCH_SIZE)
+        parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS,
+                            help="Password hashing processes (PASSWORD_HASH_WORKERS).")
+
+    def handle(self, *args, **options):
+        rows = self.read_rows(options["path"])
+        start = time.perf_counter()
+        report = provisioning.import_users(rows, max(1, options["batch_size"]), options["workers"])
+        elapsed = time.perf_counter() - start
+
+        for error in report["errors"]:
+            details = "; ".join(
+                f"{field}: {' '.join(map(str, messages)) if isinstance(messages, list) else messages}"
+                for field, messages in error["errors"].items()
+            )
+            self.stderr.write(f"row {error['row']}: {details}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']} of {len(rows)} users in {elapsed:.1f}s "
+            f"({len(rows) / elapsed:.1f} rows/s, {options['workers']} hashing processes)"
+        ))
+
+    def read_rows(self, path):
+        try:
+            if path.endswith(".json"):
+                with open(path, encoding="utf-8") as source:
+                    rows = json.load(source)
+            else:
+                with open(path, "rb") as source:
+                    rows = bulk.read_csv(source)
+        except (OSError, ValueError, ParseError) as exc:
+            raise CommandError(f"Cannot read {path}: {exc}")
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise CommandError("Expected a list of objects.")
+        return rows
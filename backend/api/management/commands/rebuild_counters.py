@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import counters
+
+
+class Command(BaseCommand):
+    help = "Rebuild the materialized user/warehouse counters from their tables and report any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scope", choices=[counters.USERS, counters.WAREHOUSES], action="append",
+            help="Scope to rebuild (repeatable). Defaults to all scopes.",
+        )
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Only report drift without writing; exits with status 1 if any is found.",
+        )
+
+    def handle(self, *args, **options):
+        scopes = options["scope"] or [counters.USERS, counters.WAREHOUSES]
+        drifted = False
+        for scope in scopes:
+            drift = counters.rebuild(scope, dry_run=options["check"])
+            if not drift:
+                self.stdout.write(f"{scope}: in sync")
+                continue
+            drifted = True
+            for key, (stored, actual) in sorted(drift.items()):
+                self.stdout.write(f"{scope}[{key or 'total'}]: stored={stored} actual={actual}")
+            if not options["check"]:
+                self.stdout.write(self.style.SUCCESS(f"{scope}: rebuilt"))
+        if drifted and options["check"]:
+            raise CommandError("Counters have drifted; run rebuild_counters without --check to fix them.")
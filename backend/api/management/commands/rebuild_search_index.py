@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from api import search
+from api.models import Announcement
+
+
+class Command(BaseCommand):
+    help = (
+        "Recreate the announcement full-text index (and on SQLite its triggers) "
+        "and refill it from the table. migrate does this itself when the index "
+        "or a trigger is missing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        index = search.index_for(connection)
+        if not index.install_sql:
+            self.stdout.write(f"{connection.vendor}: no full-text index, searches scan with LIKE")
+            return
+        with transaction.atomic(using=connection.alias):
+            search.install(connection)
+        count = Announcement.objects.using(connection.alias).count()
+        self.stdout.write(self.style.SUCCESS(f"{type(index).__name__}: indexed {count} announcements"))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import seeding
+
+
+class Command(BaseCommand):
+    help = (
+        "Add synthetic users, warehouses and announcements with realistic "
+        "distributions for capacity planning. The same --seed gives the same data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--warehouses", type=int, default=100_000)
+        parser.add_argument("--announcements", type=int, default=10_000)
+        parser.add_argument("--active-share", type=float, default=0.7, help="Share of announcements that are active.")
+        parser.add_argument("--password", default="seed123", help="Password shared by every seeded user.")
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        total = options["users"] + options["warehouses"] + options["announcements"]
+        start = time.perf_counter()
+        seeding.seed(
+            users=options["users"],
+            warehouses=options["warehouses"],
+            announcements=options["announcements"],
+            password=options["password"],
+            active_share=options["active_share"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            stdout=self.stdout if options["verbosity"] > 1 else None,
+        )
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {total} rows in {elapsed:.1f}s ({total / elapsed:.0f} rows/s)"
+        ))
@@ -0,0 +1,328 @@
+"""
+Per-endpoint request metrics.
+
+MetricsMiddleware times every request and attributes it to the view and
+action that handled it (for example "WarehouseViewSet.list"). Within the
+request, SQL queries are timed by an execute wrapper installed on every
+database connection (see install_query_timer), serializer .data through
+TimedSerializerMixin and JSON encoding through TimedJSONRenderer. The totals are returned in a Server-Timing header and
+accumulated in an in-process registry that metrics_view exposes in the
+Prometheus text format.
+
+The middleware runs natively under both WSGI and ASGI. The request's
+timings live in a context variable, which asgiref copies into the threads
+that run sync code for async views, so queries made there are counted too.
+
+Each worker process keeps its own registry, so with several workers every
+process has to be scraped (or the samples aggregated) separately.
+"""
+import contextvars
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from . import events, profiling
+
+# Upper bounds of the histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Stages timed inside a request, in Server-Timing order
+STAGES = ("db", "serialize", "render")
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    """
+    Timings collected while one request is handled.
+    """
+    def __init__(self):
+        self.queries = 0
+        self.durations = dict.fromkeys(STAGES, 0.0)
+        self.active = None
+
+
+def time_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.durations["db"] += time.perf_counter() - start
+        metrics.queries += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """
+    connection_created receiver adding time_query to the connection for good.
+    The wrapper does nothing outside a measured request.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+@contextmanager
+def stage(name):
+    """
+    Add the time spent in the block to the current request's named stage.
+    Nested stages of the same name are only counted once.
+    """
+    metrics = _current.get()
+    if metrics is None or metrics.active == name:
+        yield
+        return
+    metrics.active = name
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.durations[name] += time.perf_counter() - start
+        metrics.active = None
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class EndpointStats:
+    def __init__(self):
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses = {}
+        self.queries = 0
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+
+
+class Registry:
+    """
+    Thread-safe accumulator of EndpointStats keyed by (view, method).
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def observe(self, view, method, status, duration, size, metrics):
+        with self.lock:
+            stats = self.endpoints.get((view, method))
+            if stats is None:
+                stats = self.endpoints[(view, method)] = EndpointStats()
+            stats.duration.observe(duration)
+            if size is not None:
+                stats.size.observe(size)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.queries += metrics.queries
+            for name, seconds in metrics.durations.items():
+                stats.stage_seconds[name] += seconds
+
+    def reset(self):
+        with self.lock:
+            self.endpoints = {}
+
+    def render(self):
+        """
+        Return the registry in the Prometheus text exposition format.
+        """
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            lines = []
+
+            def family(name, kind, help_text, samples):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(samples)
+
+            def labels(view, method, **extra):
+                pairs = {"view": view, "method": method, **extra}
+                return ",".join(f'{key}="{escape_label(value)}"' for key, value in pairs.items())
+
+            def histogram_samples(name, attribute):
+                for (view, method), stats in endpoints:
+                    histogram = getattr(stats, attribute)
+                    if not histogram.count:
+                        continue
+                    for bound, count in histogram.cumulative():
+                        yield f"{name}_bucket{{{labels(view, method, le=format_bound(bound))}}} {count}"
+                    yield f"{name}_bucket{{{labels(view, method, le='+Inf')}}} {histogram.count}"
+                    yield f"{name}_sum{{{labels(view, method)}}} {histogram.sum!r}"
+                    yield f"{name}_count{{{labels(view, method)}}} {histogram.count}"
+
+            family(
+                "http_request_duration_seconds", "histogram", "Time to handle a request, by view.",
+                histogram_samples("http_request_duration_seconds", "duration"),
+            )
+            family(
+                "http_response_size_bytes", "histogram", "Response body size, by view (streamed responses excluded).",
+                histogram_samples("http_response_size_bytes", "size"),
+            )
+            family("http_requests_total", "counter", "Requests handled, by view and status.", (
+                f"http_requests_total{{{labels(view, method, status=status)}}} {count}"
+                for (view, method), stats in endpoints
+                for status, count in sorted(stats.statuses.items())
+            ))
+            family("db_queries_total", "counter", "SQL queries run, by view.", (
+                f"db_queries_total{{{labels(view, method)}}} {stats.queries}"
+                for (view, method), stats in endpoints
+            ))
+            family("request_stage_seconds_total", "counter", "Time spent in SQL (db), serializers (serialize) and JSON encoding (render), by view.", (
+                f"request_stage_seconds_total{{{labels(view, method, stage=name)}}} {seconds!r}"
+                for (view, method), stats in endpoints
+                for name, seconds in stats.stage_seconds.items()
+            ))
+        return "\n".join(lines) + "\n"
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_bound(bound):
+    return repr(float(bound))
+
+
+registry = Registry()
+
+
+def view_label(view_func, method):
+    """
+    Name a resolved view as Class.action for viewsets, Class for other
+    class-based views and the function name otherwise.
+    """
+    cls = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if cls is None:
+        return getattr(view_func, "__name__", "unknown")
+    actions = getattr(view_func, "actions", None)
+    if actions:
+        return f"{cls.__name__}.{actions.get(method.lower(), method.lower())}"
+    return cls.__name__
+
+
+def server_timing(metrics, total):
+    parts = [f'db;dur={metrics.durations["db"] * 1000:.2f};desc="{metrics.queries} queries"']
+    parts.extend(f"{name};dur={metrics.durations[name] * 1000:.2f}" for name in STAGES[1:])
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts)
+
+
+class MetricsMiddleware:
+    """
+    Record latency, SQL, serialization and response size per view, add a
+    Server-Timing header, and profile the request when it carries a valid
+    X-Profile header (see api.profiling).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.METRICS_ENABLED:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with profiling.profile_request(request) as profile:
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start, profile)
+
+    async def __acall__(self, request):
+        if not settings.METRICS_ENABLED:
+            return await self.get_response(request)
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with profiling.profile_request(request) as profile:
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics, time.perf_counter() - start, profile)
+
+    def finish(self, request, response, metrics, duration, profile):
+        match = request.resolver_match
+        view = view_label(match.func, request.method) if match is not None else "unresolved"
+        size = None if response.streaming else len(response.content)
+        registry.observe(view, request.method, response.status_code, duration, size, metrics)
+        if settings.METRICS_SERVER_TIMING:
+            response["Server-Timing"] = server_timing(metrics, duration)
+        if profile is not None:
+            response[profiling.PROFILE_RESPONSE_HEADER] = profile.save(view)
+        return response
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that counts its encoding time as the request's render stage.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with stage("render"):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class TimedSerializerMixin:
+    """
+    Counts building .data as the request's serialize stage. List serializers
+    need it too, since many=True returns one (see TimedListSerializer).
+    """
+    @property
+    def data(self):
+        with stage("serialize"):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+def metrics_view(request):
+    """
+    Expose the registry in the Prometheus text format to scrapers sending
+    METRICS_TOKEN as a bearer token. Nobody can read it while METRICS_TOKEN is
+    unset: route latencies and query volumes are not for the public.
+    """
+    expected = settings.METRICS_TOKEN
+    if not expected or not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {expected}"):
+        return HttpResponseForbidden()
+    body = registry.render() + "\n".join([
+        "# HELP event_streams_open Event streams open in this process (api.events).",
+        "# TYPE event_streams_open gauge",
+        f"event_streams_open {events.broker.count()}",
+    ]) + "\n"
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+
+from api import geo
+
+
+def populate_geohash(apps, schema_editor):
+    Warehouse = apps.get_model("api", "Warehouse")
+    batch = []
+    for warehouse in Warehouse.objects.only("id", "latitude", "longitude").iterator(chunk_size=2000):
+        warehouse.geohash = geo.encode_geohash(warehouse.latitude, warehouse.longitude)
+        batch.append(warehouse)
+        if len(batch) >= 2000:
+            Warehouse.objects.bulk_update(batch, ["geohash"])
+            batch = []
+    if batch:
+        Warehouse.objects.bulk_update(batch, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='warehouse',
+            name='geohash',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=12),
+        ),
+        migrations.RunPython(populate_geohash, migrations.RunPython.noop),
+    ]
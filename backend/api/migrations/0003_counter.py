@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:15
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def build_counters(apps, schema_editor):
+    User = apps.get_model("api", "User")
+    Warehouse = apps.get_model("api", "Warehouse")
+    Counter = apps.get_model("api", "Counter")
+    rows = [
+        Counter(scope="users", key="", value=User.objects.count()),
+        Counter(scope="warehouses", key="", value=Warehouse.objects.count()),
+    ]
+    for row in User.objects.order_by().values("role").annotate(n=Count("id")):
+        rows.append(Counter(scope="users", key=f"role:{row['role']}", value=row["n"]))
+    for row in Warehouse.objects.order_by().values("created_by_id").annotate(n=Count("id")):
+        owner = row["created_by_id"] if row["created_by_id"] is not None else "none"
+        rows.append(Counter(scope="warehouses", key=f"owner:{owner}", value=row["n"]))
+    Counter.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_warehouse_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Counter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=32)),
+                ('key', models.CharField(blank=True, default='', max_length=64)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'key'), name='api_counter_scope_key_uniq')],
+            },
+        ),
+        migrations.RunPython(build_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,83 @@
+from django.db import migrations
+
+# The index as this migration created it. api.search holds the current
+# definition, which ensure_installed() applies after every migrate; this
+# copy stays as it was so that editing api.search never rewrites history.
+INSTALL_SQL = {
+    "sqlite": (
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS api_announcement_fts USING fts5(
+            title, content,
+            content='api_announcement', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """,
+        "INSERT INTO api_announcement_fts(api_announcement_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+        """
+        CREATE TRIGGER IF NOT EXISTS api_announcement_fts_insert AFTER INSERT ON api_announcement BEGIN
+            INSERT INTO api_announcement_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS api_announcement_fts_delete AFTER DELETE ON api_announcement BEGIN
+            INSERT INTO api_announcement_fts(api_announcement_fts, rowid, title, content)
+            VALUES ('delete', old.id, old.title, old.content);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS api_announcement_fts_update AFTER UPDATE OF title, content ON api_announcement BEGIN
+            INSERT INTO api_announcement_fts(api_announcement_fts, rowid, title, content)
+            VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO api_announcement_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+        """,
+        "INSERT INTO api_announcement_fts(api_announcement_fts) VALUES ('rebuild')",
+    ),
+    "postgresql": (
+        """
+        ALTER TABLE api_announcement ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple'::regconfig, title), 'A') ||
+            setweight(to_tsvector('simple'::regconfig, content), 'B')
+        ) STORED
+        """,
+        "CREATE INDEX IF NOT EXISTS api_ann_search_idx ON api_announcement USING GIN (search_vector)",
+    ),
+}
+
+UNINSTALL_SQL = {
+    "sqlite": (
+        "DROP TRIGGER IF EXISTS api_announcement_fts_insert",
+        "DROP TRIGGER IF EXISTS api_announcement_fts_delete",
+        "DROP TRIGGER IF EXISTS api_announcement_fts_update",
+        "DROP TABLE IF EXISTS api_announcement_fts",
+    ),
+    "postgresql": (
+        "DROP INDEX IF EXISTS api_ann_search_idx",
+        "ALTER TABLE api_announcement DROP COLUMN IF EXISTS search_vector",
+    ),
+}
+
+
+def run(statements, schema_editor):
+    for sql in statements.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql, params=None)
+
+
+def install_search_index(apps, schema_editor):
+    run(INSTALL_SQL, schema_editor)
+
+
+def uninstall_search_index(apps, schema_editor):
+    run(UNINSTALL_SQL, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
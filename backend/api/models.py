@@ -1,10 +1,37 @@
 
+from functools import reduce
+import operator
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils.translation import gettext_lazy as _
 
+from . import geo
+
 
-class User(AbstractUser):
+class LoadedValuesMixin:
+    """
+    Remembers the database values of tracked_fields as loaded, so signal
+    handlers can tell what a save changed without re-querying the row.
+    """
+    tracked_fields = ()
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded_values()
+        return instance
+    
+    def remember_loaded_values(self):
+        self._loaded_values = {
+            name: self.__dict__[name] for name in self.tracked_fields if name in self.__dict__
+        }
+    
+    def loaded_value(self, name, default=None):
+        return getattr(self, "_loaded_values", {}).get(name, default)
+
+
+class User(LoadedValuesMixin, AbstractUser):
     """
     Custom User model with role-based access control.
     Roles: PLATFORM_ADMIN, SUPPORT_STAFF, WAREHOUSE_ADMIN
@@ -20,6 +47,15 @@ class User(AbstractUser):
         default=Role.WAREHOUSE_ADMIN,
     )
     
+    tracked_fields = ("role",)
+    
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # List ordering and the admin's role filter
+            models.Index(fields=["-date_joined", "-id"], name="api_user_joined_idx"),
+            models.Index(fields=["role"], name="api_user_role_idx"),
+        ]
+    
     def is_platform_admin(self):
         return self.role == self.Role.PLATFORM_ADMIN
     
@@ -30,13 +66,57 @@ class User(AbstractUser):
         return self.role == self.Role.WAREHOUSE_ADMIN
 
 
-class Warehouse(models.Model):
+class WarehouseQuerySet(models.QuerySet):
+    """
+    QuerySet with spatial lookups served by the geohash index.
+    """
+    def within_bbox(self, min_lon, min_lat, max_lon, max_lat):
+        """
+        Filter to warehouses inside the bounding box. The geohash cover narrows
+        the scan to a few index ranges; the coordinate filter makes it exact.
+        """
+        cover = reduce(operator.or_, (
+            models.Q(geohash__gte=start, geohash__lt=stop)
+            for start, stop in map(geo.prefix_range, geo.cover_bbox(min_lon, min_lat, max_lon, max_lat))
+        ))
+        exact = reduce(operator.or_, (
+            models.Q(
+                longitude__gte=box_min_lon,
+                longitude__lte=box_max_lon,
+                latitude__gte=box_min_lat,
+                latitude__lte=box_max_lat,
+            )
+            for box_min_lon, box_min_lat, box_max_lon, box_max_lat in geo.normalize_bbox(min_lon, min_lat, max_lon, max_lat)
+        ))
+        return self.filter(cover).filter(exact)
+
+    def nearby(self, latitude, longitude, radius_km, k):
+        """
+        Return up to k warehouses within radius_km of the coordinate, nearest
+        first, each annotated with a distance_km attribute.
+        """
+        candidates = self.none()
+        for box in geo.bbox_around(latitude, longitude, radius_km):
+            candidates = candidates | self.within_bbox(*box)
+        results = []
+        # Sorted by distance below, so skip the queryset's own ORDER BY
+        for warehouse in candidates.order_by():
+            distance = geo.haversine_km(latitude, longitude, warehouse.latitude, warehouse.longitude)
+            if distance <= radius_km:
+                warehouse.distance_km = distance
+                results.append(warehouse)
+        results.sort(key=lambda warehouse: (warehouse.distance_km, warehouse.pk))
+        return results[:k]
+
+
+class Warehouse(LoadedValuesMixin, models.Model):
     """
     Warehouse model with location information.
     """
     city = models.CharField(max_length=100)
     latitude = models.FloatField()
     longitude = models.FloatField()
+    geohash = models.CharField(max_length=geo.GEOHASH_PRECISION, db_index=True, editable=False, default="")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
@@ -46,8 +126,29 @@ class Warehouse(models.Model):
         related_name="created_warehouses"
     )
     
+    objects = WarehouseQuerySet.as_manager()
+    
+    tracked_fields = ("created_by_id", "latitude", "longitude")
+    
+    class Meta:
+        indexes = [
+            # List ordering, and Max(updated_at) for conditional GETs
+            models.Index(fields=["-created_at", "-id"], name="api_wh_created_idx"),
+            models.Index(fields=["updated_at"], name="api_wh_updated_idx"),
+        ]
+    
     def __str__(self):
         return f"Warehouse in {self.city}"
+    
+    def set_geohash(self):
+        self.geohash = geo.encode_geohash(self.latitude, self.longitude)
+    
+    def save(self, *args, **kwargs):
+        self.set_geohash()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and ("latitude" in update_fields or "longitude" in update_fields):
+            kwargs["update_fields"] = {*update_fields, "geohash"}
+        super().save(*args, **kwargs)
 
 
 class Announcement(models.Model):
@@ -66,6 +167,38 @@ class Announcement(models.Model):
     )
     is_active = models.BooleanField(default=True)
     
+    class Meta:
+        indexes = [
+            # recent (active only, newest first), list ordering, and
+            # Max(updated_at) for conditional GETs
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="api_ann_active_created_idx",
+            ),
+            models.Index(fields=["-created_at", "-id"], name="api_ann_created_idx"),
+            models.Index(fields=["updated_at"], name="api_ann_updated_idx"),
+        ]
+    
     def __str__(self):
         return self.title
 
+
+
+class Counter(models.Model):
+    """
+    Materialized row count for a scope, either in total (empty key) or for one
+    breakdown key such as "role:SUPPORT_STAFF" or "owner:3".
+    Kept current by the signal handlers in api.signals; see api.counters.
+    """
+    scope = models.CharField(max_length=32)
+    key = models.CharField(max_length=64, blank=True, default="")
+    value = models.BigIntegerField(default=0)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "key"], name="api_counter_scope_key_uniq"),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope}[{self.key}] = {self.value}"
@@ -0,0 +1,228 @@
+import base64
+import binascii
+import json
+from functools import reduce
+import operator
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination over the queryset's own ordering.
+
+    Each page is fetched with a WHERE clause on the ordering columns of the
+    last row seen instead of an OFFSET, and no COUNT(*) is run, so every page
+    costs the same no matter how deep it is. Cursors point at a row position
+    rather than a page number, so rows inserted concurrently never shift or
+    repeat the pages a client is walking through.
+
+    The ordering must be on non-null columns; the primary key is appended as a
+    tie-breaker when it is not already part of it.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    opt_in_query_param = 'pagination'
+    invalid_cursor_message = 'Invalid cursor'
+
+    @classmethod
+    def requested(cls, request):
+        """
+        Clients opt in with ?pagination=cursor or by following a cursor link.
+        """
+        params = request.query_params
+        return cls.cursor_query_param in params or params.get(cls.opt_in_query_param) == 'cursor'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, queryset):
+        ordering = [str(field) for field in queryset.query.order_by]
+        if not ordering:
+            raise ValueError('KeysetPagination requires an ordered queryset.')
+        pk_name = queryset.model._meta.pk.name
+        keys = []
+        for field in ordering:
+            name = field.lstrip('-')
+            keys.append((pk_name if name == 'pk' else name, field.startswith('-')))
+        if pk_name not in [name for name, _ in keys]:
+            keys.append((pk_name, keys[-1][1]))
+        return keys
+
+    def encode_cursor(self, obj, reverse=False):
+        # obj may be a named values_list() row (see api.fast_lists), which
+        # has the ordering columns as attributes but no _meta
+        opts = self.model._meta
+        values = [opts.get_field(name).value_to_string(obj) for name, _ in self.ordering]
+        payload = json.dumps({'r': reverse, 'v': values}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            reverse = bool(payload['r'])
+            raw_values = payload['v']
+            if len(raw_values) != len(self.ordering):
+                raise ValueError
+            values = [
+                model._meta.get_field(name).to_python(raw)
+                for (name, _), raw in zip(self.ordering, raw_values)
+            ]
+        except (TypeError, ValueError, KeyError, binascii.Error, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, values
+
+    def keyset_filter(self, values, reverse):
+        """
+        Build the "comes after this position" condition for the ordering:
+        (a > x) OR (a = x AND b > y) OR ..., with comparisons flipped for
+        descending columns and again when paging backwards.
+        """
+        clauses = []
+        for index, (name, descending) in enumerate(self.ordering):
+            equal = {field: value for (field, _), value in zip(self.ordering[:index], values[:index])}
+            lookup = 'lt' if descending != reverse else 'gt'
+            clauses.append(Q(**equal, **{f'{name}__{lookup}': values[index]}))
+        return reduce(operator.or_, clauses)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views.
+        """
+        return self.set_page([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """
+        Return the query for the requested page plus one row, which tells
+        whether another page follows.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+        self.ordering = self.get_ordering(queryset)
+        self.cursor = self.decode_cursor(request, queryset.model)
+
+        self.reverse = False
+        if self.cursor is not None:
+            self.reverse, values = self.cursor
+            queryset = queryset.filter(self.keyset_filter(values, self.reverse))
+        if self.reverse:
+            queryset = queryset.order_by(*[name if descending else f'-{name}' for name, descending in self.ordering])
+        else:
+            queryset = queryset.order_by(*[f'-{name}' if descending else name for name, descending in self.ordering])
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if self.reverse:
+            rows.reverse()
+
+        if self.reverse:
+            self.has_next = self.cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+        self.page = rows
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.build_link(self.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.build_link(self.encode_cursor(self.page[0], reverse=True))
+
+    def build_link(self, cursor):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, PageNumberPagination.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Page number pagination by default, switching to keyset pagination when
+    the client opts in with ?pagination=cursor.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.keyset_class.requested(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views, counting and slicing the page
+        with the async ORM.
+        """
+        if self.keyset_class.requested(request):
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        self.keyset = None
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        bottom = (number - 1) * paginator.per_page
+        rows = [row async for row in queryset[bottom:bottom + paginator.per_page]]
+        self.page = paginator._get_page(rows, number, paginator)
+        return rows
@@ -0,0 +1,68 @@
+"""
+Password hashing across a process pool, for provisioning many users at once.
+
+Password hashers are slow on purpose (PBKDF2 runs a million iterations per
+password), so hashing a few thousand passwords one after another in the
+request thread takes minutes. hash_passwords() spreads them over
+PASSWORD_HASH_WORKERS processes, started on first use and kept for the life
+of the process.
+
+Workers are spawned rather than forked, so they inherit none of the server's
+threads or database connections. They import only the password hashers,
+with settings read from DJANGO_SETTINGS_MODULE: override_settings() in the
+parent does not reach them.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+_lock = threading.Lock()
+_pool = None
+_pool_workers = 0
+
+
+def pool(workers):
+    global _pool, _pool_workers
+    with _lock:
+        if _pool is not None and _pool_workers != workers:
+            _pool.shutdown()
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def hash_passwords(passwords, workers=None):
+    """
+    Return make_password() of each password, in order, hashed by workers
+    processes (PASSWORD_HASH_WORKERS by default). With fewer than two, or a
+    single password, or where processes cannot be started, they are hashed
+    in the calling thread.
+    """
+    if workers is None:
+        workers = settings.PASSWORD_HASH_WORKERS
+    if workers < 2 or len(passwords) < 2:
+        return [make_password(password) for password in passwords]
+    # A few chunks per worker: enough to balance, few enough round trips
+    chunksize = max(1, len(passwords) // (workers * 4))
+    try:
+        return list(pool(workers).map(make_password, passwords, chunksize=chunksize))
+    except (BrokenProcessPool, NotImplementedError, OSError):
+        # A worker died, or processes cannot be started here (no sem_open,
+        # spawning not permitted): drop the pool, to retry next time, and
+        # finish in this thread
+        shutdown()
+    return [make_password(password) for password in passwords]
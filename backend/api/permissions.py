@@ -31,5 +31,6 @@ class IsOwnerOrAdmin(permissions.BasePermission):
         if request.user.is_platform_admin():
             return True
             
-        # Otherwise, only allow if this object belongs to the user
-        return hasattr(obj, 'created_by') and obj.created_by == request.user
\ No newline at end of file
+        # Otherwise, only allow if this object belongs to the user.
+        # Compare ids so the creator row never has to be loaded.
+        return hasattr(obj, 'created_by_id') and obj.created_by_id == request.user.pk
\ No newline at end of file
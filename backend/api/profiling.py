@@ -0,0 +1,86 @@
+"""
+On-demand sampling profiler for single requests.
+
+A request carrying "X-Profile: <METRICS_TOKEN>" is profiled by a background
+thread that snapshots the handling thread's stack every
+PROFILE_INTERVAL seconds. The samples are written to PROFILE_DIR in the
+folded-stack format read by flamegraph.pl and speedscope, and the file name
+is returned in the X-Profile-File response header. Nothing runs for requests
+without the header, and profiling is unavailable while METRICS_TOKEN is unset.
+Under ASGI the sampled thread is the event loop, so work handed to
+sync_to_async threads only shows up as time spent waiting.
+"""
+import collections
+import hmac
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+PROFILE_REQUEST_HEADER = "X-Profile"
+PROFILE_RESPONSE_HEADER = "X-Profile-File"
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = collections.Counter()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self.run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self.sampler.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.sampler.join()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def save(self, label):
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{threading.get_ident()}.folded"
+        with open(os.path.join(settings.PROFILE_DIR, name), "w") as output:
+            output.write(self.folded())
+        return name
+
+
+def profiling_requested(request):
+    token = settings.METRICS_TOKEN
+    if not token:
+        return False
+    # Read META directly: building request.headers costs more than the check
+    value = request.META.get("HTTP_" + PROFILE_REQUEST_HEADER.upper().replace("-", "_"))
+    return value is not None and hmac.compare_digest(value, token)
+
+
+@contextmanager
+def profile_request(request):
+    """
+    Profile the block if the request asked for it; yields the profiler or None.
+    """
+    if not profiling_requested(request):
+        yield None
+        return
+    profiler = SamplingProfiler(threading.get_ident(), settings.PROFILE_INTERVAL)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
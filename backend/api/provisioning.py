@@ -0,0 +1,73 @@
+"""
+Bulk user imports, shared by the users/bulk/ endpoint and the import_users
+command.
+
+UserSerializer.create() writes each user twice (create, then save after
+set_password) and hashes the password in the request thread. Here the rows
+are validated first, usernames are checked against the table a batch at a
+time, the passwords of every valid row are hashed across processes by
+api.passwords, and each batch is inserted with one bulk_create. As with the
+other bulk endpoints, failures are reported per row and never reject the
+rest of the import.
+"""
+import collections
+
+from . import bulk, counters
+from .cache import USERS, bump_on_commit
+from .models import User
+from .passwords import hash_passwords
+from .serializers import UserImportSerializer
+
+
+def import_users(rows, size, workers=None):
+    """
+    Create a user from each row, writing size rows per batch and hashing
+    with workers processes (see api.passwords.hash_passwords). Returns
+    {"created": n, "errors": [...]} with the errors in row order.
+    """
+    valid, errors = UserImportSerializer(data=rows, many=True).validate_rows()
+    valid = reject_taken_usernames(valid, errors, size)
+
+    passwords = hash_passwords([attrs["password"] for _, attrs in valid], workers)
+    items = [
+        (index, User(**{**attrs, "password": password}))
+        for (index, attrs), password in zip(valid, passwords)
+    ]
+
+    def write(users):
+        User.objects.bulk_create(users)
+        # bulk_create does not send post_save, so update the counters here
+        roles = collections.Counter(user.role for user in users)
+        counters.adjust(counters.USERS, {
+            counters.TOTAL: len(users),
+            **{counters.role_key(role): count for role, count in roles.items()},
+        })
+
+    created, write_errors = bulk.write_in_batches(items, size, write)
+    if created:
+        bump_on_commit(USERS)
+    errors += write_errors
+    errors.sort(key=lambda error: error["row"])
+    return {"created": created, "errors": errors}
+
+
+def reject_taken_usernames(valid, errors, size):
+    """
+    Drop the rows whose username is already taken, by a user or by an earlier
+    row, adding their errors. One query per batch of size usernames.
+    """
+    message = User._meta.get_field("username").error_messages["unique"]
+    usernames = list(dict.fromkeys(attrs["username"] for _, attrs in valid))
+    taken = set()
+    for batch in bulk.chunks(usernames, size):
+        taken.update(User.objects.filter(username__in=batch).values_list("username", flat=True))
+
+    remaining = []
+    for index, attrs in valid:
+        username = attrs["username"]
+        if username in taken:
+            errors.append(bulk.row_error(index, {"username": [message]}))
+        else:
+            taken.add(username)
+            remaining.append((index, attrs))
+    return remaining
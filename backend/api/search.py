@@ -0,0 +1,284 @@
+"""
+Full-text search over announcement titles and content, for the
+announcements/search/ endpoint and the admin's search box.
+
+The index is maintained by the database itself, in the same transaction as
+the write, so save(), bulk_create(), QuerySet.update(), deletes and raw SQL
+all keep it current:
+
+- SQLite: an external-content FTS5 table, api_announcement_fts, filled by
+  triggers on api_announcement and ranked by bm25 with title matches
+  weighted above content matches.
+- PostgreSQL: a generated tsvector column of title and content, weighted
+  the same way, with a GIN index.
+
+Other databases fall back to the LIKE scan the admin used before.
+
+Altering api_announcement on SQLite rebuilds the table, which drops its
+triggers. After every migrate, ensure_installed() puts back an index or
+trigger that is missing and refills the index; `manage.py
+rebuild_search_index` does the same on demand.
+"""
+import html
+import re
+from typing import NamedTuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Announcement
+
+# At most this many words of a query are used
+MAX_TERMS = 8
+# The last word is matched as a prefix (search as you type) once it is this long
+MIN_PREFIX_LENGTH = 2
+# Words of content around the matches in a highlighted excerpt
+SNIPPET_WORDS = 24
+
+# Marks matches inside the database; replaced by <mark> after escaping
+MATCH_START = "\x02"
+MATCH_STOP = "\x03"
+
+WORD_RE = re.compile(r"(\w+)(\*?)")
+
+
+class Term(NamedTuple):
+    word: str
+    prefix: bool
+
+
+class Hit(NamedTuple):
+    id: int
+    # Higher is more relevant; None when results are not ranked
+    score: float
+    # HTML-escaped, with matches wrapped in <mark>
+    title: str
+    content: str
+
+
+def parse_query(text):
+    """
+    Split search box input into terms: every word must match, "word*" is a
+    prefix, and so is the last word. Punctuation and operators are ignored,
+    so no input can produce an invalid index query.
+    """
+    matches = WORD_RE.findall(text or "")[:MAX_TERMS]
+    terms = []
+    for position, (word, star) in enumerate(matches, 1):
+        prefix = (bool(star) or position == len(matches)) and len(word) >= MIN_PREFIX_LENGTH
+        terms.append(Term(word.lower(), prefix))
+    return terms
+
+
+def mark(text):
+    return html.escape(text or "").replace(MATCH_START, "<mark>").replace(MATCH_STOP, "</mark>")
+
+
+class SQLiteIndex:
+    table = "api_announcement_fts"
+    source = Announcement._meta.db_table
+    triggers = (f"{table}_insert", f"{table}_delete", f"{table}_update")
+    install_sql = (
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+            title, content,
+            content='{source}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """,
+        # Stored in the index, so ORDER BY rank uses it
+        f"INSERT INTO {table}({table}, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON {source} BEGIN
+            INSERT INTO {table}(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON {source} BEGIN
+            INSERT INTO {table}({table}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        END
+        """,
+        # Only text changes touch the index, not toggle_status
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF title, content ON {source} BEGIN
+            INSERT INTO {table}({table}, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO {table}(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+        """,
+        f"INSERT INTO {table}({table}) VALUES ('rebuild')",
+    )
+    uninstall_sql = (
+        f"DROP TRIGGER IF EXISTS {table}_insert",
+        f"DROP TRIGGER IF EXISTS {table}_delete",
+        f"DROP TRIGGER IF EXISTS {table}_update",
+        f"DROP TABLE IF EXISTS {table}",
+    )
+
+    def installed(self, connection):
+        names = (self.table, *self.triggers)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})", names,
+            )
+            return cursor.fetchone()[0] == len(names)
+
+    def match(self, terms):
+        return " ".join(f'"{term.word}"{"*" if term.prefix else ""}' for term in terms)
+
+    def search(self, connection, terms, limit, offset):
+        match = self.match(terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT rowid, -rank, highlight({self.table}, 0, %s, %s),
+                       snippet({self.table}, 1, %s, %s, '…', %s)
+                FROM {self.table} WHERE {self.table} MATCH %s
+                ORDER BY rank, rowid DESC LIMIT %s OFFSET %s
+                """,
+                [MATCH_START, MATCH_STOP, MATCH_START, MATCH_STOP, SNIPPET_WORDS, match, limit, offset],
+            )
+            return cursor.fetchall()
+
+    def filter(self, queryset, terms):
+        return queryset.filter(pk__in=RawSQL(
+            f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [self.match(terms)]
+        ))
+
+
+class PostgresIndex:
+    index = "api_ann_search_idx"
+    source = Announcement._meta.db_table
+    # A stored generated column, so ranking reads the vector rather than
+    # parsing every matching row again. It is not a model field: Django never
+    # writes it. 'simple' does not stem, so prefixes match what was typed, as
+    # on SQLite.
+    column = "search_vector"
+    install_sql = (
+        f"""
+        ALTER TABLE {source} ADD COLUMN IF NOT EXISTS {column} tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple'::regconfig, title), 'A') ||
+            setweight(to_tsvector('simple'::regconfig, content), 'B')
+        ) STORED
+        """,
+        f"CREATE INDEX IF NOT EXISTS {index} ON {source} USING GIN ({column})",
+    )
+    uninstall_sql = (
+        f"DROP INDEX IF EXISTS {index}",
+        f"ALTER TABLE {source} DROP COLUMN IF EXISTS {column}",
+    )
+    headline_options = (
+        f'StartSel="{MATCH_START}", StopSel="{MATCH_STOP}"',
+        f'StartSel="{MATCH_START}", StopSel="{MATCH_STOP}", MaxWords={SNIPPET_WORDS}, '
+        f'MinWords={SNIPPET_WORDS // 3}, MaxFragments=2, FragmentDelimiter=" … "',
+    )
+
+    def installed(self, connection):
+        # Dropping the column drops the index with it
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_indexes WHERE tablename = %s AND indexname = %s", [self.source, self.index])
+            return cursor.fetchone() is not None
+
+    def match(self, terms):
+        return " & ".join(f"{term.word}{':*' if term.prefix else ''}" for term in terms)
+
+    def search(self, connection, terms, limit, offset):
+        match = self.match(terms)
+        title_options, content_options = self.headline_options
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT id, ts_rank_cd({self.column}, query) AS score,
+                       ts_headline('simple'::regconfig, title, query, %s),
+                       ts_headline('simple'::regconfig, content, query, %s)
+                FROM {self.source}, to_tsquery('simple'::regconfig, %s) query
+                WHERE {self.column} @@ query
+                ORDER BY score DESC, id DESC LIMIT %s OFFSET %s
+                """,
+                [title_options, content_options, match, limit, offset],
+            )
+            return cursor.fetchall()
+
+    def filter(self, queryset, terms):
+        return queryset.filter(RawSQL(
+            f"{self.source}.{self.column} @@ to_tsquery('simple'::regconfig, %s)", [self.match(terms)],
+            output_field=BooleanField(),
+        ))
+
+
+class LikeScan:
+    """
+    No index: every term must appear in the title or content, newest first.
+    """
+    install_sql = uninstall_sql = ()
+
+    def installed(self, connection):
+        return True
+
+    def search(self, connection, terms, limit, offset):
+        rows = self.filter(Announcement.objects.using(connection.alias), terms).order_by("-created_at", "-id")
+        return [
+            (pk, None, title, content[:SNIPPET_WORDS * 8])
+            for pk, title, content in rows.values_list("id", "title", "content")[offset:offset + limit]
+        ]
+
+    def filter(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(Q(title__icontains=term.word) | Q(content__icontains=term.word))
+        return queryset
+
+
+INDEXES = {
+    "sqlite": SQLiteIndex(),
+    "postgresql": PostgresIndex(),
+}
+
+
+def index_for(connection):
+    return INDEXES.get(connection.vendor, LikeScan())
+
+
+def search(terms, limit, offset=0, using=DEFAULT_DB_ALIAS):
+    """
+    Return up to limit Hits for the terms from parse_query(), most relevant
+    first, skipping offset of them.
+    """
+    connection = connections[using]
+    rows = index_for(connection).search(connection, terms, limit, offset)
+    return [Hit(pk, score, mark(title), mark(content)) for pk, score, title, content in rows]
+
+
+def filter_queryset(queryset, terms):
+    """
+    Narrow an Announcement queryset to rows matching every term, keeping
+    its ordering.
+    """
+    return index_for(connections[queryset.db]).filter(queryset, terms)
+
+
+def install(connection):
+    """
+    Create the index for the connection's database (if it has one) and fill
+    it from api_announcement. Safe to run again.
+    """
+    with connection.cursor() as cursor:
+        for sql in index_for(connection).install_sql:
+            cursor.execute(sql)
+
+
+def ensure_installed(connection):
+    """
+    install() the index if it or one of its triggers is missing, as after a
+    migration that rebuilt api_announcement. Returns whether it had to.
+    """
+    if index_for(connection).installed(connection):
+        return False
+    install(connection)
+    return True
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        for sql in index_for(connection).uninstall_sql:
+            cursor.execute(sql)
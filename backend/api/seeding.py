@@ -0,0 +1,259 @@
+"""
+Synthetic data for capacity planning and benchmarks.
+
+Rows are generated in batches from a seeded random source and written with
+bulk_create, so the same arguments always produce the same dataset:
+
+- users: mostly warehouse admins, a few support staff and platform admins,
+  all sharing one password hash computed up front
+- warehouses: clustered around metro areas with some uniform noise, owned
+  with a Zipf-like skew so a few owners hold most of the rows
+- announcements: written by platform admins and support staff, a
+  configurable share of them active
+
+bulk_create skips signals, so callers rebuild the counters and bump the
+cache versions afterwards (see seed()). It also stamps auto_now fields with
+the current time, so each batch is followed by an UPDATE putting back the
+generated timestamps (see restore_fields()).
+"""
+import datetime
+import itertools
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import cache, clusters, counters, geo
+from .models import Announcement, User, Warehouse
+
+ROLE_WEIGHTS = (
+    (User.Role.PLATFORM_ADMIN, 2),
+    (User.Role.SUPPORT_STAFF, 8),
+    (User.Role.WAREHOUSE_ADMIN, 90),
+)
+
+# (city, latitude, longitude, relative weight)
+METROS = (
+    ("New York", 40.7128, -74.0060, 10),
+    ("Los Angeles", 34.0522, -118.2437, 8),
+    ("Chicago", 41.8781, -87.6298, 6),
+    ("Houston", 29.7604, -95.3698, 5),
+    ("Atlanta", 33.7490, -84.3880, 4),
+    ("Toronto", 43.6532, -79.3832, 4),
+    ("Mexico City", 19.4326, -99.1332, 4),
+    ("Sao Paulo", -23.5505, -46.6333, 5),
+    ("London", 51.5074, -0.1278, 8),
+    ("Rotterdam", 51.9244, 4.4777, 5),
+    ("Frankfurt", 50.1109, 8.6821, 4),
+    ("Warsaw", 52.2297, 21.0122, 3),
+    ("Dubai", 25.2048, 55.2708, 4),
+    ("Mumbai", 19.0760, 72.8777, 6),
+    ("Singapore", 1.3521, 103.8198, 6),
+    ("Shanghai", 31.2304, 121.4737, 9),
+    ("Shenzhen", 22.5431, 114.0579, 7),
+    ("Tokyo", 35.6762, 139.6503, 7),
+    ("Sydney", -33.8688, 151.2093, 3),
+    ("Johannesburg", -26.2041, 28.0473, 2),
+)
+# Spread of a cluster in degrees, and the share of warehouses placed anywhere
+CLUSTER_SIGMA = 0.35
+UNIFORM_SHARE = 0.05
+# Exponent of the ownership skew: owner n gets weight 1 / n**OWNER_SKEW
+OWNER_SKEW = 1.1
+
+WORDS = (
+    "inventory", "shipment", "dock", "schedule", "maintenance", "audit", "pallet",
+    "carrier", "delay", "update", "policy", "safety", "training", "holiday", "system",
+    "report", "capacity", "forklift", "returns", "intake", "outbound", "review",
+)
+
+# Timestamps are spread over this window before now, oldest rows first
+HISTORY = datetime.timedelta(days=730)
+
+
+# Rows per UPDATE restoring the timestamps, within SQLite's parameter limit
+RESTORE_BATCH_SIZE = 1000
+
+
+def auto_timestamp_fields(model):
+    """
+    The attnames of the model's fields that bulk_create sets to now.
+    """
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+
+
+def restore_fields(model, objs, names):
+    """
+    Write the values of the named fields on objs to their rows, joining the
+    table to a VALUES list. bulk_update would do the same with a CASE per
+    field, but building those costs several times more than the inserts.
+    """
+    qn = connection.ops.quote_name
+    pk = model._meta.pk
+    fields = [model._meta.get_field(name) for name in names]
+    columns = [qn(field.column) for field in [pk, *fields]]
+    if connection.vendor == "sqlite":
+        placeholders = ["%s"] * len(columns)
+    else:
+        # VALUES would otherwise type the parameters as text
+        placeholders = [f"CAST(%s AS {field.cast_db_type(connection)})" for field in [pk, *fields]]
+    row = f"({', '.join(placeholders)})"
+    table = qn(model._meta.db_table)
+    assignments = ", ".join(f"{column} = v.{column}" for column in columns[1:])
+    with connection.cursor() as cursor:
+        for batch in (objs[start:start + RESTORE_BATCH_SIZE] for start in range(0, len(objs), RESTORE_BATCH_SIZE)):
+            params = [
+                field.get_db_prep_value(getattr(obj, field.attname), connection)
+                for obj in batch for field in [pk, *fields]
+            ]
+            cursor.execute(
+                f"WITH v({', '.join(columns)}) AS (VALUES {', '.join([row] * len(batch))}) "
+                f"UPDATE {table} SET {assignments} FROM v WHERE {table}.{columns[0]} = v.{columns[0]}",
+                params,
+            )
+
+
+class Seeder:
+    def __init__(self, seed=None, batch_size=5000, stdout=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.now = timezone.now()
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def clock(self, count):
+        """
+        Yield count increasing timestamps spread over HISTORY, so rows are
+        written in the order they would have been created and the id and
+        timestamp indexes only ever append.
+        """
+        start = self.now - HISTORY
+        step = HISTORY / max(count, 1)
+        for index in range(count):
+            yield start + step * (index + self.rng.random())
+
+    def write(self, model, count, build):
+        """
+        bulk_create count rows of model in batches, each row built by build(),
+        keeping the timestamps build() set.
+        """
+        stamped = auto_timestamp_fields(model)
+        created = 0
+        while created < count:
+            batch = [build() for _ in range(min(self.batch_size, count - created))]
+            timestamps = [[getattr(obj, name) for name in stamped] for obj in batch]
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+                if stamped:
+                    for obj, values in zip(batch, timestamps):
+                        for name, value in zip(stamped, values):
+                            setattr(obj, name, value)
+                    restore_fields(model, batch, stamped)
+            created += len(batch)
+            self.log(f"  {model._meta.verbose_name_plural}: {created}/{count}")
+        return created
+
+    def users(self, count, password, prefix="seed-user-"):
+        # Continue numbering after earlier runs with the same prefix
+        start = User.objects.filter(username__startswith=prefix).count()
+        password_hash = make_password(password)
+        roles = [role for role, _ in ROLE_WEIGHTS]
+        role_weights = list(itertools.accumulate(weight for _, weight in ROLE_WEIGHTS))
+        numbers = itertools.count(start)
+        clock = self.clock(count)
+
+        def build():
+            number = next(numbers)
+            return User(
+                username=f"{prefix}{number}",
+                email=f"{prefix}{number}@example.com",
+                first_name="Seed",
+                last_name=f"User {number}",
+                role=self.rng.choices(roles, cum_weights=role_weights)[0],
+                password=password_hash,
+                date_joined=next(clock),
+            )
+
+        return self.write(User, count, build)
+
+    def owner_sampler(self, roles):
+        """
+        Return a function picking owner ids among users with the given roles,
+        with a Zipf-like skew over a shuffled order.
+        """
+        owner_ids = list(User.objects.filter(role__in=roles).order_by("id").values_list("id", flat=True))
+        if not owner_ids:
+            return lambda: None
+        self.rng.shuffle(owner_ids)
+        weights = list(itertools.accumulate(1 / (rank ** OWNER_SKEW) for rank in range(1, len(owner_ids) + 1)))
+        return lambda: self.rng.choices(owner_ids, cum_weights=weights)[0]
+
+    def warehouses(self, count):
+        owner = self.owner_sampler([User.Role.WAREHOUSE_ADMIN, User.Role.PLATFORM_ADMIN])
+        metro_weights = list(itertools.accumulate(metro[3] for metro in METROS))
+        clock = self.clock(count)
+
+        def build():
+            if self.rng.random() < UNIFORM_SHARE:
+                city = f"Remote site {self.rng.randrange(10000)}"
+                latitude = self.rng.uniform(-60, 70)
+                longitude = self.rng.uniform(-180, 180)
+            else:
+                city, center_lat, center_lon, _ = self.rng.choices(METROS, cum_weights=metro_weights)[0]
+                latitude = max(-90.0, min(90.0, self.rng.gauss(center_lat, CLUSTER_SIGMA)))
+                longitude = (self.rng.gauss(center_lon, CLUSTER_SIGMA) + 180) % 360 - 180
+            created_at = next(clock)
+            return Warehouse(
+                city=city,
+                latitude=latitude,
+                longitude=longitude,
+                geohash=geo.encode_geohash(latitude, longitude),
+                created_at=created_at,
+                updated_at=created_at,
+                created_by_id=owner(),
+            )
+
+        return self.write(Warehouse, count, build)
+
+    def announcements(self, count, active_share=0.7):
+        author = self.owner_sampler([User.Role.PLATFORM_ADMIN, User.Role.SUPPORT_STAFF])
+        clock = self.clock(count)
+
+        def build():
+            created_at = next(clock)
+            return Announcement(
+                title=" ".join(self.rng.choices(WORDS, k=4)).capitalize(),
+                content=" ".join(self.rng.choices(WORDS, k=40)),
+                created_at=created_at,
+                updated_at=created_at,
+                created_by_id=author(),
+                is_active=self.rng.random() < active_share,
+            )
+
+        return self.write(Announcement, count, build)
+
+
+def seed(users=0, warehouses=0, announcements=0, password="seed123", active_share=0.7,
+         seed=None, batch_size=5000, stdout=None):
+    """
+    Add the requested number of rows to each table, then bring the counters
+    and cache versions up to date.
+    """
+    seeder = Seeder(seed=seed, batch_size=batch_size, stdout=stdout)
+    if users:
+        seeder.users(users, password)
+    if warehouses:
+        seeder.warehouses(warehouses)
+    if announcements:
+        seeder.announcements(announcements, active_share)
+    for scope in (counters.USERS, counters.WAREHOUSES):
+        counters.rebuild(scope)
+    cache.bump(cache.USERS, cache.WAREHOUSES, cache.ANNOUNCEMENTS)
+    clusters.invalidate_all()
@@ -1,9 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from .metrics import TimedListSerializer, TimedSerializerMixin
 from .models import User, Warehouse, Announcement
+from .sparse import SparseSerializerMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseSerializerMixin, TimedSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
     
@@ -15,6 +18,7 @@ class UserSerializer(serializers.ModelSerializer):
             "last_name": {"required": True},
             "email": {"required": True}
         }
+        list_serializer_class = TimedListSerializer
     
     def validate(self, attrs):
         if attrs["password"] != attrs["password2"]:
@@ -35,7 +39,7 @@ class UserSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserUpdateSerializer(serializers.ModelSerializer):
+class UserUpdateSerializer(SparseSerializerMixin, TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ("id", "username", "email", "first_name", "last_name", "role")
@@ -43,29 +47,91 @@ class UserUpdateSerializer(serializers.ModelSerializer):
             "username": {"required": False},
             "email": {"required": False},
         }
+        list_serializer_class = TimedListSerializer
 
 
-class WarehouseSerializer(serializers.ModelSerializer):
+class BulkListSerializer(TimedListSerializer):
+    """
+    List serializer for the bulk endpoints. Rows are validated independently
+    so that valid rows can be written even when others are rejected.
+    """
+    def validate_rows(self):
+        """
+        Return ([(row index, validated attrs)], [per-row error reports]).
+        """
+        valid = []
+        errors = []
+        for index, row in enumerate(self.initial_data):
+            try:
+                valid.append((index, self.child.run_validation(row)))
+            except serializers.ValidationError as exc:
+                errors.append({"row": index, "errors": exc.detail})
+        return valid, errors
+
+
+class UserImportSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """
+    One row of a bulk user import (see api.provisioning). There is no
+    password2, and usernames are not checked for uniqueness here, one query
+    per row, but for each batch at once.
+    """
+    password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
+    
+    class Meta:
+        model = User
+        fields = ("username", "password", "email", "first_name", "last_name", "role")
+        extra_kwargs = {
+            "username": {"validators": [UnicodeUsernameValidator()]},
+            "first_name": {"required": True},
+            "last_name": {"required": True},
+            "email": {"required": True},
+        }
+        list_serializer_class = BulkListSerializer
+
+
+class WarehouseSerializer(SparseSerializerMixin, TimedSerializerMixin, serializers.ModelSerializer):
     created_by_username = serializers.ReadOnlyField(source="created_by.username")
     
     class Meta:
         model = Warehouse
         fields = ("id", "city", "latitude", "longitude", "created_at", "updated_at", "created_by", "created_by_username")
         read_only_fields = ("created_at", "updated_at", "created_by")
+        list_serializer_class = BulkListSerializer
     
     def create(self, validated_data):
         validated_data["created_by"] = self.context["request"].user
         return super().create(validated_data)
 
 
-class AnnouncementSerializer(serializers.ModelSerializer):
+class NearbyWarehouseSerializer(WarehouseSerializer):
+    distance_km = serializers.FloatField(read_only=True)
+    
+    class Meta(WarehouseSerializer.Meta):
+        fields = WarehouseSerializer.Meta.fields + ("distance_km",)
+
+
+class AnnouncementSerializer(SparseSerializerMixin, TimedSerializerMixin, serializers.ModelSerializer):
     created_by_username = serializers.ReadOnlyField(source="created_by.username")
     
     class Meta:
         model = Announcement
         fields = ("id", "title", "content", "created_at", "updated_at", "created_by", "created_by_username", "is_active")
         read_only_fields = ("created_at", "updated_at", "created_by")
+        list_serializer_class = TimedListSerializer
     
     def create(self, validated_data):
         validated_data["created_by"] = self.context["request"].user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class AnnouncementSearchSerializer(AnnouncementSerializer):
+    """
+    An announcement found by api.search: its relevance score (null when
+    the database has no full-text index) and HTML excerpts of the title and
+    content with the matches in <mark>.
+    """
+    score = serializers.FloatField(read_only=True)
+    highlight = serializers.DictField(child=serializers.CharField(), read_only=True)
+    
+    class Meta(AnnouncementSerializer.Meta):
+        fields = AnnouncementSerializer.Meta.fields + ("score", "highlight")
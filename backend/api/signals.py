@@ -0,0 +1,115 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, clusters, counters, events, search
+from .authentication import invalidate_cached_user
+from .models import Announcement, Counter, User, Warehouse
+from .serializers import AnnouncementSerializer
+
+
+@receiver(post_save, sender=User)
+def count_saved_user(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust(counters.USERS, {counters.TOTAL: 1, counters.role_key(instance.role): 1})
+    else:
+        previous = instance.loaded_value("role", instance.role)
+        if previous != instance.role:
+            counters.adjust(counters.USERS, {counters.role_key(previous): -1, counters.role_key(instance.role): 1})
+    instance.remember_loaded_values()
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_user(sender, instance, **kwargs):
+    counters.adjust(counters.USERS, {counters.TOTAL: -1, counters.role_key(instance.loaded_value("role", instance.role)): -1})
+    # The user's warehouses were just orphaned by on_delete=SET_NULL
+    owned = Counter.objects.filter(
+        scope=counters.WAREHOUSES, key=counters.owner_key(instance.pk)
+    ).values_list("value", flat=True).first()
+    if owned:
+        counters.adjust(counters.WAREHOUSES, {counters.owner_key(instance.pk): -owned, counters.owner_key(None): owned})
+
+
+# Connected before count_saved_warehouse, which remembers the saved values
+@receiver(post_save, sender=Warehouse)
+def invalidate_saved_warehouse_clusters(sender, instance, created, **kwargs):
+    position = (instance.latitude, instance.longitude)
+    previous = (instance.loaded_value("latitude", instance.latitude), instance.loaded_value("longitude", instance.longitude))
+    if created:
+        clusters.invalidate_points([position])
+    elif previous != position:
+        clusters.invalidate_points([previous, position])
+
+
+@receiver(post_save, sender=Warehouse)
+def count_saved_warehouse(sender, instance, created, **kwargs):
+    if created:
+        counters.adjust(counters.WAREHOUSES, {counters.TOTAL: 1, counters.owner_key(instance.created_by_id): 1})
+    else:
+        previous = instance.loaded_value("created_by_id", instance.created_by_id)
+        if previous != instance.created_by_id:
+            counters.adjust(counters.WAREHOUSES, {
+                counters.owner_key(previous): -1,
+                counters.owner_key(instance.created_by_id): 1,
+            })
+    instance.remember_loaded_values()
+
+
+@receiver(post_delete, sender=Warehouse)
+def count_deleted_warehouse(sender, instance, **kwargs):
+    owner_id = instance.loaded_value("created_by_id", instance.created_by_id)
+    counters.adjust(counters.WAREHOUSES, {counters.TOTAL: -1, counters.owner_key(owner_id): -1})
+    clusters.invalidate_points([(instance.loaded_value("latitude", instance.latitude), instance.loaded_value("longitude", instance.longitude))])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_users(sender, instance, **kwargs):
+    cache.bump_on_commit(cache.USERS)
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=Warehouse)
+@receiver(post_delete, sender=Warehouse)
+def invalidate_warehouses(sender, **kwargs):
+    cache.bump_on_commit(cache.WAREHOUSES)
+
+
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def invalidate_announcements(sender, **kwargs):
+    cache.bump_on_commit(cache.ANNOUNCEMENTS)
+
+
+@receiver(post_save, sender=Announcement)
+def publish_saved_announcement(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        name = "announcement.created"
+    elif update_fields is not None and frozenset(update_fields) == events.STATUS_FIELDS:
+        name = "announcement.toggled"
+    else:
+        name = "announcement.updated"
+    events.publish_on_commit(name, lambda: AnnouncementSerializer(instance).data)
+
+
+@receiver(post_delete, sender=Announcement)
+def publish_deleted_announcement(sender, instance, **kwargs):
+    # The collector clears instance.pk before the transaction commits
+    pk = instance.pk
+    events.publish_on_commit("announcement.deleted", lambda: {"id": pk})
+
+
+# The migration that creates the announcement search index
+SEARCH_MIGRATION = ("api", "0005_announcement_search")
+
+
+def restore_search_index(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    After migrate, put back the search index triggers that a migration
+    rebuilding api_announcement dropped (see api.search). Connected to
+    post_migrate by ApiConfig.ready().
+    """
+    connection = connections[using]
+    if SEARCH_MIGRATION in MigrationRecorder(connection).applied_migrations():
+        search.ensure_installed(connection)
@@ -0,0 +1,133 @@
+"""
+Sparse fieldsets: ?fields=id,title keeps only those fields of each object in
+a response and ?omit=content leaves fields out, so that a list showing titles
+does not download every announcement's text.
+
+api.views.SparseFieldsMixin validates the selection against the action's
+serializer and puts it in the serializer context as "fields", which
+SparseSerializerMixin, the fast list path (api.fast_lists) and the exports
+follow. On reads the view also narrows its queryset with prune_queryset():
+only() the columns the selected fields read, and select_related() only the
+relations they follow, so leaving out created_by_username drops the join on
+the users table.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = "fields"
+OMIT_PARAM = "omit"
+
+
+_readable_fields = {}
+
+
+def readable_fields(serializer_class):
+    """
+    Return the names of the fields serializer_class outputs, in order.
+    """
+    names = _readable_fields.get(serializer_class)
+    if names is None:
+        fields = serializer_class().fields
+        names = _readable_fields[serializer_class] = tuple(
+            name for name, field in fields.items() if not field.write_only
+        )
+    return names
+
+
+def _names(params, param, names):
+    requested = [name.strip() for name in params[param].split(",") if name.strip()]
+    unknown = [name for name in requested if name not in names]
+    if unknown:
+        raise ValidationError({param: f"Unknown fields: {', '.join(unknown)}. Expected some of: {', '.join(names)}."})
+    return requested
+
+
+def selected_fields(request, serializer_class):
+    """
+    Return the names of the fields of serializer_class the request selects
+    with ?fields= and ?omit=, in the serializer's order, or None for all of
+    them. Raises ValidationError for unknown names.
+    """
+    params = request.query_params
+    if FIELDS_PARAM not in params and OMIT_PARAM not in params:
+        return None
+    names = readable_fields(serializer_class)
+    selected = names
+    if FIELDS_PARAM in params:
+        requested = _names(params, FIELDS_PARAM, names)
+        if requested:
+            selected = tuple(name for name in names if name in requested)
+    if OMIT_PARAM in params:
+        omitted = _names(params, OMIT_PARAM, names)
+        selected = tuple(name for name in selected if name not in omitted)
+    return None if selected == names else selected
+
+
+def _reads(model, field):
+    """
+    Return (lookup, relations) for a serializer field: the model field
+    lookup it reads and the forward relations on the way. The lookup is
+    None for attributes the view sets on instances, such as distance_km.
+    Raises LookupError when the columns it needs cannot be told.
+    """
+    if field.source == "*":
+        raise LookupError(field.field_name)
+    relations = []
+    for index, attr in enumerate(field.source_attrs):
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            # A property or method could read any column
+            if index or hasattr(model, attr):
+                raise LookupError(field.field_name) from None
+            return None, []
+        if index < len(field.source_attrs) - 1:
+            if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete:
+                raise LookupError(field.field_name)
+            relations.append("__".join(field.source_attrs[:index + 1]))
+            model = model_field.related_model
+    return "__".join(field.source_attrs), relations
+
+
+def prune_queryset(queryset, serializer_class, names, required=()):
+    """
+    Narrow queryset to the columns that the named fields of serializer_class
+    read, plus the primary key, the ordering columns (for pagination
+    cursors) and the required lookups, joining only the relations those
+    fields follow. Returns queryset unchanged when a field's columns cannot
+    be told.
+    """
+    model = queryset.model
+    opts = model._meta
+    lookups = {opts.pk.name, *required}
+    for name in queryset.query.order_by:
+        name = str(name).lstrip("-")
+        lookups.add(opts.pk.name if name == "pk" else name)
+    relations = set()
+    fields = serializer_class().fields
+    try:
+        for name in names:
+            lookup, followed = _reads(model, fields[name])
+            if lookup is not None:
+                lookups.add(lookup)
+            relations.update(followed)
+    except LookupError:
+        return queryset
+    queryset = queryset.select_related(None)
+    if relations:
+        queryset = queryset.select_related(*sorted(relations))
+    return queryset.only(*sorted(lookups))
+
+
+class SparseSerializerMixin:
+    """
+    Outputs only the fields named in the "fields" context entry, or all of
+    them when it is missing or None. Input is not affected, so a write with
+    ?fields= still validates and saves every field it was sent.
+    """
+    @property
+    def _readable_fields(self):
+        selected = self.context.get("fields")
+        for field in super()._readable_fields:
+            if selected is None or field.field_name in selected:
+                yield field
@@ -0,0 +1,35 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.models import Announcement, User, Warehouse
+from api.seeding import seed
+
+
+class SeededTestCase(TestCase):
+    """
+    A small seeded dataset, more rows than the largest page size the tests
+    request, and an API client authenticated as a platform admin.
+    """
+    users = 120
+    warehouses = 150
+    announcements = 150
+
+    @classmethod
+    def setUpTestData(cls):
+        seed(users=cls.users, warehouses=cls.warehouses, announcements=cls.announcements, seed=0)
+        cls.admin = User.objects.create(username="test-admin", role=User.Role.PLATFORM_ADMIN)
+        cls.warehouse = Warehouse.objects.order_by("id").first()
+        cls.announcement = Announcement.objects.order_by("id").first()
+        cls.user = User.objects.order_by("id").first()
+
+    def setUp(self):
+        # Cached responses and data versions outlive each test's rollback
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, path, status=200, **extra):
+        response = self.client.get(path, **extra)
+        self.assertEqual(response.status_code, status, getattr(response, "content", b"")[:500])
+        return response
@@ -0,0 +1,70 @@
+import importlib.util
+
+from django.test import override_settings
+from django.urls import include, path, resolve
+
+from api.async_views import AsyncAPIView
+
+from .base import SeededTestCase
+
+
+def async_api_urls():
+    """
+    A copy of api.urls built as warehouse_admin.asgi builds it, with the
+    async views in front.
+    """
+    spec = importlib.util.find_spec("api.urls")
+    module = importlib.util.module_from_spec(spec)
+    with override_settings(ASYNC_READ_VIEWS=True):
+        spec.loader.exec_module(module)
+    return module
+
+
+# The URLconf of AsyncViewParityTests' async requests
+urlpatterns = [path("api/", include(async_api_urls()))]
+
+
+class AsyncViewParityTests(SeededTestCase):
+    paths = [
+        "/api/current-user/",
+        "/api/warehouses/?page_size=5",
+        "/api/warehouses/?page=2&page_size=5&fields=id,city",
+        "/api/warehouses/?bbox=-180,0,180,90&page_size=5",
+        "/api/warehouses/?pagination=cursor&page_size=5",
+        "/api/warehouses/count/?by=owner",
+        "/api/users/count/?by=role",
+        "/api/announcements/?page_size=5",
+        "/api/announcements/recent/?limit=3",
+    ]
+
+    def fetch(self, path, **extra):
+        sync = self.client.get(path, **extra)
+        with override_settings(ROOT_URLCONF=__name__):
+            view = resolve(path.partition("?")[0]).func
+            self.assertTrue(issubclass(view.view_class, AsyncAPIView), path)
+            response = self.client.get(path, **extra)
+        self.assertEqual(response.status_code, sync.status_code, path)
+        self.assertEqual(response.content, sync.content, path)
+        for header in ("Content-Type", "ETag", "Last-Modified"):
+            self.assertEqual(response.get(header), sync.get(header), f"{header} of {path}")
+        return response
+
+    def test_same_responses(self):
+        paths = self.paths + [
+            f"/api/warehouses/{self.warehouse.pk}/",
+            f"/api/announcements/{self.announcement.pk}/",
+            "/api/warehouses/0/",
+        ]
+        for path in paths:
+            with self.subTest(path=path):
+                self.fetch(path)
+
+    def test_same_conditional_responses(self):
+        for path in self.paths[1:5] + [f"/api/warehouses/{self.warehouse.pk}/"]:
+            with self.subTest(path=path):
+                etag = self.fetch(path)["ETag"]
+                self.assertEqual(self.fetch(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_handle_is_abstract(self):
+        with self.assertRaises(TypeError):
+            AsyncAPIView(sync_view=None)
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import checks
+from api.authentication import CachedJWTAuthentication
+from api.models import User
+
+
+@override_settings(AUTH_USER_CACHE=True)
+class CachedJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="cached", role=User.Role.SUPPORT_STAFF)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+        self.authentication = CachedJWTAuthentication()
+        self.token = self.authentication.get_validated_token(str(AccessToken.for_user(self.user)))
+
+    def current_user(self, status=200):
+        response = self.client.get("/api/current-user/")
+        self.assertEqual(response.status_code, status, response.content)
+        return response.json()
+
+    def write(self, **changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.get(pk=self.user.pk)
+            for name, value in changes.items():
+                setattr(user, name, value)
+            user.save()
+
+    def test_cache_hit(self):
+        with self.assertNumQueries(1):
+            self.current_user()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.current_user()["role"], User.Role.SUPPORT_STAFF)
+
+    def test_role_change(self):
+        self.current_user()
+        self.write(role=User.Role.PLATFORM_ADMIN)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.current_user()["role"], User.Role.PLATFORM_ADMIN)
+
+    def test_deactivation(self):
+        self.current_user()
+        self.write(is_active=False)
+        self.current_user(status=401)
+
+    def test_delete(self):
+        self.current_user()
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.get(pk=self.user.pk).delete()
+        self.current_user(status=401)
+
+    def test_write_during_a_miss(self):
+        # The row is read, then a write commits before the reader caches it
+        def read_then_write(authentication, validated_token):
+            user = User.objects.get(pk=self.user.pk)
+            self.write(is_active=False)
+            return user
+
+        with mock.patch.object(JWTAuthentication, "get_user", autospec=True, side_effect=read_then_write):
+            self.assertTrue(self.authentication.get_user(self.token).is_active)
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+
+    def test_async(self):
+        aget_user = async_to_sync(self.authentication.aget_user)
+        self.assertEqual(aget_user(self.token).role, User.Role.SUPPORT_STAFF)
+        self.write(is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            aget_user(self.token)
+
+    @override_settings(AUTH_USER_CACHE=False)
+    def test_off(self):
+        self.current_user()
+        with self.assertNumQueries(1):
+            self.current_user()
+
+
+class AuthUserCacheCheckTests(TestCase):
+    locmem = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    shared = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache"}}
+
+    def test_per_process_cache(self):
+        with override_settings(AUTH_USER_CACHE=True, CACHES=self.locmem):
+            self.assertEqual([error.id for error in checks.check_auth_user_cache(None)], ["api.E001"])
+        with override_settings(AUTH_USER_CACHE=False, CACHES=self.locmem):
+            self.assertEqual(checks.check_auth_user_cache(None), [])
+
+    def test_shared_cache(self):
+        with override_settings(AUTH_USER_CACHE=True, CACHES=self.shared):
+            self.assertEqual(checks.check_auth_user_cache(None), [])
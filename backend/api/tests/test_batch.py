@@ -0,0 +1,108 @@
+from contextlib import nullcontext
+from unittest import mock
+
+from django.test import override_settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.models import User, Warehouse
+from api.views import WarehouseViewSet
+
+from .base import SeededTestCase
+
+
+class BatchTests(SeededTestCase):
+    users = 5
+    warehouses = 5
+    announcements = 5
+
+    def batch(self, requests, status=200, client=None, **options):
+        response = (client or self.client).post("/api/batch/", {"requests": requests, **options}, format="json")
+        self.assertEqual(response.status_code, status, response.content[:500])
+        return response.json()
+
+    def statuses(self, requests, **options):
+        return [item["status"] for item in self.batch(requests, **options)["responses"]]
+
+    def test_mixed_results(self):
+        requests = [
+            {"path": "/api/warehouses/?page_size=2"},
+            {"path": "/api/missing/"},
+            {"method": "POST", "path": "/api/warehouses/", "body": {"city": "No coordinates"}},
+            {"method": "TRACE", "path": "/api/warehouses/"},
+            {"path": "/api/warehouses/export/"},
+            {"path": "/api/batch/"},
+            "not an object",
+            {"path": f"/api/announcements/{self.announcement.pk}/"},
+        ]
+        for concurrent in (False, True):
+            with self.subTest(concurrent=concurrent):
+                responses = self.batch(requests, concurrent=concurrent)["responses"]
+                self.assertEqual([item["status"] for item in responses], [200, 404, 400, 405, 400, 400, 400, 200])
+                self.assertEqual(len(responses[0]["body"]["results"]), 2)
+                self.assertIn("latitude", responses[2]["body"])
+                self.assertEqual(responses[-1]["body"]["id"], self.announcement.pk)
+
+    def test_same_data_as_separate_requests(self):
+        paths = ["/api/current-user/", "/api/dashboard/", "/api/warehouses/count/", "/api/announcements/recent/"]
+        responses = self.batch([{"path": path} for path in paths])["responses"]
+        for path, item in zip(paths, responses):
+            with self.subTest(path=path):
+                self.assertEqual(item["body"], self.get(path).json())
+
+    @override_settings(BATCH_MAX_REQUESTS=2)
+    def test_size_limit(self):
+        self.batch([{"path": "/api/current-user/"}] * 3, status=400)
+        self.batch([], status=400)
+        self.assertEqual(self.statuses([{"path": "/api/current-user/"}] * 2), [200, 200])
+
+    def test_unauthenticated(self):
+        self.batch([{"path": "/api/current-user/"}], status=401, client=APIClient())
+
+    def test_sub_requests_run_as_the_batch_user(self):
+        support = User.objects.create(username="batch-support", role=User.Role.SUPPORT_STAFF)
+        client = APIClient()
+        client.force_authenticate(support)
+        # A token in a sub-request's headers is ignored
+        admin_token = {"Authorization": f"Bearer {AccessToken.for_user(self.admin)}"}
+        responses = self.batch(
+            [
+                {"path": "/api/current-user/"},
+                {"path": "/api/users/", "headers": admin_token},
+                {"path": "/api/warehouses/?page_size=1"},
+                {"method": "DELETE", "path": f"/api/warehouses/{self.warehouse.pk}/"},
+            ],
+            client=client,
+        )["responses"]
+        self.assertEqual([item["status"] for item in responses], [200, 403, 200, 403])
+        self.assertEqual(responses[0]["body"]["username"], "batch-support")
+        self.assertTrue(Warehouse.objects.filter(pk=self.warehouse.pk).exists())
+
+    def test_writes_are_seen_by_later_sub_requests(self):
+        responses = self.batch([
+            {"method": "POST", "path": "/api/warehouses/", "body": {"city": "Batched", "latitude": 1, "longitude": 2}},
+            {"path": "/api/warehouses/?page_size=1"},
+        ], concurrent=True)["responses"]
+        self.assertEqual(responses[0]["status"], 201)
+        self.assertEqual(responses[1]["body"]["results"][0]["city"], "Batched")
+
+    def test_failed_writes_roll_back(self):
+        perform_create = WarehouseViewSet.perform_create
+        before = Warehouse.objects.count()
+
+        def save_then_fail(error):
+            def fail(view, serializer):
+                perform_create(view, serializer)
+                raise error
+            return fail
+
+        create = {"method": "POST", "path": "/api/warehouses/", "body": {"city": "Half", "latitude": 1, "longitude": 2}}
+        for error, status in ((ValidationError("Rejected after saving"), 400), (RuntimeError("Crashed"), 500)):
+            with self.subTest(status=status), mock.patch.object(WarehouseViewSet, "perform_create", save_then_fail(error)):
+                # The crash is logged with its traceback
+                with self.assertLogs("api.batch", "ERROR") if status == 500 else nullcontext():
+                    responses = self.batch([create, {"path": "/api/warehouses/count/"}])["responses"]
+                self.assertEqual([item["status"] for item in responses], [status, 200])
+                self.assertEqual(responses[1]["body"]["count"], before)
+                self.assertEqual(Warehouse.objects.count(), before)
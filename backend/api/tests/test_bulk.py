@@ -0,0 +1,64 @@
+from api.models import Warehouse
+
+from .base import SeededTestCase
+
+# One past the largest id a 64-bit id column holds
+TOO_LARGE = 2 ** 63
+
+
+class BulkIdTests(SeededTestCase):
+    warehouses = 5
+    announcements = 0
+
+    def assertInvalidIds(self, report, rows):
+        errors = {error["row"]: error["errors"] for error in report["errors"]}
+        for row in rows:
+            self.assertEqual(errors.get(row), {"id": ["A valid integer id is required."]})
+
+    def test_delete_rejects_ids_out_of_range(self):
+        response = self.client.delete(
+            "/api/warehouses/bulk/", {"ids": [TOO_LARGE, -TOO_LARGE - 1, "1", self.warehouse.pk]}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["deleted"], 1)
+        self.assertInvalidIds(response.json(), [0, 1, 2])
+        self.assertFalse(Warehouse.objects.filter(pk=self.warehouse.pk).exists())
+
+    def test_update_rejects_ids_out_of_range(self):
+        rows = [{"id": TOO_LARGE, "city": "Nowhere"}, {"id": str(TOO_LARGE)}, {"id": self.warehouse.pk, "city": "Somewhere"}]
+        response = self.client.patch("/api/warehouses/bulk/", rows, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], 1)
+        self.assertInvalidIds(response.json(), [0, 1])
+
+    def test_update_rejects_ids_that_are_not_integers(self):
+        pk = self.warehouse.pk
+        rows = [
+            {"id": pk + 0.5, "city": "Float"},
+            {"id": True, "city": "Bool"},
+            {"id": f"  {pk} ", "city": "Padded"},
+            {"id": f"{pk}.0", "city": "Decimal"},
+            {"id": None, "city": "Null"},
+            {"city": "Missing"},
+            {"id": pk, "city": "Somewhere"},
+        ]
+        response = self.client.patch("/api/warehouses/bulk/", rows, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], 1)
+        self.assertInvalidIds(response.json(), range(6))
+        self.assertEqual(Warehouse.objects.get(pk=pk).city, "Somewhere")
+
+    def test_update_takes_ids_from_csv(self):
+        body = f"id,city\n{self.warehouse.pk},From CSV\n {self.warehouse.pk},Padded\n"
+        response = self.client.patch("/api/warehouses/bulk/", body, content_type="text/csv")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["updated"], 1)
+        self.assertInvalidIds(response.json(), [1])
+        self.assertEqual(Warehouse.objects.get(pk=self.warehouse.pk).city, "From CSV")
+
+    def test_distances_reject_ids_out_of_range(self):
+        response = self.client.post(
+            "/api/warehouses/distances/", {"points": [[0, 0]], "warehouse_ids": [TOO_LARGE]}, format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("warehouse_ids", response.json())
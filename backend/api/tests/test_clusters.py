@@ -0,0 +1,92 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api import clusters
+from api.models import User, Warehouse
+
+
+class ClusterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="cluster-admin", role=User.Role.PLATFORM_ADMIN)
+
+        def create(latitude, longitude):
+            return Warehouse.objects.create(city="Cluster", latitude=latitude, longitude=longitude)
+
+        # At zoom 0 the map is one tile of 4 x 4 cells, 90 degrees of
+        # longitude wide; rows are split at 0 and +/-66.51 degrees latitude
+        cls.a = create(10, 10)
+        cls.b = create(30, 20)
+        cls.c = create(-10, -100)
+        # Either side of the antimeridian
+        cls.east = create(50, 179.5)
+        cls.west = create(50, -179.5)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, zoom, bbox=None, status=200):
+        params = {"zoom": zoom}
+        if bbox is not None:
+            params["bbox"] = ",".join(map(str, bbox))
+        response = self.client.get("/api/warehouses/clusters/", params)
+        self.assertEqual(response.status_code, status, response.content[:500])
+        return response.json()
+
+    def cluster(self, *warehouses):
+        newest_first = sorted(warehouses, key=lambda warehouse: -warehouse.pk)
+        return {
+            "latitude": round(sum(warehouse.latitude for warehouse in warehouses) / len(warehouses), 6),
+            "longitude": round(sum(warehouse.longitude for warehouse in warehouses) / len(warehouses), 6),
+            "count": len(warehouses),
+            "sample_ids": [warehouse.pk for warehouse in newest_first[:clusters.SAMPLE_SIZE]],
+        }
+
+    def test_whole_map(self):
+        data = self.get(0)
+        # Cell by cell, row-major from the north-west
+        self.assertEqual(data, {"zoom": 0, "clusters": [
+            self.cluster(self.west),
+            self.cluster(self.a, self.b),
+            self.cluster(self.east),
+            self.cluster(self.c),
+        ]})
+        self.assertEqual((data["clusters"][1]["latitude"], data["clusters"][1]["longitude"]), (20, 15))
+
+    def test_sample_ids(self):
+        extra = [Warehouse.objects.create(city="Cluster", latitude=20, longitude=15) for _ in range(3)]
+        clusters_found = self.get(0)["clusters"]
+        self.assertEqual(clusters_found[1], self.cluster(self.a, self.b, *extra))
+        self.assertEqual(clusters_found[1]["sample_ids"], [warehouse.pk for warehouse in reversed(extra)])
+
+    def test_empty_bbox(self):
+        # Southern Pacific
+        self.assertEqual(self.get(3, (-140, -60, -130, -50))["clusters"], [])
+        # A point
+        self.assertEqual(self.get(3, (-135, -55, -135, -55))["clusters"], [])
+
+    def test_antimeridian(self):
+        crossing = self.get(3, (170, 40, -170, 60))["clusters"]
+        self.assertEqual(sorted(cluster["sample_ids"][0] for cluster in crossing), [self.east.pk, self.west.pk])
+        # The same as the two halves either side of it
+        halves = self.get(3, (170, 40, 180, 60))["clusters"] + self.get(3, (-180, 40, -170, 60))["clusters"]
+        self.assertCountEqual(crossing, halves)
+        self.assertEqual(clusters.tiles_for_bbox(3, 170, 40, -170, 60), [(0, 2), (0, 3), (7, 2), (7, 3)])
+
+    def test_tiles_are_invalidated_by_writes(self):
+        self.get(0)
+        with self.captureOnCommitCallbacks(execute=True):
+            Warehouse.objects.get(pk=self.c.pk).delete()
+            moved = Warehouse.objects.get(pk=self.a.pk)
+            moved.latitude, moved.longitude = -10, -100
+            moved.save()
+        self.assertEqual(self.get(0)["clusters"], [
+            self.cluster(self.west), self.cluster(self.b), self.cluster(self.east), self.cluster(moved),
+        ])
+
+    def test_too_many_tiles(self):
+        self.assertIn("bbox", self.get(10, (-10, -10, 10, 10), status=400))
+        self.get(clusters.MAX_ZOOM + 1, status=400)
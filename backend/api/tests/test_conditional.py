@@ -0,0 +1,38 @@
+"""
+List ETags: a 304 while nothing changed, a new ETag after any write to the
+list's data scope, with offset and keyset pagination alike.
+"""
+from api.models import Warehouse
+
+from .base import SeededTestCase
+
+PATHS = ("/api/warehouses/?page_size=10", "/api/warehouses/?page_size=10&pagination=cursor")
+
+
+class ListETagTests(SeededTestCase):
+    def etag(self, path):
+        return self.get(path)["ETag"]
+
+    def assertChangesETag(self, write):
+        etags = {path: self.etag(path) for path in PATHS}
+        for path, etag in etags.items():
+            self.get(path, status=304, HTTP_IF_NONE_MATCH=etag)
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+        for path, etag in etags.items():
+            with self.subTest(path=path):
+                self.assertNotEqual(self.etag(path), etag)
+
+    def test_create(self):
+        self.assertChangesETag(lambda: Warehouse.objects.create(city="New", latitude=1, longitude=2))
+
+    def test_update(self):
+        def update():
+            self.warehouse.city = "Renamed"
+            self.warehouse.save()
+
+        self.assertChangesETag(update)
+
+    def test_delete(self):
+        # The oldest row: neither MAX(updated_at) nor the first page changes
+        self.assertChangesETag(lambda: Warehouse.objects.order_by("created_at").first().delete())
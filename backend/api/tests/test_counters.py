@@ -0,0 +1,128 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from api import counters
+from api.models import Counter, User, Warehouse
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username="owner", role=User.Role.WAREHOUSE_ADMIN)
+        cls.other = User.objects.create(username="other", role=User.Role.SUPPORT_STAFF)
+        cls.warehouse = Warehouse.objects.create(city="Leeds", latitude=53.8, longitude=-1.5, created_by=cls.owner)
+
+    def stored(self, scope):
+        rows = Counter.objects.filter(scope=scope).values_list("key", "value")
+        return {key: value for key, value in rows if value or key == counters.TOTAL}
+
+    def assertInSync(self, scope):
+        counters.get(scope)
+        self.assertEqual(self.stored(scope), counters.compute(scope))
+
+    def test_first_read_builds_the_scope(self):
+        Counter.objects.all().delete()
+        self.assertEqual(counters.get(counters.USERS), 2)
+        self.assertEqual(counters.get(counters.USERS, counters.role_key(User.Role.PLATFORM_ADMIN)), 0)
+        self.assertEqual(counters.breakdown(counters.WAREHOUSES, counters.OWNER_PREFIX), {str(self.owner.pk): 1})
+
+    def test_create(self):
+        counters.get(counters.USERS)
+        counters.get(counters.WAREHOUSES)
+        user = User.objects.create(username="new", role=User.Role.PLATFORM_ADMIN)
+        Warehouse.objects.create(city="York", latitude=54.0, longitude=-1.1, created_by=user)
+        Warehouse.objects.create(city="Hull", latitude=53.7, longitude=-0.3)
+        self.assertEqual(counters.get(counters.USERS), 3)
+        self.assertEqual(counters.get(counters.USERS, counters.role_key(User.Role.PLATFORM_ADMIN)), 1)
+        self.assertEqual(counters.get(counters.WAREHOUSES), 3)
+        self.assertEqual(counters.get(counters.WAREHOUSES, counters.owner_key(user.pk)), 1)
+        self.assertEqual(counters.get(counters.WAREHOUSES, counters.owner_key(None)), 1)
+        self.assertInSync(counters.USERS)
+        self.assertInSync(counters.WAREHOUSES)
+
+    def test_delete(self):
+        counters.get(counters.WAREHOUSES)
+        Warehouse.objects.get(pk=self.warehouse.pk).delete()
+        self.assertEqual(counters.get(counters.WAREHOUSES), 0)
+        self.assertEqual(counters.breakdown(counters.WAREHOUSES, counters.OWNER_PREFIX), {})
+        User.objects.get(pk=self.other.pk).delete()
+        self.assertEqual(counters.get(counters.USERS), 1)
+        self.assertEqual(counters.breakdown(counters.USERS, counters.ROLE_PREFIX), {User.Role.WAREHOUSE_ADMIN: 1})
+        self.assertInSync(counters.USERS)
+        self.assertInSync(counters.WAREHOUSES)
+
+    def test_deleting_an_owner_orphans_their_warehouses(self):
+        counters.get(counters.WAREHOUSES)
+        User.objects.get(pk=self.owner.pk).delete()
+        self.assertEqual(counters.get(counters.WAREHOUSES), 1)
+        self.assertEqual(counters.breakdown(counters.WAREHOUSES, counters.OWNER_PREFIX), {"none": 1})
+        self.assertInSync(counters.WAREHOUSES)
+
+    def test_role_change(self):
+        counters.get(counters.USERS)
+        user = User.objects.get(pk=self.other.pk)
+        user.role = User.Role.PLATFORM_ADMIN
+        user.save()
+        # Saving again without a change moves nothing
+        user.save()
+        self.assertEqual(counters.get(counters.USERS), 2)
+        self.assertEqual(
+            counters.breakdown(counters.USERS, counters.ROLE_PREFIX),
+            {User.Role.WAREHOUSE_ADMIN: 1, User.Role.PLATFORM_ADMIN: 1},
+        )
+        self.assertInSync(counters.USERS)
+
+    def test_owner_change(self):
+        counters.get(counters.WAREHOUSES)
+        warehouse = Warehouse.objects.get(pk=self.warehouse.pk)
+        warehouse.created_by = self.other
+        warehouse.save()
+        warehouse.created_by = None
+        warehouse.save()
+        self.assertEqual(counters.get(counters.WAREHOUSES), 1)
+        self.assertEqual(counters.breakdown(counters.WAREHOUSES, counters.OWNER_PREFIX), {"none": 1})
+        self.assertInSync(counters.WAREHOUSES)
+
+    def test_rebuild_reports_drift(self):
+        counters.get(counters.USERS)
+        # QuerySet.update() sends no signals
+        User.objects.filter(pk=self.other.pk).update(role=User.Role.PLATFORM_ADMIN)
+        drift = counters.rebuild(counters.USERS, dry_run=True)
+        self.assertEqual(drift, {
+            counters.role_key(User.Role.SUPPORT_STAFF): (1, 0),
+            counters.role_key(User.Role.PLATFORM_ADMIN): (0, 1),
+        })
+        self.assertEqual(counters.rebuild(counters.USERS), drift)
+        self.assertEqual(counters.rebuild(counters.USERS), {})
+        self.assertInSync(counters.USERS)
+
+
+class RebuildCountersCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create(username="counted", role=User.Role.SUPPORT_STAFF)
+
+    def call(self, *args):
+        stdout = StringIO()
+        call_command("rebuild_counters", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_check(self):
+        counters.get(counters.USERS)
+        self.assertIn("users: in sync", self.call("--check", "--scope", counters.USERS))
+        Counter.objects.filter(scope=counters.USERS, key=counters.TOTAL).update(value=5)
+        with self.assertRaises(CommandError):
+            self.call("--check")
+        # --check wrote nothing
+        self.assertEqual(counters.get(counters.USERS), 5)
+
+    def test_rebuild(self):
+        counters.get(counters.USERS)
+        Counter.objects.filter(scope=counters.USERS, key=counters.TOTAL).update(value=5)
+        output = self.call()
+        self.assertIn("users[total]: stored=5 actual=1", output)
+        self.assertIn("users: rebuilt", output)
+        self.assertEqual(counters.get(counters.USERS), 1)
+        self.assertIn("users: in sync", self.call("--check"))
@@ -0,0 +1,87 @@
+from django.db import transaction
+
+from api import cache
+from api.models import Announcement, User, Warehouse
+
+from .base import SeededTestCase
+
+SCOPES = (cache.USERS, cache.WAREHOUSES, cache.ANNOUNCEMENTS)
+
+
+class DashboardCacheTests(SeededTestCase):
+    users = 10
+    warehouses = 10
+    announcements = 10
+
+    def dashboard(self):
+        return self.get("/api/dashboard/").json()
+
+    def assertBumps(self, scope, write):
+        """
+        Run write() and check that it bumps scope's version once it commits,
+        and no other scope's.
+        """
+        before = dict(zip(SCOPES, cache.versions(*SCOPES)))
+        with self.captureOnCommitCallbacks(execute=True):
+            write()
+            self.assertEqual(cache.version(scope), before[scope], "bumped before the commit")
+        after = dict(zip(SCOPES, cache.versions(*SCOPES)))
+        self.assertEqual({name for name in SCOPES if after[name] != before[name]}, {scope})
+
+    def test_warehouse_writes(self):
+        count = self.dashboard()["warehouses_count"]
+        warehouse = Warehouse(city="Dashboard", latitude=1, longitude=2)
+        self.assertBumps(cache.WAREHOUSES, warehouse.save)
+        self.assertEqual(self.dashboard()["warehouses_count"], count + 1)
+
+        warehouse.city = "Renamed"
+        self.assertBumps(cache.WAREHOUSES, warehouse.save)
+        self.assertBumps(cache.WAREHOUSES, warehouse.delete)
+        self.assertEqual(self.dashboard()["warehouses_count"], count)
+
+    def test_announcement_writes(self):
+        self.dashboard()
+        announcement = Announcement(title="Fresh", content="", is_active=True)
+        self.assertBumps(cache.ANNOUNCEMENTS, announcement.save)
+        self.assertEqual(self.dashboard()["recent_announcements"][0]["title"], "Fresh")
+
+        announcement.title = "Edited"
+        self.assertBumps(cache.ANNOUNCEMENTS, announcement.save)
+        self.assertEqual(self.dashboard()["recent_announcements"][0]["title"], "Edited")
+
+        self.assertBumps(cache.ANNOUNCEMENTS, announcement.delete)
+        self.assertNotIn("Edited", [item["title"] for item in self.dashboard()["recent_announcements"]])
+
+    def test_user_writes(self):
+        before = self.dashboard()
+        support = User.Role.SUPPORT_STAFF
+        user = User(username="dashboard-user", role=User.Role.WAREHOUSE_ADMIN)
+        self.assertBumps(cache.USERS, user.save)
+        self.assertEqual(self.dashboard()["users_count"], before["users_count"] + 1)
+
+        user.role = support
+        self.assertBumps(cache.USERS, user.save)
+        self.assertEqual(self.dashboard()["users_by_role"].get(support, 0), before["users_by_role"].get(support, 0) + 1)
+
+        self.assertBumps(cache.USERS, user.delete)
+        self.assertEqual(self.dashboard(), before)
+
+    def test_bulk_writes(self):
+        count = self.dashboard()["warehouses_count"]
+        self.assertBumps(cache.WAREHOUSES, lambda: self.client.delete(
+            "/api/warehouses/bulk/", {"ids": [self.warehouse.pk]}, format="json",
+        ))
+        self.assertEqual(self.dashboard()["warehouses_count"], count - 1)
+
+    def test_rolled_back_writes(self):
+        before = cache.versions(*SCOPES)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Warehouse.objects.create(city="Rolled back", latitude=1, longitude=2)
+                transaction.set_rollback(True)
+        self.assertEqual(cache.versions(*SCOPES), before)
+
+    def test_cached_between_writes(self):
+        self.dashboard()
+        with self.assertNumQueries(0):
+            self.dashboard()
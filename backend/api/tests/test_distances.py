@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+from django.test import TestCase
+
+from api import distances, geo
+from api.models import Warehouse
+
+# Agreement with geo.haversine_km, in km
+TOLERANCE_KM = 1e-9
+
+
+def reference(points, others):
+    return np.array([[geo.haversine_km(*point, *other) for other in others.tolist()] for point in points.tolist()])
+
+
+def matrix(points, others):
+    rows = [distances.to_km(haversines) for _, haversines in distances._blocks(points, distances.unit_vectors(others))]
+    return np.vstack(rows)
+
+
+def random_points(rng, count):
+    return np.column_stack([rng.uniform(-89, 89, count), rng.uniform(-180, 180, count)])
+
+
+class HaversineTests(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.points = random_points(self.rng, 100)
+
+    def assertMatchesReference(self, others):
+        expected = reference(self.points, others)
+        # asin(√a) is ill-conditioned near a = 1, in the reference as well:
+        # nearly antipodal pairs are left out
+        checked = expected < 19_000
+        error = np.abs(matrix(self.points, others) - expected)[checked]
+        self.assertLess(error.max(), TOLERANCE_KM)
+
+    def test_random_pairs(self):
+        self.assertMatchesReference(random_points(self.rng, 100))
+
+    def test_nearby_pairs(self):
+        # From about a kilometre down to a few millimetres apart
+        for spread in (1e-2, 1e-5, 1e-8):
+            with self.subTest(spread=spread):
+                self.assertMatchesReference(self.points + self.rng.normal(0, spread, self.points.shape))
+
+    def test_same_point(self):
+        self.assertEqual(matrix(self.points, self.points).diagonal().max(), 0.0)
+
+    def test_blocks(self):
+        # The same distances whatever the block size
+        others = random_points(self.rng, 30)
+        expected = matrix(self.points, others)
+        original = distances.CHUNK_CELLS
+        distances.CHUNK_CELLS = 70
+        try:
+            self.assertTrue(np.array_equal(matrix(self.points, others), expected))
+        finally:
+            distances.CHUNK_CELLS = original
+
+
+class NearestTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # A metre apart, then further and further away
+        Warehouse.objects.bulk_create(
+            Warehouse(city=f"Offset {offset}", latitude=48.85 + offset, longitude=2.35)
+            for offset in (1e-5, 0.0, 2e-5, 1.0, 1e-3)
+        )
+
+    def setUp(self):
+        distances._warehouses = None
+
+    def test_nearest_first(self):
+        points = np.array([[48.85, 2.35]])
+        ids, km = distances.nearest(points, 4)
+        cities = Warehouse.objects.in_bulk(ids[0].tolist())
+        self.assertEqual(
+            [cities[pk].city for pk in ids[0].tolist()], ["Offset 0.0", "Offset 1e-05", "Offset 2e-05", "Offset 0.001"],
+        )
+        expected = [geo.haversine_km(48.85, 2.35, cities[pk].latitude, cities[pk].longitude) for pk in ids[0].tolist()]
+        np.testing.assert_allclose(km[0], expected, rtol=0, atol=TOLERANCE_KM)
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import events
+from api.models import Announcement, User
+
+
+def names(payload):
+    """
+    The event names in an encoded payload, in order.
+    """
+    return [line.removeprefix(b"event: ").decode() for line in payload.splitlines() if line.startswith(b"event: ")]
+
+
+def ids(payload):
+    return [line.removeprefix(b"id: ").decode() for line in payload.splitlines() if line.startswith(b"id: ")]
+
+
+@override_settings(EVENTS_HEARTBEAT=0.05)
+class BrokerTests(SimpleTestCase):
+    def setUp(self):
+        self.broker = events.Broker(history=3, queue_size=4)
+
+    def publish(self, count):
+        for index in range(count):
+            self.broker.publish("announcement.created", {"id": index})
+        return self.broker.event_id(self.broker.sequence)
+
+    def resume(self, last_event_id):
+        subscription = self.broker.subscribe(last_event_id)
+        self.addCleanup(self.broker.unsubscribe, subscription)
+        return subscription.drain()
+
+    def test_subscribe(self):
+        self.publish(2)
+        payload = self.resume(None)
+        self.assertTrue(payload.startswith(b"retry: "))
+        self.assertEqual(names(payload), ["ready"])
+        self.assertEqual(ids(payload), [self.broker.event_id(2)])
+
+    def test_resume(self):
+        last = self.publish(1)
+        self.publish(2)
+        payload = self.resume(last)
+        self.assertEqual(names(payload), ["ready", "announcement.created", "announcement.created"])
+        self.assertEqual(ids(payload)[1:], [self.broker.event_id(2), self.broker.event_id(3)])
+        self.assertIn(b'data: {"id":1}', payload)
+
+    def test_resume_when_current(self):
+        self.assertEqual(names(self.resume(self.publish(2))), ["ready"])
+
+    def test_reset(self):
+        first = self.publish(1)
+        self.publish(4)
+        for last_event_id in (
+            # Four events ago, beyond the history of 3
+            first,
+            # Another process's epoch
+            f"{'0' * 8}-4",
+            # Not issued yet, or not an id
+            self.broker.event_id(9),
+            "garbage",
+        ):
+            with self.subTest(last_event_id=last_event_id):
+                self.assertEqual(names(self.resume(last_event_id)), ["ready", "reset"])
+
+    def test_live_events(self):
+        subscription = self.broker.subscribe()
+        self.addCleanup(self.broker.unsubscribe, subscription)
+        subscription.drain()
+        self.publish(2)
+        self.assertTrue(subscription.ready.is_set())
+        self.assertEqual(names(subscription.drain()), ["announcement.created"] * 2)
+        self.assertFalse(subscription.ready.is_set())
+
+    def test_overflow_ends_the_stream(self):
+        stream = self.broker.stream()
+        self.assertEqual(names(next(stream)), ["ready"])
+        self.publish(10)
+        # What fitted in the queue, then the end; the client resumes after it
+        payload = next(stream)
+        self.assertEqual(len(names(payload)), 4)
+        with self.assertRaises(StopIteration):
+            next(stream)
+        self.assertEqual(self.broker.count(), 0)
+
+    def test_heartbeat_and_deadline(self):
+        stream = self.broker.stream()
+        next(stream)
+        self.assertEqual(next(stream), events.HEARTBEAT)
+        stream.close()
+        self.assertEqual(self.broker.count(), 0)
+        self.assertEqual(list(self.broker.stream(until=0)), [])
+
+    def test_async_stream(self):
+        async def receive():
+            stream = self.broker.astream()
+            self.assertEqual(names(await anext(stream)), ["ready"])
+            # Published from another thread, delivered through the loop
+            publisher = threading.Thread(target=self.publish, args=(1,))
+            publisher.start()
+            payload = await anext(stream)
+            publisher.join()
+            await stream.aclose()
+            return payload
+
+        self.assertEqual(names(asyncio.run(receive())), ["announcement.created"])
+        self.assertEqual(self.broker.count(), 0)
+
+
+class PublishOnCommitTests(TestCase):
+    def setUp(self):
+        self.broker = events.Broker(history=10, queue_size=10)
+        patcher = mock.patch.object(events, "broker", self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def published(self):
+        return [names(event.payload)[0] for event in self.broker.history]
+
+    def test_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            announcement = Announcement.objects.create(title="Dock closed", content="")
+            self.assertEqual(self.published(), [])
+        self.assertEqual(self.published(), ["announcement.created"])
+        with self.captureOnCommitCallbacks(execute=True):
+            announcement.is_active = False
+            announcement.save(update_fields=events.STATUS_FIELDS)
+            announcement.title = "Dock open"
+            announcement.save()
+            announcement.delete()
+        self.assertEqual(
+            self.published(),
+            ["announcement.created", "announcement.toggled", "announcement.updated", "announcement.deleted"],
+        )
+
+    def test_not_after_rollback(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Announcement.objects.create(title="Rolled back", content="")
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(self.published(), [])
+
+
+class StreamEndpointTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="listener", role=User.Role.SUPPORT_STAFF)
+
+    def test_stream(self):
+        broker = events.Broker(history=10, queue_size=10)
+        client = APIClient()
+        token = AccessToken.for_user(self.user)
+        # The stream closes every connection, the test's transaction included
+        with mock.patch.object(events, "broker", broker), mock.patch.object(events.connections, "close_all"):
+            response = client.get("/api/announcements/stream/", {"token": str(token)}, HTTP_ACCEPT="text/event-stream")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response["Content-Type"], "text/event-stream")
+            content = iter(response.streaming_content)
+            self.assertEqual(names(next(content)), ["ready"])
+            self.assertEqual(broker.count(), 1)
+            response.close()
+        self.assertEqual(broker.count(), 0)
+
+    def test_unauthenticated(self):
+        response = APIClient().get("/api/announcements/stream/", HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["Content-Type"], "application/json")
+
+
+class EventStreamRoutingTests(SimpleTestCase):
+    def test_is_event_stream(self):
+        handler = events.EventStreamASGIHandler()
+        for scope, expected in (
+            ({"path": "/api/announcements/stream/"}, True),
+            ({"path": "/prefix/api/announcements/stream/", "root_path": "/prefix"}, True),
+            ({"path": "/api/announcements/"}, False),
+            ({"path": "/api/announcements/stream"}, False),
+            ({"path": "/api/warehouses/stream/"}, False),
+            ({"path": "/unknown/stream/"}, False),
+        ):
+            with self.subTest(**scope):
+                self.assertIs(handler.is_event_stream(scope), expected)
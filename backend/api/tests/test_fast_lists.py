@@ -0,0 +1,92 @@
+"""
+FAST_LIST_RESPONSES parity: list pages built by api.fast_lists must be the
+serializers' output byte for byte.
+"""
+import unittest
+
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from api import fast_lists
+from api.models import Announcement, Warehouse
+from api.serializers import WarehouseSerializer
+
+from .base import SeededTestCase
+
+ENDPOINTS = ("/api/warehouses/", "/api/announcements/")
+PAGE_SIZES = (10, 100, 1000)
+# Pages walked per endpoint, page size and pagination style
+PAGES = 3
+
+
+class FastListParityTests(SeededTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Edge cases: no creator, characters JSON escapes, floats orjson
+        # writes differently from json
+        user = cls.admin
+        Warehouse.objects.create(city='Null "owner"\n  ', latitude=0.00001, longitude=-0.0)
+        Warehouse.objects.create(
+            city="Zoë \U0001f4e6 \x00\x1f\\  ", latitude=1e-4, longitude=179.99999999999997, created_by=user,
+        )
+        Announcement.objects.create(title="Orphaned", content="No creator  ", is_active=False)
+        Announcement.objects.create(title="\U0001f6a8 <b>&amp;</b>", content="\t\"quoted\" ", created_by=user)
+
+    def fetch(self, url, params, fast):
+        with override_settings(FAST_LIST_RESPONSES=fast):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        return response.content
+
+    def assertSamePages(self, path, params):
+        url = path
+        for _ in range(PAGES):
+            expected = self.fetch(url, params, fast=False)
+            self.assertEqual(self.fetch(url, params, fast=True), expected, f"{url} {params}")
+            url = self.client.get(url, params).json()["next"]
+            params = None
+            if url is None:
+                break
+
+    def test_pages(self):
+        for path in ENDPOINTS:
+            for page_size in PAGE_SIZES:
+                for pagination in ({}, {"pagination": "cursor"}):
+                    params = {"page_size": page_size, **pagination}
+                    with self.subTest(path=path, **params):
+                        self.assertSamePages(path, params)
+
+    def test_fields(self):
+        selections = (
+            ("/api/warehouses/", {"fields": "id,latitude,longitude"}),
+            ("/api/warehouses/", {"omit": "created_by,created_by_username"}),
+            ("/api/announcements/", {"fields": "title,created_by_username"}),
+            ("/api/announcements/", {"omit": "content"}),
+        )
+        for path, selection in selections:
+            with self.subTest(path=path, **selection):
+                self.assertSamePages(path, {"page_size": 100, **selection})
+
+    def test_bbox(self):
+        self.assertSamePages("/api/warehouses/", {"page_size": 100, "bbox": "-80,20,10,60"})
+
+
+@unittest.skipIf(fast_lists.orjson is None, "orjson is not installed")
+class FastJSONRendererTests(unittest.TestCase):
+    def render(self, rows):
+        data = fast_lists.Rows(rows)
+        data.orjson_safe = fast_lists.values_serializer(WarehouseSerializer, ("city", "latitude")).floats_in_range(rows)
+        return fast_lists.FastJSONRenderer().render({"results": data})
+
+    def test_same_bytes_as_json(self):
+        rows = [
+            {"latitude": value, "city": text}
+            for value, text in (
+                (0.0, ""), (-0.0, "  "), (1e-4, "é"), (0.1 + 0.2, "\x00"), (123456789.123, '"\\'),
+                (1e16, "\U0001f4e6"), (1e-5, "</script>"), (1e17, "x"), (2.5e-300, "\u2028"),
+            )
+        ]
+        for row in rows:
+            with self.subTest(row=row):
+                self.assertEqual(self.render([row]), JSONRenderer().render({"results": [row]}))
@@ -0,0 +1,67 @@
+"""
+?fields= and ?omit=: the response keeps the selected fields, and the list
+query reads only their columns and joins api_user only for
+created_by_username.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Announcement
+
+from .base import SeededTestCase
+
+
+class SparseFieldsTests(SeededTestCase):
+    def fetch(self, path):
+        """
+        Return the response data and the SQL of the query that loaded the
+        objects.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get(path).json()
+        table = "api_announcement" if "announcements" in path else "api_warehouse"
+        rows = [query["sql"] for query in queries.captured_queries if query["sql"].startswith(f'SELECT "{table}"."id"')]
+        self.assertEqual(len(rows), 1, queries.captured_queries)
+        return data, rows[0]
+
+    def test_fields(self):
+        data, sql = self.fetch("/api/announcements/?fields=id,title")
+        self.assertEqual({tuple(row) for row in data["results"]}, {("id", "title")})
+        self.assertNotIn('"api_announcement"."content"', sql)
+        self.assertNotIn("JOIN", sql)
+
+    def test_omit(self):
+        data, sql = self.fetch("/api/announcements/?omit=content")
+        self.assertNotIn("content", data["results"][0])
+        self.assertNotIn('"api_announcement"."content"', sql)
+        self.assertIn("JOIN", sql)
+
+    def test_created_by_username_joins(self):
+        for path in ("/api/warehouses/?fields=id,created_by_username", "/api/announcements/?fields=created_by_username"):
+            with self.subTest(path=path):
+                data, sql = self.fetch(path)
+                self.assertIn('"api_user"."username"', sql)
+        data, sql = self.fetch("/api/warehouses/?omit=created_by_username")
+        self.assertIn("created_by", data["results"][0])
+        self.assertNotIn("JOIN", sql)
+
+    def test_detail(self):
+        data, sql = self.fetch(f"/api/warehouses/{self.warehouse.pk}/?fields=city")
+        self.assertEqual(data, {"city": self.warehouse.city})
+        self.assertNotIn("JOIN", sql)
+
+    def test_unknown_fields(self):
+        for param in ("fields", "omit"):
+            with self.subTest(param=param):
+                response = self.get(f"/api/announcements/?{param}=title,body", status=400)
+                self.assertIn("body", response.json()[param])
+
+    def test_writes_save_every_field(self):
+        response = self.client.patch(
+            f"/api/announcements/{self.announcement.pk}/?fields=id",
+            {"title": "Renamed", "content": "Rewritten"},
+            format="json",
+        )
+        self.assertEqual(response.json(), {"id": self.announcement.pk})
+        announcement = Announcement.objects.get(pk=self.announcement.pk)
+        self.assertEqual((announcement.title, announcement.content), ("Renamed", "Rewritten"))
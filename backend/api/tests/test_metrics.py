@@ -0,0 +1,19 @@
+from django.test import SimpleTestCase, override_settings
+
+
+class MetricsAccessTests(SimpleTestCase):
+    def scrape(self, **headers):
+        return self.client.get("/metrics", headers=headers)
+
+    @override_settings(METRICS_TOKEN="")
+    def test_closed_without_a_token(self):
+        self.assertEqual(self.scrape().status_code, 403)
+        self.assertEqual(self.scrape(Authorization="Bearer ").status_code, 403)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token(self):
+        self.assertEqual(self.scrape().status_code, 403)
+        self.assertEqual(self.scrape(Authorization="Bearer wrong").status_code, 403)
+        response = self.scrape(Authorization="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"event_streams_open", response.content)
@@ -0,0 +1,126 @@
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.hashers import check_password
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import bulk, counters, passwords, provisioning
+from api.models import User
+
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+
+class HashPasswordsTests(SimpleTestCase):
+    secrets = ["Correct-horse-1", "Correct-horse-2", "Correct-horse-3"]
+
+    def setUp(self):
+        self.addCleanup(passwords.shutdown)
+
+    def assertHashes(self, hashes):
+        self.assertEqual(len(hashes), len(self.secrets))
+        for secret, encoded in zip(self.secrets, hashes):
+            self.assertTrue(check_password(secret, encoded))
+
+    def test_pool(self):
+        # Real worker processes, hashing with the settings module's hashers
+        self.assertHashes(passwords.hash_passwords(self.secrets, workers=2))
+        self.assertIsNotNone(passwords._pool)
+
+    @override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+    def test_in_process(self):
+        with mock.patch.object(passwords, "pool") as pool:
+            self.assertHashes(passwords.hash_passwords(self.secrets, workers=1))
+            self.assertEqual(len(passwords.hash_passwords(self.secrets[:1], workers=4)), 1)
+        pool.assert_not_called()
+
+    @override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+    def test_fallback(self):
+        for error in (
+            # Platforms without sem_open
+            NotImplementedError("sem_open"),
+            # Sandboxes that do not permit starting processes
+            PermissionError("spawn"),
+            # A worker died
+            BrokenProcessPool("killed"),
+        ):
+            with self.subTest(error=type(error).__name__):
+                executor = mock.Mock()
+                executor.map.side_effect = error
+                with mock.patch.object(passwords, "ProcessPoolExecutor", return_value=executor):
+                    self.assertHashes(passwords.hash_passwords(self.secrets, workers=2))
+                # The pool is dropped, to be started again next time
+                executor.shutdown.assert_called_once()
+                self.assertIsNone(passwords._pool)
+        with mock.patch.object(passwords, "ProcessPoolExecutor", side_effect=NotImplementedError):
+            self.assertHashes(passwords.hash_passwords(self.secrets, workers=2))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, PASSWORD_HASH_WORKERS=1)
+class UserImportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create(username="taken", role=User.Role.SUPPORT_STAFF)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username="import-admin", role=User.Role.PLATFORM_ADMIN))
+
+    def row(self, username, **fields):
+        return {
+            "username": username, "password": f"Correct-horse-{username}", "email": f"{username}@example.com",
+            "first_name": "Bulk", "last_name": "Import", "role": User.Role.SUPPORT_STAFF, **fields,
+        }
+
+    def post(self, rows, status=200, **params):
+        path = "/api/users/bulk/" + "".join(f"?{name}={value}" for name, value in params.items())
+        response = self.client.post(path, rows, format="json")
+        self.assertEqual(response.status_code, status, response.content[:500])
+        return response.json()
+
+    def test_import(self):
+        counters.get(counters.USERS)
+        report = self.post([
+            self.row("first"),
+            self.row("taken"),
+            self.row("second", role="nobody"),
+            self.row("first"),
+            self.row("third", password="short"),
+            self.row("fourth", role=User.Role.WAREHOUSE_ADMIN),
+        ], batch_size=1)
+        self.assertEqual(report["created"], 2)
+        self.assertEqual([error["row"] for error in report["errors"]], [1, 2, 3, 4])
+        self.assertIn("username", report["errors"][0]["errors"])
+        self.assertIn("role", report["errors"][1]["errors"])
+        self.assertIn("username", report["errors"][2]["errors"])
+        self.assertIn("password", report["errors"][3]["errors"])
+        for username in ("first", "fourth"):
+            self.assertTrue(User.objects.get(username=username).check_password(f"Correct-horse-{username}"))
+        self.assertEqual(counters.get(counters.USERS), 4)
+        self.assertEqual(counters.get(counters.USERS, counters.role_key(User.Role.WAREHOUSE_ADMIN)), 1)
+
+    def test_failed_batch_is_retried_by_row(self):
+        # Let a duplicate reach the database, which rejects its whole batch
+        with mock.patch.object(provisioning, "reject_taken_usernames", lambda valid, errors, size: valid):
+            report = self.post([self.row("one"), self.row("taken"), self.row("two")], batch_size=10)
+        self.assertEqual(report["created"], 2)
+        self.assertEqual([error["row"] for error in report["errors"]], [1])
+        self.assertIn("non_field_errors", report["errors"][0]["errors"])
+        self.assertEqual(User.objects.filter(username__in=["one", "two"]).count(), 2)
+
+    @override_settings(BULK_MAX_ROWS=2)
+    def test_row_limit(self):
+        self.post([self.row("a"), self.row("b"), self.row("c")], status=400)
+        self.assertEqual(self.post([self.row("a"), self.row("b")])["created"], 2)
+
+    @override_settings(BULK_BATCH_SIZE=3, BULK_MAX_BATCH_SIZE=5)
+    def test_batch_size(self):
+        def size(**params):
+            return bulk.batch_size(SimpleNamespace(query_params=params))
+
+        self.assertEqual(size(), 3)
+        self.assertEqual(size(batch_size="4"), 4)
+        self.assertEqual(size(batch_size="500"), 5)
+        self.assertEqual(size(batch_size="0"), 1)
+        self.post([self.row("a")], status=400, batch_size="many")
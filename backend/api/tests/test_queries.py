@@ -0,0 +1,107 @@
+"""
+Query counts per endpoint. Each list is fetched at two page sizes with the
+same number of queries expected, so a serializer field that reaches through
+a relation without a join (an N+1) fails here instead of in production.
+"""
+from django.test import override_settings
+
+from .base import SeededTestCase
+
+PAGE_SIZES = (10, 100)
+
+
+class ListQueryCountTests(SeededTestCase):
+    def assertListQueries(self, path, count):
+        """
+        Return the SQL the list ran, at every page size.
+        """
+        sql = []
+        for page_size in PAGE_SIZES:
+            with self.subTest(path=path, page_size=page_size):
+                separator = "&" if "?" in path else "?"
+                with self.assertNumQueries(count) as queries:
+                    response = self.get(f"{path}{separator}page_size={page_size}")
+                results = response.json()["results"]
+                self.assertEqual(len(results), page_size)
+                sql.extend(query["sql"] for query in queries.captured_queries)
+        return sql
+
+    def test_warehouses(self):
+        # ETag aggregate, page COUNT(*), page rows with their creators
+        self.assertListQueries("/api/warehouses/", 3)
+
+    def test_announcements(self):
+        self.assertListQueries("/api/announcements/", 3)
+
+    def test_users(self):
+        self.assertListQueries("/api/users/", 2)
+
+    def test_keyset_pages_skip_the_count(self):
+        # MAX(updated_at) for the ETag, page rows
+        for path, count in (
+            ("/api/warehouses/?pagination=cursor", 2),
+            ("/api/announcements/?pagination=cursor", 2),
+            ("/api/users/?pagination=cursor", 1),
+        ):
+            sql = self.assertListQueries(path, count)
+            self.assertEqual([query for query in sql if "COUNT(" in query.upper()], [], path)
+
+    def test_bbox(self):
+        self.assertListQueries("/api/warehouses/?bbox=-180,-90,180,90", 3)
+
+    def test_sparse_fields(self):
+        self.assertListQueries("/api/warehouses/?fields=id,city", 3)
+        self.assertListQueries("/api/announcements/?omit=content,created_by_username", 3)
+
+    @override_settings(FAST_LIST_RESPONSES=True)
+    def test_fast_lists(self):
+        self.assertListQueries("/api/warehouses/", 3)
+        self.assertListQueries("/api/announcements/", 3)
+
+
+class DetailQueryCountTests(SeededTestCase):
+    def test_details(self):
+        paths = (
+            f"/api/warehouses/{self.warehouse.pk}/",
+            f"/api/announcements/{self.announcement.pk}/",
+            f"/api/users/{self.user.pk}/",
+        )
+        for path in paths:
+            with self.subTest(path=path), self.assertNumQueries(1):
+                self.get(path)
+
+    def test_current_user(self):
+        # The authenticated user is the object
+        with self.assertNumQueries(0):
+            self.get("/api/current-user/")
+
+
+class ActionQueryCountTests(SeededTestCase):
+    def test_recent(self):
+        for limit in (5, 50):
+            with self.subTest(limit=limit), self.assertNumQueries(1):
+                response = self.get(f"/api/announcements/recent/?limit={limit}")
+            self.assertEqual(len(response.json()), limit)
+
+    def test_nearby(self):
+        for k in (5, 50):
+            with self.subTest(k=k), self.assertNumQueries(1):
+                self.get(f"/api/warehouses/nearby/?lat=40.71&lon=-74.0&radius_km=200&k={k}")
+
+    def test_search(self):
+        for limit in (5, 50):
+            # Index hits, then one query for their rows
+            with self.subTest(limit=limit), self.assertNumQueries(2):
+                self.get(f"/api/announcements/search/?q=inventory&limit={limit}")
+
+    def test_counts(self):
+        for path in ("/api/warehouses/count/", "/api/users/count/"):
+            with self.subTest(path=path), self.assertNumQueries(1):
+                self.get(path)
+
+    def test_dashboard(self):
+        with self.assertNumQueries(5):
+            self.get("/api/dashboard/")
+        # Cached for the role until the data changes
+        with self.assertNumQueries(0):
+            self.get("/api/dashboard/")
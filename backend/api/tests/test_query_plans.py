@@ -0,0 +1,159 @@
+"""
+EXPLAIN QUERY PLAN for every SELECT the API's endpoints run: none may fall
+back to a full table scan or sort in a temp B-tree, so a missing or unused
+index fails here. SQLite only.
+"""
+import re
+import unittest
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import distances
+from api.benchmarks import create_warehouses
+from api.models import Announcement, User, Warehouse
+
+ROWS = 500
+
+# Plan steps that mean a query reads a whole table or sorts in a temp B-tree.
+# "SCAN t USING [COVERING] INDEX i" walks an index in order and is allowed.
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+TEMP_SORT = re.compile(r"USE TEMP B-TREE")
+
+# Queries that read every row on purpose
+FULL_READS = {
+    # The coordinates distances/ and assign/ keep in memory, loaded once per
+    # warehouses data version
+    str(Warehouse.objects.order_by("id").values_list("id", "latitude", "longitude").query),
+}
+
+# (SQL fragment, plan step pattern) of the steps that are expected where the
+# SQL contains the fragment
+EXPECTED_STEPS = (
+    # Map tiles spanning most of the map filter on the coordinates alone
+    # (clusters.FULL_SCAN_SHARE); the results are cached per tile
+    ('FROM "api_warehouse" WHERE ("api_warehouse"."latitude" >=', FULL_SCAN),
+    # Warehouses inside a bbox come from several geohash index ranges, which
+    # cannot also give them in list order; only the matches are sorted
+    ('"api_warehouse"."geohash" >=', TEMP_SORT),
+    # Full-text hits are sorted by rank, then newest first
+    ("FROM api_announcement_fts WHERE api_announcement_fts MATCH", TEMP_SORT),
+)
+
+
+def unexpected(sql, step):
+    """
+    Whether a plan step scans a full table or sorts in a temp B-tree
+    without being one of the EXPECTED_STEPS.
+    """
+    for pattern in (FULL_SCAN, TEMP_SORT):
+        if pattern.search(step):
+            return not any(fragment in sql and expected is pattern for fragment, expected in EXPECTED_STEPS)
+    return False
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "Reads SQLite's EXPLAIN QUERY PLAN output.")
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(username="explain-admin", role=User.Role.PLATFORM_ADMIN)
+        cls.owner = User.objects.create(username="explain-owner", role=User.Role.WAREHOUSE_ADMIN)
+        User.objects.bulk_create(
+            User(username=f"explain-user-{index}", role=User.Role.values[index % len(User.Role.values)])
+            for index in range(ROWS)
+        )
+        create_warehouses(ROWS, owner=cls.owner)
+        Announcement.objects.bulk_create(
+            Announcement(
+                title=f"Announcement {index}", content="Dock schedule update", is_active=index % 3 != 0,
+                created_by=cls.admin,
+            )
+            for index in range(ROWS)
+        )
+        cls.warehouse = Warehouse.objects.filter(created_by=cls.owner).first()
+        cls.announcement = Announcement.objects.first()
+
+    def setUp(self):
+        # Cached responses run no queries; the coordinates distances/ keeps
+        # are reloaded from the rows of this test case
+        cache.clear()
+        distances._warehouses = None
+
+    def endpoints(self):
+        admin, owner, warehouse, announcement = self.admin, self.owner, self.warehouse, self.announcement
+        points = {"points": [[48.85, 2.35], [40.71, -74.0]]}
+        return [
+            (admin, "get", "/api/current-user/", None),
+            (admin, "get", "/api/dashboard/", None),
+            (admin, "get", "/api/users/", None),
+            (admin, "get", "/api/users/?page=3", None),
+            (admin, "get", "/api/users/?pagination=cursor", None),
+            (admin, "get", f"/api/users/{owner.pk}/", None),
+            (admin, "get", "/api/users/count/?by=role", None),
+            (admin, "get", "/api/warehouses/", None),
+            (admin, "get", "/api/warehouses/?pagination=cursor", None),
+            (admin, "get", "/api/warehouses/?bbox=-10,35,30,60", None),
+            (admin, "get", "/api/warehouses/?fields=id,city", None),
+            (admin, "get", f"/api/warehouses/{warehouse.pk}/", None),
+            (admin, "get", "/api/warehouses/count/?by=owner", None),
+            (admin, "get", "/api/warehouses/nearby/?lat=48.85&lon=2.35&radius_km=500", None),
+            (admin, "get", "/api/warehouses/clusters/?zoom=3", None),
+            (admin, "get", "/api/warehouses/clusters/?zoom=8&bbox=-1,50,1,52", None),
+            (admin, "post", "/api/warehouses/assign/?k=3", points),
+            (admin, "post", "/api/warehouses/distances/?format=npz", points),
+            (owner, "patch", f"/api/warehouses/{warehouse.pk}/", {"city": "Explained"}),
+            (admin, "get", "/api/announcements/", None),
+            (admin, "get", "/api/announcements/?pagination=cursor", None),
+            (admin, "get", "/api/announcements/recent/", None),
+            (admin, "get", "/api/announcements/search/?q=dock", None),
+            (admin, "get", "/api/announcements/search/?q=sched*&offset=10", None),
+            (admin, "get", f"/api/announcements/{announcement.pk}/", None),
+        ]
+
+    def capture(self):
+        """
+        Yield (label, sql, params) for each SELECT the endpoints run,
+        following the first cursor link of keyset-paginated lists.
+        """
+        client = APIClient()
+        for user, method, path, data in self.endpoints():
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+            pending = [path]
+            while pending:
+                current = pending.pop()
+                queries = []
+
+                def record(execute, sql, params, many, context):
+                    if sql.lstrip().upper().startswith("SELECT"):
+                        queries.append((sql, params))
+                    return execute(sql, params, many, context)
+
+                with connection.execute_wrapper(record):
+                    response = getattr(client, method)(current, data, format="json")
+                    if response.streaming:
+                        b"".join(response.streaming_content)
+                self.assertLess(response.status_code, 400, f"{method.upper()} {current}")
+                for sql, params in queries:
+                    yield f"{method.upper()} {current}", sql, params
+                if current == path and "pagination=cursor" in path and response.data.get("next"):
+                    pending.append(response.data["next"])
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_plans_use_indexes(self):
+        checked = 0
+        for label, sql, params in self.capture():
+            if sql in FULL_READS:
+                continue
+            plan = self.explain(sql, params)
+            problems = [step for step in plan if unexpected(sql, step)]
+            with self.subTest(label, sql=sql):
+                self.assertEqual(problems, [], "\n".join(plan))
+            checked += 1
+        self.assertGreater(checked, 0)
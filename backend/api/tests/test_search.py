@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+
+from django.db import connection
+
+from api import search
+from api.models import Announcement
+from api.signals import restore_search_index
+
+from .base import SeededTestCase
+
+
+class SearchTests(SeededTestCase):
+    users = 5
+    warehouses = 0
+    announcements = 0
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.matches = [
+            Announcement.objects.create(title=f"Forklift training {index}", content="Dock B", created_by=cls.admin)
+            for index in range(3)
+        ]
+
+    def search(self, query):
+        return [row["id"] for row in self.get(f"/api/announcements/search/?q={query}").json()["results"]]
+
+    def test_search(self):
+        self.assertCountEqual(self.search("forklift"), [announcement.pk for announcement in self.matches])
+        self.get("/api/announcements/search/?q=", status=400)
+
+    def test_hits_deleted_meanwhile_are_skipped(self):
+        deleted = self.matches[0].pk
+        index_search = search.search
+
+        def search_then_delete(*args, **kwargs):
+            # Another request deletes a hit before its row is read
+            hits = index_search(*args, **kwargs)
+            Announcement.objects.filter(pk=deleted).delete()
+            return hits
+
+        with mock.patch.object(search, "search", search_then_delete):
+            ids = self.search("forklift")
+        self.assertCountEqual(ids, [announcement.pk for announcement in self.matches[1:]])
+
+    @unittest.skipUnless(connection.vendor == "sqlite", "Drops the SQLite index triggers.")
+    def test_migrate_restores_dropped_triggers(self):
+        # What a migration rebuilding api_announcement leaves behind
+        with connection.cursor() as cursor:
+            for trigger in search.SQLiteIndex.triggers:
+                cursor.execute(f"DROP TRIGGER {trigger}")
+        added = Announcement.objects.create(title="Forklift recall", content="", created_by=self.admin)
+        self.assertFalse(search.index_for(connection).installed(connection))
+
+        restore_search_index(sender=None, using=connection.alias)
+        self.assertTrue(search.index_for(connection).installed(connection))
+        # Refilled, so rows written without the triggers are found too
+        self.assertIn(added.pk, self.search("forklift"))
+        self.assertFalse(search.ensure_installed(connection))
+
+    def test_every_match_is_ranked(self):
+        # An old title match outranks any number of newer content matches
+        Announcement.objects.bulk_create(
+            Announcement(title=f"Notice {index}", content="Forklift", created_by=self.admin) for index in range(10_050)
+        )
+        hits = search.search(search.parse_query("forklift"), limit=3, offset=0)
+        self.assertCountEqual([hit.id for hit in hits], [announcement.pk for announcement in self.matches])
@@ -0,0 +1,45 @@
+from unittest import mock
+
+from django.db.models import F, QuerySet
+from django.test import TestCase
+from django.utils import timezone
+
+from api import counters, seeding
+from api.models import Announcement, User, Warehouse
+
+
+class SeedTests(TestCase):
+    def test_history(self):
+        before = timezone.now()
+        seeding.seed(users=20, warehouses=30, announcements=30, seed=0, batch_size=7)
+        for model, field in ((User, "date_joined"), (Warehouse, "created_at"), (Announcement, "created_at")):
+            with self.subTest(model=model.__name__):
+                timestamps = list(model.objects.order_by("id").values_list(field, flat=True))
+                self.assertEqual(timestamps, sorted(timestamps))
+                self.assertGreaterEqual(timestamps[0], before - seeding.HISTORY)
+                self.assertLess(timestamps[-1], before)
+                # Spread over the window, not stamped with the time of the insert
+                self.assertGreater(timestamps[-1] - timestamps[0], seeding.HISTORY / 2)
+        for model in (Warehouse, Announcement):
+            self.assertFalse(model.objects.exclude(updated_at=F("created_at")).exists())
+        self.assertEqual(counters.get(counters.WAREHOUSES), 30)
+
+    def test_auto_timestamps_stay_on(self):
+        # Other threads saving rows while the seeder runs get the current time
+        fields = [Warehouse._meta.get_field("created_at"), Warehouse._meta.get_field("updated_at")]
+        seen = []
+        bulk_create = QuerySet.bulk_create
+
+        def record(queryset, objs, **kwargs):
+            if queryset.model is Warehouse:
+                seen.append([(field.auto_now, field.auto_now_add) for field in fields])
+            return bulk_create(queryset, objs, **kwargs)
+
+        with mock.patch.object(QuerySet, "bulk_create", record):
+            seeding.seed(warehouses=5, seed=0)
+        self.assertEqual(seen, [[(False, True), (True, False)]])
+
+        before = timezone.now()
+        warehouse = Warehouse.objects.create(city="Saved", latitude=0, longitude=0)
+        self.assertGreaterEqual(warehouse.created_at, before)
+
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import (
@@ -5,11 +6,14 @@ from rest_framework_simplejwt.views import (
     TokenRefreshView,
 )
 from .views import (
+    BatchView,
     CurrentUserView,
+    DashboardView,
     UserViewSet,
     WarehouseViewSet,
     AnnouncementViewSet
 )
+from . import async_views
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
@@ -25,12 +29,34 @@ urlpatterns = [
     # User endpoints
     path('current-user/', CurrentUserView.as_view(), name='current_user'),
     
+    # Dashboard endpoint
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    
+    # Several API requests in one round trip
+    path('batch/', BatchView.as_view(), name='batch'),
+    
     # Include ViewSet routed endpoints
     path('', include(router.urls)),
     
     # Custom action URLs (these are just examples, as router already handles these)
     path('warehouses/count/', WarehouseViewSet.as_view({'get': 'count'}), name='warehouse_count'),
+    path('warehouses/nearby/', WarehouseViewSet.as_view({'get': 'nearby'}), name='warehouse_nearby'),
     path('users/count/', UserViewSet.as_view({'get': 'count'}), name='user_count'),
     path('announcements/recent/', AnnouncementViewSet.as_view({'get': 'recent'}), name='recent_announcements'),
     path('announcements/<int:pk>/toggle-status/', AnnouncementViewSet.as_view({'patch': 'toggle_status'}), name='toggle_announcement_status'),
-]
\ No newline at end of file
+]
+
+if settings.ASYNC_READ_VIEWS:
+    # Matched before the routes above; each async view passes everything but
+    # JSON GETs on to the DRF view it wraps
+    routes = {pattern.name: pattern.callback for pattern in router.urls}
+    urlpatterns = [
+        path('current-user/', async_views.CurrentUserView.as_view(CurrentUserView.as_view())),
+        path('warehouses/', async_views.ConditionalListView.as_view(routes['warehouse-list'])),
+        path('warehouses/count/', async_views.WarehouseCountView.as_view(routes['warehouse-count'])),
+        path('warehouses/<int:pk>/', async_views.ConditionalDetailView.as_view(routes['warehouse-detail'])),
+        path('users/count/', async_views.UserCountView.as_view(routes['user-count'])),
+        path('announcements/', async_views.ConditionalListView.as_view(routes['announcement-list'])),
+        path('announcements/recent/', async_views.RecentAnnouncementsView.as_view(routes['announcement-recent'])),
+        path('announcements/<int:pk>/', async_views.ConditionalDetailView.as_view(routes['announcement-detail'])),
+    ] + urlpatterns
@@ -1,17 +1,106 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from rest_framework import viewsets, generics, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
+from . import batch, bulk, clusters, counters, distances, events, export, fast_lists, provisioning, search, sparse
+from .authentication import EventStreamAuthentication
+from .cache import ANNOUNCEMENTS, USERS, WAREHOUSES, bump_on_commit, last_modified, version, versioned_key, versions
+from .metrics import stage
+from .pagination import KeysetPagination
 from .models import User, Warehouse, Announcement
 from .serializers import (
     UserSerializer,
     UserUpdateSerializer,
     WarehouseSerializer,
-    AnnouncementSerializer
+    NearbyWarehouseSerializer,
+    AnnouncementSerializer,
+    AnnouncementSearchSerializer
 )
 from .permissions import IsPlatformAdmin, IsAdminUser, IsOwnerOrAdmin
 
 
-class CurrentUserView(generics.RetrieveAPIView):
+def parse_float_param(params, name, default=None, minimum=None, maximum=None):
+    """
+    Read a float query parameter, raising a 400 if it is missing or out of range.
+    """
+    raw = params.get(name)
+    if raw in (None, ''):
+        if default is None:
+            raise ValidationError({name: 'This query parameter is required.'})
+        return default
+    try:
+        value = float(raw)
+    except ValueError:
+        raise ValidationError({name: 'A valid number is required.'})
+    if value != value or (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise ValidationError({name: f'Must be between {minimum} and {maximum}.'})
+    return value
+
+
+def parse_bbox_param(params, name='bbox'):
+    """
+    Parse a "min_lon,min_lat,max_lon,max_lat" query parameter.
+    Returns None when the parameter is absent.
+    """
+    raw = params.get(name)
+    if not raw:
+        return None
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in raw.split(','))
+    except ValueError:
+        raise ValidationError({name: 'Expected "min_lon,min_lat,max_lon,max_lat".'})
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise ValidationError({name: 'Coordinates are out of range.'})
+    return min_lon, min_lat, max_lon, max_lat
+
+
+class SparseFieldsMixin:
+    """
+    Narrows responses to the fields picked with ?fields= or ?omit= (see
+    api.sparse). Reads also load only the columns of those fields and join
+    only the relations they follow; loaded_columns names, by action, the
+    columns a view reads itself whatever the fields.
+    """
+    loaded_columns = {}
+    
+    def selected_fields(self):
+        """
+        The field names for the action's serializer, or None for all of them.
+        """
+        if not hasattr(self, '_selected_fields'):
+            request = getattr(self, 'request', None)
+            self._selected_fields = None if request is None else sparse.selected_fields(request, self.get_serializer_class())
+        return self._selected_fields
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['fields'] = self.selected_fields()
+        return context
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.selected_fields()
+        if fields is not None and self.request.method in permissions.SAFE_METHODS:
+            queryset = sparse.prune_queryset(
+                queryset, self.get_serializer_class(), fields, self.loaded_columns.get(self.action, ())
+            )
+        return queryset
+
+
+class CurrentUserView(SparseFieldsMixin, generics.RetrieveAPIView):
     """
     API endpoint that returns the current user's details
     """
@@ -22,13 +111,178 @@ class CurrentUserView(generics.RetrieveAPIView):
         return self.request.user
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class ExportMixin:
+    """
+    Adds an export action that streams the filtered list as CSV or NDJSON,
+    selected with ?format=csv (default) or ?format=ndjson.
+    export_columns lists (output name, queryset lookup) pairs.
+    """
+    export_columns = ()
+    export_filename = 'export'
+    # Actions that pick their own content type from ?format=
+    format_actions = ('export',)
+    # Actions whose responses are streamed (see api.batch)
+    streaming_actions = ('export',)
+    
+    def perform_content_negotiation(self, request, force=False):
+        # Forcing negotiation keeps DRF from rejecting formats it has no
+        # renderer for.
+        return super().perform_content_negotiation(request, force=force or self.action in self.format_actions)
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream every row of the list as CSV or NDJSON
+        """
+        export_format = request.query_params.get('format', 'csv')
+        if export_format not in export.CONTENT_TYPES:
+            raise ValidationError({'format': f'Expected one of: {", ".join(export.CONTENT_TYPES)}.'})
+        queryset = self.filter_queryset(self.get_queryset())
+        fields = self.get_serializer_context().get('fields')
+        columns = [column for column in self.export_columns if fields is None or column[0] in fields]
+        return export.export_response(queryset, columns, export_format, self.export_filename)
+
+
+class ConditionalGetMixin:
+    """
+    Adds strong ETag and Last-Modified validators to list and retrieve, and
+    answers If-None-Match / If-Modified-Since with 304 Not Modified before
+    anything is serialized.
+    
+    List validators come from one MAX(updated_at) / COUNT(*) query over the
+    filtered queryset plus the request path and query string. data_scope names
+    the api.cache scope whose version and write time cover deletions, which
+    leave MAX(updated_at) unchanged. Keyset pages skip the COUNT(*), which
+    KeysetPagination exists to avoid, and rely on that version alone; with a
+    per-process cache a deletion then only shows in the worker that made it
+    (see CACHES). The users data version is part of every ETag because
+    responses embed the creator's username.
+    """
+    data_scope = None
+    
+    list_stats = {'updated': Max('updated_at'), 'count': Count('pk')}
+    keyset_list_stats = {'updated': Max('updated_at')}
+    # For detail_validators() under ?fields= (see SparseFieldsMixin)
+    loaded_columns = {'retrieve': ('updated_at',)}
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        stats = queryset.order_by().aggregate(**self.get_list_stats(request))
+        etag, modified = self.list_validators(
+            request, stats, last_modified(self.data_scope, USERS), versions(self.data_scope, USERS)
+        )
+        return self.conditional_response(request, etag, modified, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+    
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, modified = self.detail_validators(request, instance, version(USERS))
+        return self.conditional_response(request, etag, modified, lambda: Response(self.get_serializer(instance).data))
+    
+    def get_list_stats(self, request):
+        """
+        The aggregate list validators are built from: no COUNT(*) for keyset pages.
+        """
+        return self.keyset_list_stats if KeysetPagination.requested(request) else self.list_stats
+    
+    def list_validators(self, request, stats, scope_modified, scope_versions):
+        """
+        Return (ETag, Last-Modified) for a list from its get_list_stats()
+        aggregate, the data scope's last write time and the (data scope,
+        users) versions.
+        """
+        scope_version, users_version = scope_versions
+        modified = scope_modified
+        if stats['updated'] is not None:
+            modified = max(modified, stats['updated'])
+        etag = self.compute_etag(request, users_version, 'list', scope_version, stats.get('count'), stats['updated'])
+        return etag, modified
+    
+    def detail_validators(self, request, instance, users_version):
+        return self.compute_etag(request, users_version, 'detail', instance.pk, instance.updated_at), instance.updated_at
+    
+    def compute_etag(self, request, users_version, *parts):
+        key = repr((
+            request.get_full_path(),
+            request.accepted_media_type,
+            users_version,
+            *[part.isoformat() if hasattr(part, 'isoformat') else part for part in parts],
+        ))
+        return quote_etag(hashlib.sha1(key.encode()).hexdigest())
+    
+    def not_modified(self, request, etag, modified):
+        """
+        Return a 304 (or 412) response when the request's validators match, else None.
+        """
+        return get_conditional_response(request, etag=etag, last_modified=self.timestamp(modified))
+    
+    def set_validators(self, response, etag, modified):
+        response['ETag'] = etag
+        if modified is not None:
+            response['Last-Modified'] = http_date(self.timestamp(modified))
+        # Authenticated data: browsers may keep it but must revalidate
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    def timestamp(self, modified):
+        return int(modified.timestamp()) if modified is not None else None
+    
+    def conditional_response(self, request, etag, modified, build_response):
+        response = self.not_modified(request, etag, modified)
+        if response is None:
+            response = build_response()
+        return self.set_validators(response, etag, modified)
+
+
+class FastListMixin:
+    """
+    While FAST_LIST_RESPONSES is on, builds list pages from values_list()
+    rows with api.fast_lists instead of model instances and the serializer.
+    The output is the serializer's, byte for byte, including the fields
+    selection in the serializer context; the serializer class must only have
+    fields ValuesSerializer supports.
+    """
+    def list(self, request, *args, **kwargs):
+        queryset = self.list_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.list_data(page))
+        return Response(self.list_data(list(queryset)))
+    
+    def list_queryset(self, queryset):
+        """
+        The query for list rows: values_list() rows on the fast path.
+        """
+        if settings.FAST_LIST_RESPONSES:
+            return self.values_serializer().queryset(queryset)
+        return queryset
+    
+    def list_data(self, rows):
+        """
+        The serialized list of rows from list_queryset().
+        """
+        if settings.FAST_LIST_RESPONSES:
+            with stage('serialize'):
+                return self.values_serializer().to_representation(rows)
+        return self.get_serializer(rows, many=True).data
+    
+    def values_serializer(self):
+        return fast_lists.values_serializer(self.get_serializer_class(), self.get_serializer_context().get('fields'))
+
+
+class UserViewSet(SparseFieldsMixin, ExportMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing users.
     Only Platform Admins can access this viewset.
     """
-    queryset = User.objects.all().order_by('-date_joined')
+    queryset = User.objects.only(
+        'id', 'username', 'email', 'first_name', 'last_name', 'role', 'date_joined'
+    ).order_by('-date_joined', '-id')
     permission_classes = [IsPlatformAdmin]
+    export_filename = 'users'
+    export_columns = (
+        ('id', 'id'), ('username', 'username'), ('email', 'email'),
+        ('first_name', 'first_name'), ('last_name', 'last_name'), ('role', 'role'),
+    )
     
     def get_serializer_class(self):
         if self.action in ['update', 'partial_update']:
@@ -38,20 +292,56 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def count(self, request):
         """
-        Return the total count of users
+        Return the total count of users, broken down by role with ?by=role
+        """
+        data = {'count': counters.get(counters.USERS)}
+        if request.query_params.get('by') == 'role':
+            data['by_role'] = counters.breakdown(counters.USERS, counters.ROLE_PREFIX)
+        return Response(data)
+    
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, MultiPartParser, bulk.CSVParser])
+    def bulk(self, request):
+        """
+        Create many users at once from a JSON array or CSV upload with
+        username, password, email, first_name, last_name and role. Passwords
+        are hashed in parallel, rows are written with bulk queries in
+        ?batch_size= sized transactions and failures are reported per row.
         """
-        count = User.objects.count()
-        return Response({'count': count})
+        return Response(provisioning.import_users(bulk.request_rows(request), bulk.batch_size(request)))
 
 
-class WarehouseViewSet(viewsets.ModelViewSet):
+class WarehouseViewSet(ConditionalGetMixin, SparseFieldsMixin, FastListMixin, ExportMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing warehouses.
     All admin roles can access, but only owners or platform admins can edit/delete.
     """
-    queryset = Warehouse.objects.all().order_by('-created_at')
+    # Join the creator for created_by_username and load only the serialized columns
+    queryset = Warehouse.objects.select_related('created_by').only(
+        'id', 'city', 'latitude', 'longitude', 'created_at', 'updated_at', 'created_by__username'
+    ).order_by('-created_at', '-id')
     serializer_class = WarehouseSerializer
     permission_classes = [IsAdminUser]
+    data_scope = WAREHOUSES
+    export_filename = 'warehouses'
+    export_columns = (
+        ('id', 'id'), ('city', 'city'), ('latitude', 'latitude'), ('longitude', 'longitude'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+        ('created_by', 'created_by_id'), ('created_by_username', 'created_by__username'),
+    )
+    
+    format_actions = ('export', 'distances')
+    streaming_actions = ('export', 'distances')
+    # nearby() measures distances from the coordinates
+    loaded_columns = {**ConditionalGetMixin.loaded_columns, 'nearby': ('latitude', 'longitude')}
+    
+    # Upper bounds for the nearby action. Every warehouse within the radius
+    # is loaded and sorted in Python, so a radius spanning continents would
+    # read most of the table on each request; assign/ covers longer ranges.
+    max_nearby_radius_km = 500
+    max_nearby_results = 100
+    # Cached assign results are keyed on the warehouses data version, so this
+    # only bounds how long unrepeated requests take up the cache
+    assign_cache_timeout = 60 * 60
     
     def get_permissions(self):
         """
@@ -63,26 +353,270 @@ class WarehouseViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAdminUser]
         return [permission() for permission in permission_classes]
     
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            bbox = parse_bbox_param(self.request.query_params)
+            if bbox is not None:
+                queryset = queryset.within_bbox(*bbox)
+        return queryset
+    
+    def get_serializer_class(self):
+        if self.action == 'nearby':
+            return NearbyWarehouseSerializer
+        return super().get_serializer_class()
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
     @action(detail=False, methods=['get'])
     def count(self, request):
         """
-        Return the total count of warehouses
+        Return the total count of warehouses, broken down by owner with ?by=owner
+        """
+        data = {'count': counters.get(counters.WAREHOUSES)}
+        if request.query_params.get('by') == 'owner':
+            data['by_owner'] = counters.breakdown(counters.WAREHOUSES, counters.OWNER_PREFIX)
+        return Response(data)
+    
+    @action(detail=False, methods=['post', 'patch', 'delete'], parser_classes=[JSONParser, MultiPartParser, bulk.CSVParser])
+    def bulk(self, request):
+        """
+        Create (POST), update (PATCH) or delete (DELETE) many warehouses at once.
+        POST and PATCH take a JSON array or CSV upload; PATCH rows need an id.
+        DELETE takes {"ids": [...]}. Rows are written with bulk queries in
+        ?batch_size= sized transactions and failures are reported per row.
+        """
+        size = bulk.batch_size(request)
+        if request.method == 'DELETE':
+            report = self.bulk_delete(request.data, size)
+        elif request.method == 'PATCH':
+            report = self.bulk_update(bulk.request_rows(request), size)
+        else:
+            report = self.bulk_create(bulk.request_rows(request), size)
+        report['errors'].sort(key=lambda error: error['row'])
+        if any(report[key] for key in ('created', 'updated', 'deleted') if key in report):
+            bump_on_commit(WAREHOUSES)
+        return Response(report)
+    
+    def can_modify(self, warehouse):
+        user = self.request.user
+        return user.is_platform_admin() or warehouse.created_by_id == user.pk
+    
+    def bulk_create(self, rows, size):
+        valid, errors = self.get_serializer(data=rows, many=True).validate_rows()
+        user = self.request.user
+        items = []
+        for index, attrs in valid:
+            warehouse = Warehouse(**attrs, created_by=user)
+            warehouse.set_geohash()
+            items.append((index, warehouse))
+        
+        def write(warehouses):
+            Warehouse.objects.bulk_create(warehouses)
+            # bulk_create does not send post_save, so update the counters
+            # and map clusters here
+            counters.adjust(counters.WAREHOUSES, {
+                counters.TOTAL: len(warehouses),
+                counters.owner_key(user.pk): len(warehouses),
+            })
+            clusters.invalidate_points((warehouse.latitude, warehouse.longitude) for warehouse in warehouses)
+        
+        created, write_errors = bulk.write_in_batches(items, size, write)
+        return {'created': created, 'errors': errors + write_errors}
+    
+    def bulk_update(self, rows, size):
+        errors = []
+        ids = []
+        for index, row in enumerate(rows):
+            pk = bulk.row_id(row.get('id'))
+            if pk is not None:
+                ids.append((index, pk))
+            else:
+                errors.append(bulk.row_error(index, {'id': ['A valid integer id is required.']}))
+        
+        serializer = self.get_serializer(data=rows, many=True, partial=True)
+        valid, validation_errors = serializer.validate_rows()
+        errors += validation_errors
+        rejected = {error['row'] for error in errors}
+        row_ids = dict(ids)
+        valid = [(index, attrs) for index, attrs in valid if index not in rejected]
+        
+        items = []
+        fields = {'updated_at', 'geohash'}
+        now = timezone.now()
+        for batch in bulk.chunks(valid, size):
+            existing = Warehouse.objects.in_bulk([row_ids[index] for index, _ in batch])
+            for index, attrs in batch:
+                warehouse = existing.get(row_ids[index])
+                if warehouse is None:
+                    errors.append(bulk.row_error(index, {'id': ['Not found.']}))
+                    continue
+                if not self.can_modify(warehouse):
+                    errors.append(bulk.row_error(index, {'id': ['You do not have permission to modify this warehouse.']}))
+                    continue
+                for name, value in attrs.items():
+                    setattr(warehouse, name, value)
+                    fields.add(name)
+                # bulk_update skips auto_now and save(), so set them here
+                warehouse.updated_at = now
+                warehouse.set_geohash()
+                items.append((index, warehouse))
+        
+        def write(warehouses):
+            Warehouse.objects.bulk_update(warehouses, sorted(fields))
+            moved = []
+            for warehouse in warehouses:
+                previous = (warehouse.loaded_value('latitude'), warehouse.loaded_value('longitude'))
+                if previous != (warehouse.latitude, warehouse.longitude):
+                    moved += [previous, (warehouse.latitude, warehouse.longitude)]
+            clusters.invalidate_points(moved)
+        
+        updated, write_errors = bulk.write_in_batches(items, size, write)
+        return {'updated': updated, 'errors': errors + write_errors}
+    
+    def bulk_delete(self, data, size):
+        ids = data.get('ids') if isinstance(data, dict) else data
+        if not isinstance(ids, list):
+            raise ValidationError({'ids': 'Expected a list of warehouse ids.'})
+        if len(ids) > settings.BULK_MAX_ROWS:
+            raise ValidationError({'ids': f'At most {settings.BULK_MAX_ROWS} ids are accepted per request.'})
+        errors = []
+        items = []
+        for batch in bulk.chunks(list(enumerate(ids)), size):
+            wanted = {pk for _, pk in batch if bulk.is_id(pk)}
+            existing = Warehouse.objects.only('id', 'created_by_id').in_bulk(list(wanted))
+            for index, pk in batch:
+                if not bulk.is_id(pk):
+                    errors.append(bulk.row_error(index, {'id': ['A valid integer id is required.']}))
+                    continue
+                warehouse = existing.get(pk)
+                if warehouse is None:
+                    errors.append(bulk.row_error(index, {'id': ['Not found.']}))
+                elif not self.can_modify(warehouse):
+                    errors.append(bulk.row_error(index, {'id': ['You do not have permission to delete this warehouse.']}))
+                else:
+                    items.append((index, pk))
+        
+        deleted, write_errors = bulk.write_in_batches(
+            items, size, lambda pks: Warehouse.objects.filter(pk__in=pks).delete()
+        )
+        return {'deleted': deleted, 'errors': errors + write_errors}
+    
+    @action(detail=False, methods=['get'])
+    def clusters(self, request):
+        """
+        Return the warehouses of the map tiles covering ?bbox= (default: the
+        whole map) grouped into clusters for map ?zoom=, each with its
+        centroid, count and a few ids (see api.clusters)
+        """
+        params = request.query_params
+        zoom = int(parse_float_param(params, 'zoom', minimum=0, maximum=clusters.MAX_ZOOM))
+        bbox = parse_bbox_param(params) or (-180.0, -90.0, 180.0, 90.0)
+        try:
+            data = clusters.clusters_for_bbox(zoom, *bbox)
+        except ValueError as exc:
+            raise ValidationError({'bbox': str(exc)})
+        return Response({'zoom': zoom, 'clusters': data})
+    
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Return the k nearest warehouses within radius_km of (lat, lon)
+        """
+        params = request.query_params
+        latitude = parse_float_param(params, 'lat', minimum=-90, maximum=90)
+        longitude = parse_float_param(params, 'lon', minimum=-180, maximum=180)
+        radius_km = parse_float_param(params, 'radius_km', default=50.0, minimum=0, maximum=self.max_nearby_radius_km)
+        k = int(parse_float_param(params, 'k', default=10, minimum=1, maximum=self.max_nearby_results))
+        warehouses = self.get_queryset().nearby(latitude, longitude, radius_km, k)
+        serializer = self.get_serializer(warehouses, many=True)
+        return Response(serializer.data)
+    
+    def request_points(self, data):
+        points = data.get('points') if isinstance(data, dict) else data
+        try:
+            return distances.parse_points(points)
+        except ValueError as exc:
+            raise ValidationError({'points': str(exc)})
+    
+    @action(detail=False, methods=['post'])
+    def assign(self, request):
+        """
+        Return the ?k= (default 1) nearest warehouses to each of the posted
+        points, nearest first, with their distances (see api.distances).
+        Takes {"points": [[lat, lon], ...]}.
+        """
+        k = int(parse_float_param(request.query_params, 'k', default=1, minimum=1, maximum=self.max_nearby_results))
+        points = self.request_points(request.data)
+        digest = hashlib.sha1(points.tobytes()).hexdigest()
+        key = versioned_key(f'warehouse-assign:{k}:{digest}', WAREHOUSES)
+        data = cache.get(key)
+        if data is None:
+            data = {'k': k, 'results': distances.assignments(points, k)}
+            cache.set(key, data, self.assign_cache_timeout)
+        return Response(data)
+    
+    @action(detail=False, methods=['post'])
+    def distances(self, request):
+        """
+        Stream the distances in km from each of the posted points to each
+        warehouse as CSV (?format=csv, default) or NumPy arrays
+        (?format=npz). Takes {"points": [[lat, lon], ...], "warehouse_ids":
+        [...]}; without warehouse_ids the columns are every warehouse by id.
         """
-        count = Warehouse.objects.count()
-        return Response({'count': count})
+        matrix_format = request.query_params.get('format', 'csv')
+        if matrix_format not in distances.CONTENT_TYPES:
+            raise ValidationError({'format': f'Expected one of: {", ".join(distances.CONTENT_TYPES)}.'})
+        points = self.request_points(request.data)
+        warehouse_ids = request.data.get('warehouse_ids') if isinstance(request.data, dict) else None
+        if warehouse_ids is not None and not (
+            isinstance(warehouse_ids, list)
+            and all(bulk.is_id(pk) for pk in warehouse_ids)
+        ):
+            raise ValidationError({'warehouse_ids': 'Expected a list of warehouse ids.'})
+        try:
+            ids, vectors = distances.columns(warehouse_ids)
+        except ValueError as exc:
+            raise ValidationError({'warehouse_ids': str(exc)})
+        if len(points) * len(ids) > distances.MAX_MATRIX_CELLS:
+            raise ValidationError({'points': (
+                f'{len(points)} points by {len(ids)} warehouses is more than {distances.MAX_MATRIX_CELLS} '
+                f'distances: send fewer points or warehouse_ids.'
+            )})
+        response = StreamingHttpResponse(
+            distances.stream_matrix(points, ids, vectors, matrix_format),
+            content_type=distances.CONTENT_TYPES[matrix_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="distances.{matrix_format}"'
+        return response
 
 
-class AnnouncementViewSet(viewsets.ModelViewSet):
+class AnnouncementViewSet(ConditionalGetMixin, SparseFieldsMixin, FastListMixin, ExportMixin, viewsets.ModelViewSet):
     """
     ViewSet for viewing and editing announcements.
     All admin roles can access, but only owners or platform admins can edit/delete.
     """
-    queryset = Announcement.objects.all().order_by('-created_at')
+    # Join the creator for created_by_username and load only the serialized columns
+    queryset = Announcement.objects.select_related('created_by').only(
+        'id', 'title', 'content', 'created_at', 'updated_at', 'is_active', 'created_by__username'
+    ).order_by('-created_at', '-id')
     serializer_class = AnnouncementSerializer
     permission_classes = [IsAdminUser]
+    data_scope = ANNOUNCEMENTS
+    export_filename = 'announcements'
+    export_columns = (
+        ('id', 'id'), ('title', 'title'), ('content', 'content'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+        ('created_by', 'created_by_id'), ('created_by_username', 'created_by__username'),
+        ('is_active', 'is_active'),
+    )
+    
+    streaming_actions = ('export', 'stream')
+    
+    # Upper bounds for the search action
+    max_search_results = 100
+    max_search_offset = 1000
     
     def get_permissions(self):
         """
@@ -94,6 +628,11 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAdminUser]
         return [permission() for permission in permission_classes]
     
+    def get_serializer_class(self):
+        if self.action == 'search':
+            return AnnouncementSearchSerializer
+        return super().get_serializer_class()
+    
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
     
@@ -103,10 +642,63 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         Return the most recent announcements (limit by query param)
         """
         limit = int(request.query_params.get('limit', 5))
-        announcements = Announcement.objects.filter(is_active=True).order_by('-created_at')[:limit]
+        announcements = self.get_queryset().filter(is_active=True)[:limit]
         serializer = self.get_serializer(announcements, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """
+        Return the announcements matching ?q=, most relevant first, with
+        highlighted excerpts (see api.search). Page with ?limit= and ?offset=.
+        """
+        params = request.query_params
+        terms = search.parse_query(params.get('q'))
+        if not terms:
+            raise ValidationError({'q': 'Enter at least one word to search for.'})
+        limit = int(parse_float_param(params, 'limit', default=api_settings.PAGE_SIZE, minimum=1, maximum=self.max_search_results))
+        offset = int(parse_float_param(params, 'offset', default=0, minimum=0, maximum=self.max_search_offset))
+        
+        # One extra hit tells whether another page follows
+        hits = search.search(terms, limit + 1, offset)
+        has_next = len(hits) > limit
+        hits = hits[:limit]
+        # Put in relevance order below, so skip the queryset's own ORDER BY
+        announcements = self.get_queryset().order_by().in_bulk([hit.id for hit in hits])
+        results = []
+        for hit in hits:
+            announcement = announcements.get(hit.id)
+            if announcement is None:
+                # Deleted since the index was read
+                continue
+            announcement.score = hit.score
+            announcement.highlight = {'title': hit.title, 'content': hit.content}
+            results.append(announcement)
+        serializer = self.get_serializer(results, many=True)
+        
+        url = request.build_absolute_uri()
+        previous = None
+        if offset > 0:
+            previous = remove_query_param(url, 'offset') if offset <= limit else replace_query_param(url, 'offset', offset - limit)
+        return Response({
+            'next': replace_query_param(url, 'offset', offset + limit) if has_next else None,
+            'previous': previous,
+            'results': serializer.data,
+        })
+    
+    @action(
+        detail=False, methods=['get'],
+        authentication_classes=[EventStreamAuthentication],
+        content_negotiation_class=events.FirstRendererNegotiation,
+    )
+    def stream(self, request):
+        """
+        Push announcement changes as Server-Sent Events (see api.events).
+        The stream ends when the access token expires, and the client
+        reconnects with a current one.
+        """
+        return events.stream_response(request._request, until=request.auth.get('exp'))
+    
     @action(detail=True, methods=['patch'])
     def toggle_status(self, request, pk=None):
         """
@@ -114,6 +706,60 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         """
         announcement = self.get_object()
         announcement.is_active = not announcement.is_active
-        announcement.save()
+        # Saved as a status change, which streams publish as a toggle
+        announcement.save(update_fields=events.STATUS_FIELDS)
         serializer = self.get_serializer(announcement)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+
+class DashboardView(APIView):
+    """
+    API endpoint that returns all dashboard data in one response.
+    The payload only depends on the caller's role, so it is built once per role
+    and cached until users, warehouses or announcements change.
+    """
+    permission_classes = [IsAdminUser]
+    recent_announcements_limit = 5
+    cache_timeout = 300
+    
+    def get(self, request):
+        role = request.user.role
+        key = versioned_key(f'dashboard:{role}', USERS, WAREHOUSES, ANNOUNCEMENTS)
+        payload = cache.get(key)
+        if payload is None:
+            payload = self.build_payload(role)
+            cache.set(key, payload, self.cache_timeout)
+        return Response(payload)
+    
+    def build_payload(self, role):
+        recent = AnnouncementViewSet.queryset.filter(is_active=True)[:self.recent_announcements_limit]
+        payload = {
+            'role': role,
+            'warehouses_count': counters.get(counters.WAREHOUSES),
+            'recent_announcements': AnnouncementSerializer(recent, many=True).data,
+        }
+        if role == User.Role.PLATFORM_ADMIN:
+            payload['users_count'] = counters.get(counters.USERS)
+            payload['users_by_role'] = counters.breakdown(counters.USERS, counters.ROLE_PREFIX)
+        return payload
+
+
+class BatchView(APIView):
+    """
+    API endpoint that runs several API requests in one round trip (see
+    api.batch). Takes {"requests": [{"method", "path", "body", "headers"},
+    ...], "concurrent": false} and returns {"responses": [{"status",
+    "headers", "body"}, ...]} in the same order.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    # No batches within batches
+    batchable = False
+    
+    def post(self, request):
+        data = request.data if isinstance(request.data, dict) else {'requests': request.data}
+        items = data.get('requests')
+        if not isinstance(items, list) or not items:
+            raise ValidationError({'requests': 'Expected a list of requests.'})
+        if len(items) > settings.BATCH_MAX_REQUESTS:
+            raise ValidationError({'requests': f'At most {settings.BATCH_MAX_REQUESTS} requests are accepted per batch.'})
+        return Response({'responses': batch.run(request, items, concurrent=data.get('concurrent') is True)})
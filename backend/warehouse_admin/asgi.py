@@ -1,9 +1,19 @@
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "warehouse_admin.settings")
+# Serve the read endpoints from the async views (see api.async_views)
+os.environ.setdefault("ASYNC_READ_VIEWS", "1")
+# Async views run their queries in a fresh thread per request, so persistent
+# connections would pile up instead of being reused
+os.environ.setdefault("DATABASE_CONN_MAX_AGE", "0")
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from api.events import EventStreamASGIHandler  # noqa: E402
+
+# Django's ASGIHandler, except that event streams hold no thread while open
+application = EventStreamASGIHandler()
 
@@ -3,6 +3,8 @@ import os
 
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / "subdir".
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -30,6 +32,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover every other middleware
+    "api.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -60,24 +64,83 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "warehouse_admin.wsgi.application"
 
-# # Database
-# DATABASES = {
-#     "default": {
-#         "ENGINE": "django.db.backends.postgresql",
-#         "NAME": os.environ.get("PGDATABASE"),
-#         "USER": os.environ.get("PGUSER"),
-#         "PASSWORD": os.environ.get("PGPASSWORD"),
-#         "HOST": os.environ.get("PGHOST"),
-#         "PORT": os.environ.get("PGPORT"),
-#     }
-# }
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database
+# DATABASE_PROFILE selects the backend:
+# - "sqlite" (default): WAL journal so readers never wait on the writer,
+#   synchronous=NORMAL, a memory-mapped read path, and a busy timeout so
+#   writers from concurrent workers queue instead of failing. Transactions
+#   take the write lock up front (IMMEDIATE) so they cannot deadlock on upgrade.
+# - "sqlite-basic": the plain SQLite file with library defaults, for comparison.
+# - "postgres": configured from the PG* variables, with connections kept open
+#   across requests. Behind PgBouncer in transaction mode, also set
+#   DATABASE_DISABLE_SERVER_SIDE_CURSORS=1 (the exports iterate with them).
+DATABASE_PROFILE = os.environ.get("DATABASE_PROFILE", "sqlite")
+# Seconds a connection is reused across requests (0 closes it after each request)
+DATABASE_CONN_MAX_AGE = int(os.environ.get("DATABASE_CONN_MAX_AGE", "60"))
+
+if DATABASE_PROFILE == "postgres":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ.get("PGDATABASE"),
+            "USER": os.environ.get("PGUSER"),
+            "PASSWORD": os.environ.get("PGPASSWORD"),
+            "HOST": os.environ.get("PGHOST"),
+            "PORT": os.environ.get("PGPORT"),
+            "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+            "CONN_HEALTH_CHECKS": True,
+            "DISABLE_SERVER_SIDE_CURSORS": os.environ.get("DATABASE_DISABLE_SERVER_SIDE_CURSORS") == "1",
+        }
+    }
+elif DATABASE_PROFILE == "sqlite-basic":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+        }
+    }
+elif DATABASE_PROFILE == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": os.environ.get("SQLITE_PATH", BASE_DIR / "db.sqlite3"),
+            "CONN_MAX_AGE": DATABASE_CONN_MAX_AGE,
+            "OPTIONS": {
+                # Busy timeout in seconds
+                "timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT", "20")),
+                "transaction_mode": "IMMEDIATE",
+                "init_command": (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    f"PRAGMA mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))};"
+                ),
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unknown DATABASE_PROFILE {DATABASE_PROFILE!r}")
+
+# Cache
+# LocMemCache is per process: with several worker processes, point this at a
+# shared backend (Redis, Memcached) so invalidations reach every worker.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("DJANGO_CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("DJANGO_CACHE_LOCATION", "warehouse-admin"),
     }
 }
+if CACHES["default"]["BACKEND"].endswith(".LocMemCache"):
+    # LocMemCache culls beyond 300 entries by default, fewer than the map
+    # tiles (see api.clusters) a few zoomed-in views cache
+    CACHES["default"]["OPTIONS"] = {"MAX_ENTRIES": int(os.environ.get("DJANGO_CACHE_MAX_ENTRIES", "10000"))}
+
+# Cache the users JWTs resolve to (api.authentication). Deactivating or
+# deleting a user evicts them from the cache, which reaches every worker only
+# through a shared backend, so this is off by default with LocMemCache and a
+# system check (api.checks) refuses to start with both.
+AUTH_USER_CACHE = os.environ.get(
+    "AUTH_USER_CACHE", "0" if CACHES["default"]["BACKEND"].endswith(".LocMemCache") else "1"
+) == "1"
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -127,15 +190,67 @@ AUTH_USER_MODEL = "api.User"
 # REST Framework settings- from local settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.fast_lists.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.StandardPagination",
     "PAGE_SIZE": 10,
 }
 
+# Bulk endpoints: rows per write batch (overridable up to the max with
+# ?batch_size=) and rows accepted per request
+BULK_BATCH_SIZE = int(os.environ.get("BULK_BATCH_SIZE", "1000"))
+BULK_MAX_BATCH_SIZE = 10000
+BULK_MAX_ROWS = int(os.environ.get("BULK_MAX_ROWS", "100000"))
+
+# Processes hashing passwords for bulk user imports (api.passwords); 1 or
+# less hashes them in the request thread
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+
+# Batched API calls (api.batch): sub-requests accepted per batch, and threads
+# running the read-only ones of a {"concurrent": true} batch
+BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", "25"))
+BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "4"))
+
+# Rows fetched per database round trip by the streaming exports
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "2000"))
+
+# Request metrics (api.metrics): per-view histograms served at /metrics and a
+# Server-Timing header on every response. /metrics requires METRICS_TOKEN as
+# a bearer token and is closed while it is unset; "X-Profile: <token>"
+# profiles one request, writing folded stacks to PROFILE_DIR.
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+METRICS_SERVER_TIMING = os.environ.get("METRICS_SERVER_TIMING", "1") == "1"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+PROFILE_DIR = os.environ.get("PROFILE_DIR", BASE_DIR / "profiles")
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+
+# Serve the read endpoints from the async views in api.async_views. On by
+# default under ASGI (warehouse_admin.asgi); the sync views are used otherwise.
+ASYNC_READ_VIEWS = os.environ.get("ASYNC_READ_VIEWS", "0") == "1"
+
+# Build the warehouse and announcement list pages from values_list() rows
+# instead of model instances and serializers (api.fast_lists), rendered with
+# orjson when it is installed. The responses are byte for byte the same.
+FAST_LIST_RESPONSES = os.environ.get("FAST_LIST_RESPONSES", "0") == "1"
+
+# Announcement event streams (api.events): events kept for resuming with
+# Last-Event-ID, events a client may fall behind before it is disconnected,
+# seconds between keep-alive comments (under the proxy's read timeout) and the
+# reconnect delay suggested to clients
+EVENTS_HISTORY = int(os.environ.get("EVENTS_HISTORY", "1000"))
+EVENTS_QUEUE_SIZE = int(os.environ.get("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_HEARTBEAT = float(os.environ.get("EVENTS_HEARTBEAT", "15"))
+EVENTS_RETRY_MS = int(os.environ.get("EVENTS_RETRY_MS", "3000"))
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Change this in production
+# Let cross-origin clients read the validators for conditional requests
+CORS_EXPOSE_HEADERS = ["ETag", "Last-Modified", "Server-Timing", "X-Profile-File"]
 
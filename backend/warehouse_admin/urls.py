@@ -5,9 +5,12 @@ from django.views.generic import TemplateView
 from django.conf import settings
 from django.conf.urls.static import static
 
+from api.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
+    path("metrics", metrics_view, name="metrics"),
     
     # Serve React frontend for all other routes
     re_path(r'^.*', TemplateView.as_view(template_name='index.html'), name='frontend'),
@@ -4,7 +4,8 @@
 echo "Building frontend..."
 cd frontend && npx webpack --mode production
 cd ..
+# Write gzip and brotli variants next to the built files
+python static_assets.py frontend/dist
 
-# Start the application
-echo "Starting application..."
-gunicorn --bind 0.0.0.0:5000 --reuse-port --reload main:app
\ No newline at end of file
+# Start the API and the application (see run.sh)
+exec ./run.sh --reuse-port --reload
@@ -41,4 +41,8 @@ node webpack_build.js
 echo "Copying built files..."
 cp -R frontend/dist/* templates/
 
+# Write gzip and brotli variants next to the built files
+echo "Precompressing static files..."
+python static_assets.py frontend/dist
+
 echo "Frontend build complete!"
\ No newline at end of file
@@ -1,8 +1,10 @@
-from flask import Flask, render_template, send_from_directory, request, Response, jsonify
+from flask import Flask, render_template, request, Response, jsonify, abort
 import os
 import requests
+import requests.adapters
 import logging
 from werkzeug.middleware.proxy_fix import ProxyFix
+from static_assets import StaticAssets
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -15,112 +17,174 @@ app = Flask(__name__,
            
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
-# Django API server URL
-DJANGO_API_URL = "http://127.0.0.1:8000"
+# Django API server URL; run.sh starts the API there
+DJANGO_API_URL = os.environ.get("DJANGO_API_URL", "http://127.0.0.1:8000")
+
+# Upstream connection pool and timeout settings
+PROXY_POOL_SIZE = int(os.environ.get("PROXY_POOL_SIZE", "32"))
+PROXY_CONNECT_TIMEOUT = float(os.environ.get("PROXY_CONNECT_TIMEOUT", "3.05"))
+PROXY_READ_TIMEOUT = float(os.environ.get("PROXY_READ_TIMEOUT", "30"))
+PROXY_CHUNK_SIZE = 64 * 1024
+
+# Headers that apply to a single connection and must not be forwarded
+HOP_BY_HOP_HEADERS = frozenset([
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'trailers', 'transfer-encoding', 'upgrade',
+])
+
+
+def create_upstream_session(pool_block=True):
+    """
+    Create a requests session with a bounded keep-alive pool. When all
+    connections are busy, callers wait for a free one instead of opening more,
+    unless pool_block is False.
+    """
+    session = requests.Session()
+    # Forward client headers as-is instead of adding requests' defaults
+    session.headers.clear()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=PROXY_POOL_SIZE,
+        pool_block=pool_block,
+        max_retries=0,
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+upstream_session = create_upstream_session()
+# Event streams stay open for as long as the page does, so they get their own
+# connections instead of holding the bounded pool's. Each one also holds a
+# worker thread while it is relayed: gunicorn runs this app with the gthread
+# worker (see run.sh), since a sync worker would serve
+# nothing else once a dashboard is open.
+event_stream_session = create_upstream_session(pool_block=False)
+
+
+class RequestBodyStream:
+    """
+    File-like wrapper that lets requests stream a body of known length.
+    requests reads `len` to send a Content-Length header and then pulls the
+    body in blocks, so nothing is buffered in the proxy.
+    """
+    def __init__(self, stream, length):
+        self.stream = stream
+        self.len = length
+
+    def read(self, size=-1):
+        return self.stream.read(size)
+
+
+def forwarded_request_headers():
+    headers = {
+        name: value for name, value in request.headers.items()
+        if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() not in ('host', 'content-length')
+    }
+    forwarded_for = request.headers.get('X-Forwarded-For')
+    headers['X-Forwarded-For'] = f"{forwarded_for}, {request.remote_addr}" if forwarded_for else request.remote_addr
+    headers['X-Forwarded-Proto'] = request.scheme
+    headers['X-Forwarded-Host'] = request.host
+    return headers
+
+
+def request_body():
+    """
+    Return a streaming body for the upstream request, or None if there is none.
+    """
+    if request.content_length:
+        return RequestBodyStream(request.stream, request.content_length)
+    if request.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+        # Length unknown: requests forwards a generator with chunked encoding
+        return iter(lambda: request.stream.read(PROXY_CHUNK_SIZE), b'')
+    return None
+
+
+class UpstreamBody:
+    """
+    The body of an upstream response, and the sole owner of its connection.
+    A body read to the end hands the connection back to the pool; close(),
+    which the WSGI server calls however the response ends, closes one that
+    was not handed back. Server-Sent Events are relayed piece by piece as
+    they arrive rather than in full chunks, and never go back to the pool.
+    """
+    def __init__(self, upstream, events=False):
+        self.upstream = upstream
+        self.events = events
+        self.released = False
+
+    def __iter__(self):
+        raw = self.upstream.raw
+        if self.events:
+            yield from iter(lambda: raw.read1(PROXY_CHUNK_SIZE, decode_content=False), b'')
+            return
+        yield from raw.stream(PROXY_CHUNK_SIZE, decode_content=False)
+        raw.release_conn()
+        self.released = True
+
+    def close(self):
+        if not self.released:
+            self.upstream.close()
+
+
+def accepts_event_stream():
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
 
 # Proxy configuration for Django API
-@app.route('/api/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'OPTIONS'])
+@app.route('/api/<path:path>', methods=['GET', 'HEAD', 'POST', 'PUT', 'DELETE', 'PATCH', 'OPTIONS'])
 def proxy_api(path):
+    url = f"{DJANGO_API_URL}/api/{path}"
+    if request.query_string:
+        url = f"{url}?{request.query_string.decode('latin-1')}"
+    
+    session = event_stream_session if accepts_event_stream() else upstream_session
     try:
-        # For development, we'll just handle it directly rather than proxying
-        if request.method == 'OPTIONS':
-            # Handle CORS preflight requests
-            response = Response()
-            response.headers.add('Access-Control-Allow-Origin', '*')
-            response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization')
-            response.headers.add('Access-Control-Allow-Methods', 'GET,POST,PUT,DELETE,PATCH,OPTIONS')
-            return response
-        
-        # For now, let's just return successful JWT token for admin user
-        if path == 'token/' and request.method == 'POST':
-            data = request.get_json()
-            username = data.get('username')
-            password = data.get('password')
-            
-            # Check if credentials are valid (simple check for demo)
-            if (username == 'admin' and password == 'admin123') or \
-               (username == 'support' and password == 'support123') or \
-               (username == 'warehouse' and password == 'warehouse123'):
-                # Generate mock JWT tokens
-                return jsonify({
-                    "access": "eyJ0eXAiOiJKV1QiLCJhbGciOiJIUzI1NiJ9.eyJ0b2tlbl90eXBlIjoiYWNjZXNzIiwiZXhwIjoxNjg3MjIzMzYwLCJpYXQiOjE2ODcyMjMwNjAsImp0aSI6IjA1ZWFjMmNiOWFiMzRkZDA5MjI3ZTZhNDI0YmQyNTRhIiwidXNlcl9pZCI6MX0.example",
-                    "refresh": "eyJ0eXAiOiJKV1QiLCJhbGciOiJIUzI1NiJ9.eyJ0b2tlbl90eXBlIjoicmVmcmVzaCIsImV4cCI6MTY4NzMwOTQ2MCwiaWF0IjoxNjg3MjIzMDYwLCJqdGkiOiJjMjNiNmNiMjM3ZmY0ODlhODM3MWY5MDNmMjc0MzU5YyIsInVzZXJfaWQiOjF9.example"
-                })
-            else:
-                return jsonify({"detail": "No active account found with the given credentials"}), 401
-        
-        # For user data endpoints, return demo data
-        if path == 'current-user/' and request.method == 'GET':
-            # Return user based on the Authorization header
-            if 'Authorization' in request.headers:
-                # For simplicity, we'll recognize the user by their role in a real token
-                user_data = {
-                    "id": 1,
-                    "username": "admin",
-                    "email": "admin@example.com",
-                    "first_name": "Admin",
-                    "last_name": "User",
-                    "role": "PLATFORM_ADMIN"
-                }
-                return jsonify(user_data)
-            return jsonify({"detail": "Authentication credentials were not provided"}), 401
-        
-        # Users endpoint
-        if path == 'users/' and request.method == 'GET':
-            if 'Authorization' in request.headers:
-                users_data = {
-                    "count": 3,
-                    "next": None,
-                    "previous": None,
-                    "results": [
-                        {
-                            "id": 1,
-                            "username": "admin",
-                            "email": "admin@example.com",
-                            "first_name": "Admin",
-                            "last_name": "User",
-                            "role": "PLATFORM_ADMIN"
-                        },
-                        {
-                            "id": 2,
-                            "username": "support",
-                            "email": "support@example.com",
-                            "first_name": "Support",
-                            "last_name": "Staff",
-                            "role": "SUPPORT_STAFF"
-                        },
-                        {
-                            "id": 3,
-                            "username": "warehouse",
-                            "email": "warehouse@example.com",
-                            "first_name": "Warehouse",
-                            "last_name": "Admin",
-                            "role": "WAREHOUSE_ADMIN"
-                        }
-                    ]
-                }
-                return jsonify(users_data)
-            return jsonify({"detail": "Authentication credentials were not provided"}), 401
-        
-        # For any other path, return a message
-        return jsonify({
-            "message": f"API endpoint /api/{path} was accessed. This is a placeholder - Django backend will handle this endpoint in production."
-        })
-        
-    except Exception as e:
+        upstream = session.request(
+            request.method,
+            url,
+            headers=forwarded_request_headers(),
+            data=request_body(),
+            stream=True,
+            allow_redirects=False,
+            timeout=(PROXY_CONNECT_TIMEOUT, PROXY_READ_TIMEOUT),
+        )
+    except requests.exceptions.Timeout as e:
+        logger.error(f"Timeout proxying request to /api/{path}: {str(e)}")
+        return jsonify({"error": "Upstream API timed out"}), 504
+    except requests.exceptions.RequestException as e:
         logger.error(f"Error proxying request to /api/{path}: {str(e)}")
-        return jsonify({"error": str(e)}), 500
+        return jsonify({"error": "Upstream API unavailable"}), 502
+    
+    headers = [
+        (name, value) for name, value in upstream.raw.headers.items()
+        if name.lower() not in HOP_BY_HOP_HEADERS
+    ]
+    events = upstream.headers.get('Content-Type', '').startswith('text/event-stream')
+    return Response(UpstreamBody(upstream, events), status=upstream.status_code, headers=headers)
+
+# The webpack build, held in memory with its precompressed variants. The
+# built index.html is preferred over the one in templates.
+static_assets = StaticAssets(
+    app.static_folder,
+    fallback_index=os.path.join(app.root_path, app.template_folder, 'index.html'),
+)
 
 # Serve the main React app for most routes
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve_react(path):
-    # Specific routes for static assets
-    if path.startswith('static/'):
-        return send_from_directory('frontend/dist', path)
-    
+    if app.debug:
+        # Pick up rebuilds while developing
+        static_assets.reload_if_changed()
+
+    # Files of the build, including anything under static/
+    asset = static_assets.get(path)
+    if asset is None and (path.startswith('static/') or static_assets.index is None):
+        abort(404)
+
     # Everything else should be handled by the React app
-    return send_from_directory('templates', 'index.html')
+    return (asset or static_assets.index).response(request)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -20,12 +20,7 @@ import {
   Announcement as AnnouncementIcon,
   People as PeopleIcon
 } from '@mui/icons-material';
-import { 
-  fetchWarehouses, 
-  fetchRecentAnnouncements,
-  fetchUsers 
-} from '../store/actions';
-import { getUsersCount, getWarehousesCount } from '../utils/api';
+import { getDashboard, getRecentAnnouncements, subscribeToAnnouncements } from '../utils/api';
 import { hasRole } from '../utils/auth';
 import { useNavigate } from 'react-router-dom';
 import moment from 'moment';
@@ -50,18 +45,17 @@ const Dashboard = () => {
       setStatsLoading(true);
       
       try {
-        // Fetch recent announcements
-        dispatch(fetchRecentAnnouncements(5));
+        // One request returns everything the dashboard shows for this role
+        const data = await getDashboard();
         
-        // Fetch counts if user is platform admin
-        if (user && hasRole(user, 'PLATFORM_ADMIN')) {
-          const users = await getUsersCount();
-          setUsersCount(users);
-        }
+        dispatch({
+          type: 'ANNOUNCEMENT_RECENT_SUCCESS',
+          payload: { results: data.recent_announcements }
+        });
         
-        // All roles can see warehouses
-        const warehouses = await getWarehousesCount();
-        setWarehousesCount(warehouses);
+        // Users count is only included for platform admins
+        setUsersCount(data.users_count || 0);
+        setWarehousesCount(data.warehouses_count || 0);
       } catch (error) {
         console.error('Error fetching dashboard data:', error);
       } finally {
@@ -73,6 +67,26 @@ const Dashboard = () => {
       fetchData();
     }
   }, [dispatch, user]);
+
+  // Keep the recent announcements current from the server's event stream
+  // instead of polling. Removals and resets reload the list, since an older
+  // announcement may move up into it.
+  useEffect(() => {
+    if (!user) {
+      return undefined;
+    }
+    const reloadRecent = async () => {
+      const results = await getRecentAnnouncements();
+      dispatch({ type: 'ANNOUNCEMENT_RECENT_SUCCESS', payload: { results } });
+    };
+    return subscribeToAnnouncements((name, announcement) => {
+      if (name === 'announcement.deleted' || name === 'reset' || !announcement.is_active) {
+        reloadRecent().catch(error => console.error('Error reloading announcements:', error));
+      } else {
+        dispatch({ type: 'ANNOUNCEMENT_CHANGED', payload: announcement });
+      }
+    });
+  }, [dispatch, user]);
   
   const pieChartData = {
     labels: ['Warehouses', 'Announcements', 'Users'],
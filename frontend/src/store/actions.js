@@ -5,7 +5,8 @@ import {
   getUsers,
   getWarehouses,
   getAnnouncements,
-  getRecentAnnouncements
+  getRecentAnnouncements,
+  clearConditionalCache
 } from '../utils/api';
 
 // Authentication action types
@@ -48,6 +49,9 @@ export const logout = () => dispatch => {
   localStorage.removeItem('access_token');
   localStorage.removeItem('refresh_token');
   
+  // Cached responses belong to the user who is logging out
+  clearConditionalCache();
+  
   dispatch({ type: AUTH_LOGOUT });
 };
 
@@ -128,6 +128,9 @@ const warehouseReducer = (state = initialState.warehouses, action) => {
 };
 
 // Announcement reducer
+// Announcements on the dashboard, as in DashboardView.recent_announcements_limit
+const RECENT_ANNOUNCEMENTS_LIMIT = 5;
+
 const announcementReducer = (state = initialState.announcements, action) => {
   switch (action.type) {
     case 'ANNOUNCEMENT_LIST_REQUEST':
@@ -151,6 +154,20 @@ const announcementReducer = (state = initialState.announcements, action) => {
         loading: false,
         error: null
       };
+    case 'ANNOUNCEMENT_CHANGED': {
+      // Pushed by the event stream: an active announcement that is new or
+      // was edited. Keep the recent list newest first.
+      const announcement = action.payload;
+      const recent = [
+        announcement,
+        ...state.recent.filter(item => item.id !== announcement.id),
+      ].sort((a, b) => b.created_at.localeCompare(a.created_at) || b.id - a.id);
+      return {
+        ...state,
+        recent: recent.slice(0, RECENT_ANNOUNCEMENTS_LIMIT),
+        items: state.items.map(item => (item.id === announcement.id ? announcement : item))
+      };
+    }
     case 'ANNOUNCEMENT_LIST_FAIL':
       return {
         ...state,
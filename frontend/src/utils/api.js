@@ -25,6 +25,42 @@ api.interceptors.request.use(
   }
 );
 
+// Conditional GETs: remember each response's ETag and body, send
+// If-None-Match when the same URL is requested again and reuse the stored
+// body when the server answers 304 Not Modified.
+const conditionalCache = new Map();
+
+export const clearConditionalCache = () => conditionalCache.clear();
+
+const isGet = config => (config.method || 'get').toLowerCase() === 'get';
+
+api.interceptors.request.use(config => {
+  if (isGet(config)) {
+    const cached = conditionalCache.get(api.getUri(config));
+    if (cached) {
+      config.headers['If-None-Match'] = cached.etag;
+    }
+    config.validateStatus = status => (status >= 200 && status < 300) || status === 304;
+  }
+  return config;
+});
+
+api.interceptors.response.use(response => {
+  if (!isGet(response.config)) {
+    return response;
+  }
+  const key = api.getUri(response.config);
+  if (response.status === 304) {
+    const cached = conditionalCache.get(key);
+    if (cached) {
+      return { ...response, status: 200, data: cached.data };
+    }
+  } else if (response.headers.etag) {
+    conditionalCache.set(key, { etag: response.headers.etag, data: response.data });
+  }
+  return response;
+});
+
 // Authentication API calls
 export const login = async (username, password) => {
   const response = await axios.post('/api/token/', { username, password });
@@ -41,6 +77,12 @@ export const getCurrentUser = async () => {
   return response.data;
 };
 
+// Dashboard API calls
+export const getDashboard = async () => {
+  const response = await api.get('/dashboard/');
+  return response.data;
+};
+
 // User API calls
 export const getUsers = async (page = 1, page_size = 10) => {
   const response = await api.get(`/users/?page=${page}&page_size=${page_size}`);
@@ -114,6 +156,47 @@ export const getRecentAnnouncements = async (limit = 5) => {
   return response.data;
 };
 
+// Announcement changes pushed by the server as Server-Sent Events. EventSource
+// cannot send headers, so the access token goes in the query string. The
+// browser reconnects dropped streams by itself, but not ones the server
+// refused or ended because the token expired: those are reopened here with
+// the current token, resuming after the last event seen.
+export const subscribeToAnnouncements = (onEvent) => {
+  const eventNames = [
+    'announcement.created', 'announcement.updated', 'announcement.toggled',
+    'announcement.deleted', 'reset',
+  ];
+  let source = null;
+  let lastEventId = '';
+  let retryTimer = null;
+
+  const connect = () => {
+    const params = new URLSearchParams({ token: getTokens().accessToken || '' });
+    if (lastEventId) {
+      params.set('last_event_id', lastEventId);
+    }
+    source = new EventSource(`/api/announcements/stream/?${params}`);
+    source.addEventListener('ready', event => {
+      lastEventId = event.lastEventId;
+    });
+    eventNames.forEach(name => source.addEventListener(name, event => {
+      lastEventId = event.lastEventId;
+      onEvent(name, JSON.parse(event.data));
+    }));
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED) {
+        retryTimer = setTimeout(connect, 5000);
+      }
+    };
+  };
+
+  connect();
+  return () => {
+    clearTimeout(retryTimer);
+    source.close();
+  };
+};
+
 export const getAnnouncement = async (id) => {
   const response = await api.get(`/announcements/${id}/`);
   return response.data;
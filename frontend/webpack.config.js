@@ -5,8 +5,10 @@ module.exports = {
   entry: './src/index.js',
   output: {
     path: path.resolve(__dirname, 'dist'),
-    filename: 'bundle.js',
-    publicPath: '/'
+    // Content-hashed names are served as immutable (see static_assets.py)
+    filename: '[name].[contenthash:20].js',
+    publicPath: '/',
+    clean: true
   },
   module: {
     rules: [
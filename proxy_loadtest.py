@@ -0,0 +1,126 @@
+"""
+Load test for flask_app.proxy_api against a local stub upstream.
+
+Starts a keep-alive HTTP/1.1 stub in place of Django, serves the Flask app on
+a local port, drives it from concurrent clients and reports p50/p99 latency,
+requests per second and how many upstream TCP connections the proxy opened.
+
+Usage: python proxy_loadtest.py [--requests 2000] [--concurrency 16] [--body-size 16384]
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from werkzeug.serving import make_server
+
+import flask_app
+
+
+class StubUpstream(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, body_size):
+        super().__init__(address, StubHandler)
+        self.body = b'{"data":"' + b'x' * max(0, body_size - 11) + b'"}'
+        self.connections = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        received = 0
+        while received < length:
+            chunk = self.rfile.read(min(65536, length - received))
+            if not chunk:
+                break
+            received += len(chunk)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.server.body)))
+        self.end_headers()
+        self.wfile.write(self.server.body)
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def run(total, concurrency, body_size):
+    upstream = StubUpstream(('127.0.0.1', 0), body_size)
+    serve(upstream)
+    flask_app.DJANGO_API_URL = f"http://127.0.0.1:{upstream.server_address[1]}"
+
+    proxy = make_server('127.0.0.1', 0, flask_app.app, threaded=True)
+    serve(proxy)
+    proxy_url = f"http://127.0.0.1:{proxy.server_port}/api/warehouses/"
+
+    local = threading.local()
+    payload = b'{"city":"Load Test","latitude":1.0,"longitude":2.0}'
+
+    def one_request(index):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        if index % 5 == 0:
+            response = session.post(proxy_url, data=payload, headers={'Content-Type': 'application/json'})
+        else:
+            response = session.get(proxy_url)
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+    # Warm up the pool before measuring
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(one_request, range(concurrency)))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        latencies = sorted(executor.map(one_request, range(total)))
+    elapsed = time.perf_counter() - start
+
+    proxy.shutdown()
+    upstream.shutdown()
+
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000,
+        'requests_per_second': total / elapsed,
+        'upstream_connections': upstream.connections,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--body-size', type=int, default=16384)
+    args = parser.parse_args()
+
+    result = run(args.requests, args.concurrency, args.body_size)
+    print(f"requests:             {result['requests']} (concurrency {result['concurrency']})")
+    print(f"p50 latency:          {result['p50_ms']:.2f} ms")
+    print(f"p99 latency:          {result['p99_ms']:.2f} ms")
+    print(f"requests per second:  {result['requests_per_second']:.1f}")
+    print(f"upstream connections: {result['upstream_connections']} (pool size {flask_app.PROXY_POOL_SIZE})")
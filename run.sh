@@ -0,0 +1,29 @@
+#!/bin/bash
+
+# Start the Django API and the Flask app in front of it. The Flask app serves
+# the frontend and proxies /api/* to DJANGO_API_URL (http://127.0.0.1:8000 by
+# default), so both must run. Arguments are passed on to gunicorn.
+#
+# Each open dashboard holds an announcement event stream, and with it a proxy
+# thread, for as long as the page is open, so the proxy runs threaded: a
+# single sync worker would be taken by the first dashboard and every other
+# request would wait. Raise GUNICORN_THREADS above the number of dashboards
+# expected open at once.
+#
+# The API runs as one ASGI process: its caches are per process (see CACHES in
+# backend/warehouse_admin/settings.py).
+
+set -e
+
+python backend/manage.py migrate --noinput
+
+# Stop whichever server is left when the other one exits
+trap 'kill $(jobs -p) 2>/dev/null' EXIT
+
+echo "Starting API..."
+uvicorn --app-dir backend --host 127.0.0.1 --port 8000 warehouse_admin.asgi:application &
+
+echo "Starting application..."
+gunicorn --bind 0.0.0.0:5000 --worker-class gthread --threads "${GUNICORN_THREADS:-64}" "$@" main:app &
+
+wait -n
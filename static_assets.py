@@ -0,0 +1,213 @@
+"""
+Precompressed, in-memory static files for the React build.
+
+StaticAssets loads every file of the webpack output directory once, together
+with gzip and brotli variants of the compressible ones, and answers requests
+from memory with the variant the client's Accept-Encoding prefers.
+
+Variants are read from the .gz and .br files that `python static_assets.py
+DIRECTORY` writes next to each asset at build time (at the highest compression
+levels), and are compressed at load time, more cheaply, for files without
+them. Brotli needs the optional brotli package; without it only gzip is
+offered.
+
+Files whose names carry a webpack content hash (main.3b1f0c9e2a4d5f6a.js) never
+change under the same URL and are cached by browsers for a year without
+revalidation. Everything else, index.html included, carries an ETag and is
+revalidated on every use, which costs a 304 with no body when nothing changed.
+
+Usage: python static_assets.py frontend/dist
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+
+from werkzeug.wrappers import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Media types worth compressing; images, fonts and archives already are
+COMPRESSIBLE_TYPES = re.compile(r'^(text/|application/(javascript|json|xml|manifest\+json)|image/svg\+xml)')
+# Smaller files fit in a packet either way
+MIN_COMPRESS_SIZE = 256
+# Webpack [contenthash] names: a dot-separated run of at least 8 hex digits
+HASHED_NAME = re.compile(r'\.[0-9a-f]{8,}\.')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# Content codings in order of preference, with their file suffixes
+SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def encodings():
+    return [encoding for encoding in SUFFIXES if encoding != 'br' or brotli is not None]
+
+
+def compress(data, encoding, best=True):
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if best else 5)
+    return gzip.compress(data, compresslevel=9 if best else 6, mtime=0)
+
+
+def is_compressible(path, size):
+    content_type = mimetypes.guess_type(path)[0] or ''
+    return size >= MIN_COMPRESS_SIZE and COMPRESSIBLE_TYPES.match(content_type) is not None
+
+
+def is_variant(path):
+    return path.endswith(tuple(SUFFIXES.values()))
+
+
+def asset_files(directory):
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if not is_variant(path):
+                yield path
+
+
+def precompress(directory):
+    """
+    Write the compressed variants of every compressible file in directory
+    that lacks an up-to-date one. Variants no smaller than the file are not
+    written. Returns the number of files written.
+    """
+    written = 0
+    for path in asset_files(directory):
+        stat = os.stat(path)
+        if not is_compressible(path, stat.st_size):
+            continue
+        data = None
+        for encoding in encodings():
+            target = path + SUFFIXES[encoding]
+            if os.path.exists(target) and os.stat(target).st_mtime_ns >= stat.st_mtime_ns:
+                continue
+            if data is None:
+                with open(path, 'rb') as source:
+                    data = source.read()
+            compressed = compress(data, encoding)
+            if len(compressed) >= len(data):
+                continue
+            with open(target, 'wb') as output:
+                output.write(compressed)
+            written += 1
+    return written
+
+
+class Asset:
+    """
+    One file: its bytes per content coding ('identity' for the file itself),
+    media type, cache policy and the content digest its ETags derive from.
+    """
+    def __init__(self, path, cache_control):
+        with open(path, 'rb') as source:
+            data = source.read()
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type == 'application/javascript':
+            self.content_type += '; charset=utf-8'
+        self.cache_control = cache_control
+        self.digest = hashlib.sha256(data).hexdigest()[:20]
+        self.variants = {'identity': data}
+        if is_compressible(path, len(data)):
+            mtime = os.stat(path).st_mtime_ns
+            for encoding in encodings():
+                variant = path + SUFFIXES[encoding]
+                if os.path.exists(variant) and os.stat(variant).st_mtime_ns >= mtime:
+                    with open(variant, 'rb') as source:
+                        compressed = source.read()
+                else:
+                    compressed = compress(data, encoding, best=False)
+                if len(compressed) < len(data):
+                    self.variants[encoding] = compressed
+
+    def etag(self, encoding):
+        # Each coding is a different representation and needs its own tag
+        return self.digest if encoding == 'identity' else f'{self.digest}-{encoding}'
+
+    def negotiate(self, accept_encodings):
+        """
+        Pick the variant werkzeug's parsed Accept-Encoding rates highest, ties
+        going to brotli; identity when no compressed variant is acceptable.
+        """
+        best, best_quality = 'identity', 0
+        for encoding in SUFFIXES:
+            if encoding in self.variants:
+                quality = accept_encodings[encoding]
+                if quality > best_quality:
+                    best, best_quality = encoding, quality
+        return best
+
+    def response(self, request):
+        encoding = self.negotiate(request.accept_encodings) if len(self.variants) > 1 else 'identity'
+        etag = self.etag(encoding)
+        headers = {'Cache-Control': self.cache_control}
+        if len(self.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304, headers=headers)
+        else:
+            response = Response(self.variants[encoding], headers=headers, content_type=self.content_type)
+        response.set_etag(etag)
+        return response
+
+
+class StaticAssets:
+    """
+    The files under directory by URL path, plus the SPA's index.html, read
+    from directory or else from fallback_index.
+    """
+    def __init__(self, directory, fallback_index=None):
+        self.directory = directory
+        self.fallback_index = fallback_index
+        self.load()
+
+    def index_path(self):
+        path = os.path.join(self.directory, 'index.html')
+        return path if os.path.exists(path) or self.fallback_index is None else self.fallback_index
+
+    def signature(self):
+        """
+        What changes when a build replaces the files: the directory listing
+        (new content-hashed names) and index.html.
+        """
+        signature = []
+        for path in (self.directory, self.index_path()):
+            try:
+                signature.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def load(self):
+        self.loaded_signature = self.signature()
+        assets = {}
+        if os.path.isdir(self.directory):
+            for path in asset_files(self.directory):
+                name = os.path.relpath(path, self.directory).replace(os.sep, '/')
+                assets[name] = Asset(path, IMMUTABLE if HASHED_NAME.search(name) else REVALIDATE)
+        self.assets = assets
+        index = self.index_path()
+        self.index = Asset(index, REVALIDATE) if os.path.exists(index) else None
+
+    def reload_if_changed(self):
+        if self.signature() != self.loaded_signature:
+            self.load()
+
+    def get(self, path):
+        return self.assets.get(path)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit(__doc__.strip().splitlines()[-1])
+    count = precompress(sys.argv[1])
+    print(f"Precompressed {count} files in {sys.argv[1]}" + ('' if brotli else ' (gzip only: brotli is not installed)'))
@@ -0,0 +1,196 @@
+"""
+Load test for flask_app.serve_react: the in-memory, precompressed assets of
+static_assets against the send_from_directory handler they replaced.
+
+Unless --dist points at a real webpack build, a stand-in is written to a
+temporary directory: index.html and a content-hashed bundle of about
+--bundle-size bytes of source text. Each handler is served on a local port
+and driven by concurrent browser-like clients loading the page (index.html
+plus the bundle) in two ways:
+
+  first visit   nothing cached
+  repeat visit  cached from a first visit; everything without explicit
+                freshness is revalidated, immutable assets are not requested
+
+and the report gives page views and requests per second and the bytes
+transferred per page view.
+
+Usage: python static_loadtest.py [--requests 2000] [--concurrency 16] [--bundle-size 1500000] [--dist DIR]
+"""
+import argparse
+import hashlib
+import http.client
+import logging
+import os
+import re
+import statistics
+import sysconfig
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, send_from_directory
+from werkzeug.serving import make_server
+
+import flask_app
+import static_assets
+
+ACCEPT_ENCODING = 'gzip, deflate, br'
+
+
+def write_stand_in_build(directory, bundle_size):
+    """
+    Write index.html and static/js/main.<hash>.js, the bundle made of Python
+    standard library source, which compresses about like minified JS.
+    """
+    parts, size = [], 0
+    library = sysconfig.get_paths()['stdlib']
+    for name in sorted(os.listdir(library)):
+        if size >= bundle_size:
+            break
+        if name.endswith('.py'):
+            with open(os.path.join(library, name), 'rb') as source:
+                text = source.read()
+            parts.append(text)
+            size += len(text)
+    bundle = b''.join(parts)[:bundle_size]
+    name = f"static/js/main.{hashlib.sha256(bundle).hexdigest()[:20]}.js"
+    os.makedirs(os.path.join(directory, 'static', 'js'))
+    with open(os.path.join(directory, name), 'wb') as output:
+        output.write(bundle)
+    with open(os.path.join(flask_app.app.root_path, 'frontend', 'public', 'index.html'), 'rb') as source:
+        index = source.read()
+    index = index.replace(b'</body>', f'<script defer src="/{name}"></script></body>'.encode())
+    with open(os.path.join(directory, 'index.html'), 'wb') as output:
+        output.write(index)
+
+
+def page_assets(dist):
+    """
+    The URLs a page view loads: / and the scripts index.html references.
+    """
+    with open(os.path.join(dist, 'index.html')) as index:
+        scripts = re.findall(r'<script[^>]+src="([^"]+)"', index.read())
+    return ['/'] + scripts
+
+
+def legacy_app(dist):
+    """
+    serve_react as it was before static_assets.
+    """
+    app = Flask(__name__, static_folder=None)
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve_react(path):
+        if path.startswith('static/'):
+            return send_from_directory(dist, path)
+        return send_from_directory(dist, 'index.html')
+
+    return app
+
+
+def current_app(dist):
+    flask_app.static_assets = static_assets.StaticAssets(dist)
+    return flask_app.app
+
+
+class Browser:
+    """
+    One keep-alive connection with a validator cache, like a browser tab.
+    """
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port)
+        self.cache = {}
+
+    def get(self, path, revalidate):
+        headers = {'Accept-Encoding': ACCEPT_ENCODING}
+        cached = self.cache.get(path)
+        if revalidate and cached is not None:
+            if 'immutable' in cached.get('cache-control', ''):
+                return 0, 0
+            if 'etag' in cached:
+                headers['If-None-Match'] = cached['etag']
+            if 'last-modified' in cached:
+                headers['If-Modified-Since'] = cached['last-modified']
+        self.connection.request('GET', path, headers=headers)
+        response = self.connection.getresponse()
+        body = response.read()
+        if response.status not in (200, 304):
+            raise RuntimeError(f"GET {path} returned {response.status}")
+        if response.status == 200:
+            self.cache[path] = {name.lower(): value for name, value in response.getheaders()}
+        header_bytes = sum(len(name) + len(value) + 4 for name, value in response.getheaders())
+        return 1, len(body) + header_bytes
+
+
+def run(app, urls, total, concurrency, repeat):
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    local = threading.local()
+
+    def page_view(_):
+        browser = getattr(local, 'browser', None)
+        if browser is None:
+            browser = local.browser = Browser(server.server_port)
+            if repeat:
+                for url in urls:
+                    browser.get(url, revalidate=False)
+        start = time.perf_counter()
+        requests = transferred = 0
+        for url in urls:
+            sent, size = browser.get(url, revalidate=repeat)
+            requests += sent
+            transferred += size
+        return time.perf_counter() - start, requests, transferred
+
+    # Open every client's connection (and cache) before measuring
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(page_view, range(concurrency)))
+        start = time.perf_counter()
+        results = list(executor.map(page_view, range(total)))
+        elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    latencies = sorted(latency for latency, _, _ in results)
+    return {
+        'page_views_per_second': total / elapsed,
+        'requests_per_second': sum(requests for _, requests, _ in results) / elapsed,
+        'bytes_per_view': sum(size for _, _, size in results) / total,
+        'p50_ms': statistics.median(latencies) * 1000,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='page views per measurement')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--bundle-size', type=int, default=1500000)
+    parser.add_argument('--dist', help='a webpack build to serve instead of the stand-in')
+    args = parser.parse_args()
+    # One log line per request would be most of what is measured
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        dist = args.dist
+        if dist is None:
+            dist = directory
+            write_stand_in_build(dist, args.bundle_size)
+            start = time.perf_counter()
+            written = static_assets.precompress(dist)
+            print(f"precompressed {written} files in {time.perf_counter() - start:.1f}s"
+                  + ('' if static_assets.brotli else ' (gzip only: brotli is not installed)'))
+        urls = page_assets(dist)
+        print(f"page: {', '.join(urls)}")
+
+        for label, app in (('send_from_directory', legacy_app(dist)), ('static_assets', current_app(dist))):
+            for visit, repeat in (('first visit', False), ('repeat visit', True)):
+                result = run(app, urls, args.requests, args.concurrency, repeat)
+                print(
+                    f"{label:<20} {visit:<13} {result['page_views_per_second']:8.1f} views/s "
+                    f"{result['requests_per_second']:8.1f} req/s  {result['bytes_per_view'] / 1024:9.1f} KiB/view  "
+                    f"p50={result['p50_ms']:.2f}ms"
+                )